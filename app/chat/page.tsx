@@ -20,6 +20,7 @@ interface Message {
   language: Language;
   citations?: Citation[];
   timestamp: Date;
+  messageId?: string;
 }
 
 interface Citation {
@@ -141,6 +142,7 @@ export default function ChatPage() {
         language: data.language,
         citations: data.citations,
         timestamp: new Date(),
+        messageId: data.message_id ?? undefined,
       };
       setMessages((prev) => [...prev, assistantMessage]);
       setConversationId(data.conversation_id);
@@ -2,21 +2,31 @@
 
 from __future__ import annotations
 
+import json
 from datetime import datetime, timezone
-from time import perf_counter
-from typing import List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from loguru import logger
 from pydantic import BaseModel
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 from app.models import Conversation, Message, QueryAnalytics
-from app.services.generation import generate_answer
-from app.services.retrieval import retrieve_relevant_documents
+from app.services.analytics import analytics_writer
+from app.services.answer_cache import answer_cache
+from app.services.article_reference import parse_article_reference
+from app.services.generation import extract_citations, generate_answer, stream_answer
+from app.services.pipeline import StagePipeline
+from app.services.rate_limit import usage_limiter
+from app.services.retrieval import (
+    generate_query_embedding,
+    retrieve_exact_article,
+    retrieve_relevant_documents,
+)
 
 router = APIRouter()
 
@@ -38,6 +48,8 @@ class ChatRequest(BaseModel):
     voice_input: bool = False
     user_id: Optional[str] = None
     client_token: Optional[str] = None
+    bypass_cache: bool = False  # force fresh retrieval + generation
+    search_mode: Optional[Literal["fast", "balanced", "accurate", "exact"]] = None
 
 
 class Citation(BaseModel):
@@ -56,9 +68,12 @@ class ChatResponse(BaseModel):
     language: str
     citations: List[Citation]
     conversation_id: str
+    message_id: Optional[str] = None  # assistant message, for /api/v1/voice/messages/{id}/audio
     processing_time: float
     remaining_questions: int
     daily_limit: int
+    cached: bool = False
+    timings: Dict[str, float] = {}  # per-stage durations in milliseconds
 
 
 @router.post("/", response_model=ChatResponse)
@@ -81,47 +96,43 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
         request.message[:80],
     )
 
-    process_start = perf_counter()
-    limit, remaining_before = await _check_usage_limit(
-        db=db,
-        user_id=user_id,
-        client_token=client_token,
-    )
-
-    conversation = await _resolve_conversation(
-        db=db,
-        conversation_id=request.conversation_id,
-        user_id=user_id,
-        client_token=client_token,
-        language=query_language,
+    pipeline = StagePipeline()
+    (limit, remaining_before), conversation, query_embedding = await _start_turn(
+        db, pipeline=pipeline, request=request, language=query_language
     )
 
     try:
-        user_message = Message(
-            id=str(uuid4()),
-            conversation_id=conversation.id,
-            role="user",
-            content=request.message.strip(),
-            language=query_language,
-            citations=None,
-            voice_used=request.voice_input,
-        )
-        db.add(user_message)
-        await db.flush()
-
-        relevant_docs = await retrieve_relevant_documents(
-            db=db,
-            query=request.message,
-            language=query_language,
-            top_k=5,
-        )
-
-        answer, citations = await generate_answer(
-            query=request.message,
-            documents=relevant_docs,
+        domain = _detect_domain(request.message)
+        query_embedding, cached_answer, relevant_docs = await _retrieve_for_turn(
+            db,
+            pipeline=pipeline,
+            request=request,
             language=query_language,
+            domain=domain,
+            embedding=query_embedding,
         )
 
+        if cached_answer:
+            answer, citations = cached_answer
+        else:
+            with pipeline.stage("generation"):
+                answer, citations = await generate_answer(
+                    query=request.message,
+                    documents=relevant_docs,
+                    language=query_language,
+                )
+
+            if citations and query_embedding is not None:
+                await answer_cache.store(
+                    db,
+                    embedding=query_embedding,
+                    language=query_language,
+                    domain=domain,
+                    answer=answer,
+                    citations=citations,
+                )
+
+        processing_time = pipeline.elapsed
         assistant_message = Message(
             id=str(uuid4()),
             conversation_id=conversation.id,
@@ -130,12 +141,11 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
             language=query_language,
             citations=citations,
             voice_used=False,
+            response_time_ms=int(processing_time * 1000),
         )
         db.add(assistant_message)
 
-        processing_time = perf_counter() - process_start
         await _record_analytics(
-            db,
             query=request.message,
             language=query_language,
             duration_seconds=processing_time,
@@ -151,25 +161,28 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
             language=query_language,
             citations=citations,
             conversation_id=conversation.id,
+            message_id=assistant_message.id,
             processing_time=processing_time,
             remaining_questions=remaining_after,
             daily_limit=limit,
+            cached=cached_answer is not None,
+            timings=pipeline.timings,
         )
 
         logger.info(
-            "Responded to conversation %s in %.2fs with %s citations",
+            "Responded to conversation {} in {:.2f}s with {} citations ({})",
             conversation.id,
             processing_time,
             len(citations),
+            pipeline.summary(),
         )
         return response
 
     except Exception as error:
         await _record_analytics(
-            db,
             query=request.message,
             language=query_language,
-            duration_seconds=perf_counter() - process_start,
+            duration_seconds=pipeline.elapsed,
             voice_used=request.voice_input,
             successful=False,
             user_id=user_id,
@@ -179,6 +192,334 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Failed to process request")
 
 
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Streaming chat endpoint (Server-Sent Events).
+
+    Emits a ``citations`` event as soon as retrieval finishes, then ``token``
+    events while the answer is generated, and a final ``done`` event. The
+    assistant message and analytics are persisted once the stream completes.
+    """
+    query_language = request.language or "ar"
+    user_id = request.user_id
+    client_token = request.client_token or user_id
+
+    if not client_token:
+        raise HTTPException(status_code=400, detail="Missing client identifier")
+
+    logger.info(
+        "Received streaming chat request in {} for user {} / client {}: {}...",
+        query_language,
+        user_id or "anonymous",
+        client_token,
+        request.message[:80],
+    )
+
+    pipeline = StagePipeline()
+    (limit, remaining_before), conversation, query_embedding = await _start_turn(
+        db, pipeline=pipeline, request=request, language=query_language
+    )
+
+    try:
+        domain = _detect_domain(request.message)
+        query_embedding, cached_answer, relevant_docs = await _retrieve_for_turn(
+            db,
+            pipeline=pipeline,
+            request=request,
+            language=query_language,
+            domain=domain,
+            embedding=query_embedding,
+        )
+
+        if cached_answer:
+            citations = cached_answer[1]
+        else:
+            citations = extract_citations(relevant_docs) if relevant_docs else []
+
+        # The stream persists with its own session, so the conversation and
+        # user message must be committed before the response starts.
+        await db.commit()
+
+    except Exception as error:
+        await _record_analytics(
+            query=request.message,
+            language=query_language,
+            duration_seconds=pipeline.elapsed,
+            voice_used=request.voice_input,
+            successful=False,
+            user_id=user_id,
+            client_token=client_token,
+        )
+        logger.exception("Streaming chat setup failed: {}", error)
+        raise HTTPException(status_code=500, detail="Failed to process request")
+
+    events = _stream_chat_events(
+        request=request,
+        language=query_language,
+        domain=domain,
+        embedding=query_embedding,
+        conversation_id=conversation.id,
+        documents=relevant_docs,
+        citations=citations,
+        cached_answer=cached_answer[0] if cached_answer else None,
+        user_id=user_id,
+        client_token=client_token,
+        pipeline=pipeline,
+        remaining_after=max(remaining_before - 1, 0),
+        limit=limit,
+    )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_chat_events(
+    *,
+    request: ChatRequest,
+    language: str,
+    domain: Optional[str],
+    embedding: Optional[List[float]],
+    conversation_id: str,
+    documents: List[Dict[str, Any]],
+    citations: List[Dict[str, Any]],
+    cached_answer: Optional[str],
+    user_id: Optional[str],
+    client_token: str,
+    pipeline: StagePipeline,
+    remaining_after: int,
+    limit: int,
+) -> AsyncIterator[str]:
+    """Yield SSE frames for one chat turn and persist it once complete."""
+
+    yield _sse_event(
+        "citations",
+        {
+            "conversation_id": conversation_id,
+            "citations": citations,
+            "cached": cached_answer is not None,
+        },
+    )
+
+    answer_parts: List[str] = []
+    time_to_first_token: Optional[float] = None
+    try:
+        if cached_answer is not None:
+            time_to_first_token = pipeline.elapsed
+            answer_parts.append(cached_answer)
+            yield _sse_event("token", {"text": cached_answer})
+        else:
+            with pipeline.stage("generation"):
+                async for delta in stream_answer(
+                    query=request.message,
+                    documents=documents,
+                    language=language,
+                ):
+                    if time_to_first_token is None:
+                        time_to_first_token = pipeline.elapsed
+                    answer_parts.append(delta)
+                    yield _sse_event("token", {"text": delta})
+
+        answer = "".join(answer_parts)
+        processing_time = pipeline.elapsed
+        if time_to_first_token is None:
+            time_to_first_token = processing_time
+
+        message_id = str(uuid4())
+        async with AsyncSessionLocal() as session:
+            session.add(
+                Message(
+                    id=message_id,
+                    conversation_id=conversation_id,
+                    role="assistant",
+                    content=answer,
+                    language=language,
+                    citations=citations,
+                    voice_used=False,
+                    response_time_ms=int(processing_time * 1000),
+                    time_to_first_token_ms=int(time_to_first_token * 1000),
+                )
+            )
+            await _record_analytics(
+                query=request.message,
+                language=language,
+                duration_seconds=processing_time,
+                voice_used=request.voice_input,
+                successful=True,
+                user_id=user_id,
+                client_token=client_token,
+                time_to_first_token_seconds=time_to_first_token,
+            )
+            if cached_answer is None and citations and embedding is not None:
+                await answer_cache.store(
+                    session,
+                    embedding=embedding,
+                    language=language,
+                    domain=domain,
+                    answer=answer,
+                    citations=citations,
+                )
+            await session.commit()
+
+        logger.info(
+            "Streamed conversation {} (first token {:.2f}s, total {:.2f}s; {})",
+            conversation_id,
+            time_to_first_token,
+            processing_time,
+            pipeline.summary(),
+        )
+        yield _sse_event(
+            "done",
+            {
+                "conversation_id": conversation_id,
+                "message_id": message_id,
+                "language": language,
+                "processing_time": processing_time,
+                "time_to_first_token": time_to_first_token,
+                "remaining_questions": remaining_after,
+                "daily_limit": limit,
+                "cached": cached_answer is not None,
+                "timings": pipeline.timings,
+            },
+        )
+
+    except Exception as error:
+        logger.exception("Streaming chat failed: {}", error)
+        await _record_analytics(
+            query=request.message,
+            language=language,
+            duration_seconds=pipeline.elapsed,
+            voice_used=request.voice_input,
+            successful=False,
+            user_id=user_id,
+            client_token=client_token,
+        )
+        yield _sse_event("error", {"detail": "Failed to process request"})
+
+
+async def _start_turn(
+    db: AsyncSession,
+    *,
+    pipeline: StagePipeline,
+    request: ChatRequest,
+    language: str,
+) -> Tuple[Tuple[int, int], Conversation, Optional[List[float]]]:
+    """Run the independent opening stages of a chat turn concurrently.
+
+    The quota check (on its own session), the conversation/user-message
+    writes (on ``db``) and the query embedding do not depend on each other.
+    A failing stage, such as an exhausted quota, cancels the others.
+    """
+
+    client_token = request.client_token or request.user_id
+
+    async def check_quota() -> Tuple[int, int]:
+        async with AsyncSessionLocal() as session:
+            return await _check_usage_limit(
+                db=session,
+                user_id=request.user_id,
+                client_token=client_token,
+            )
+
+    async def open_conversation() -> Conversation:
+        conversation = await _resolve_conversation(
+            db=db,
+            conversation_id=request.conversation_id,
+            user_id=request.user_id,
+            client_token=client_token,
+            language=language,
+        )
+        db.add(
+            Message(
+                id=str(uuid4()),
+                conversation_id=conversation.id,
+                role="user",
+                content=request.message.strip(),
+                language=language,
+                citations=None,
+                voice_used=request.voice_input,
+            )
+        )
+        await db.flush()
+        return conversation
+
+    async def embed_query() -> Optional[List[float]]:
+        # Explicit article references are answered without an embedding
+        if parse_article_reference(request.message) is not None:
+            return None
+        try:
+            return await generate_query_embedding(request.message)
+        except Exception as error:
+            # Retried by _retrieve_for_turn, where failures are recorded
+            logger.warning("Concurrent query embedding failed: {}", error)
+            return None
+
+    stages = await pipeline.gather(
+        quota=check_quota(),
+        conversation=open_conversation(),
+        embedding=embed_query(),
+    )
+    return stages["quota"], stages["conversation"], stages["embedding"]
+
+
+async def _retrieve_for_turn(
+    db: AsyncSession,
+    *,
+    pipeline: StagePipeline,
+    request: ChatRequest,
+    language: str,
+    domain: Optional[str],
+    embedding: Optional[List[float]],
+) -> Tuple[Optional[List[float]], Optional[Tuple[str, List[Dict[str, Any]]]], List[Dict[str, Any]]]:
+    """Return ``(embedding, cached_answer, documents)`` for a chat turn.
+
+    Explicit article references are resolved by exact lookup without
+    embedding the query (``embedding`` is then ``None`` and the semantic cache
+    is skipped). Otherwise the query embedding, computed by ``_start_turn``
+    when possible, is used for both the semantic cache and vector retrieval.
+    """
+
+    if embedding is None:
+        with pipeline.stage("exact_lookup"):
+            documents = await retrieve_exact_article(db, request.message)
+        if documents:
+            return None, None, documents
+
+        with pipeline.stage("embedding"):
+            embedding = await generate_query_embedding(request.message)
+
+    if not request.bypass_cache:
+        with pipeline.stage("answer_cache"):
+            cached_answer = await answer_cache.lookup(
+                db,
+                embedding=embedding,
+                language=language,
+                domain=domain,
+            )
+        if cached_answer:
+            return embedding, cached_answer, []
+
+    with pipeline.stage("retrieval"):
+        documents = await retrieve_relevant_documents(
+            db=db,
+            query=request.message,
+            language=language,
+            top_k=5,
+            embedding=embedding,
+            search_mode=request.search_mode,
+            exact_lookup=False,
+        )
+    return embedding, None, documents
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Events frame."""
+
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @router.get("/history")
 async def get_conversation_history(user_id: str, db = Depends(get_db)):
     """Get user's conversation history"""
@@ -238,7 +579,6 @@ async def _resolve_conversation(
 
 
 async def _record_analytics(
-    db: AsyncSession,
     *,
     query: str,
     language: str,
@@ -247,22 +587,25 @@ async def _record_analytics(
     successful: bool,
     user_id: Optional[str],
     client_token: str,
+    time_to_first_token_seconds: Optional[float] = None,
 ) -> None:
-    """Store query analytics for monitoring and compliance."""
+    """Queue query analytics for monitoring and compliance (written in batches)."""
 
-    analytics = QueryAnalytics(
-        id=str(uuid4()),
+    await analytics_writer.record(
         query=query[:500],
         language=language,
         domain=_detect_domain(query),
         response_time_ms=int(duration_seconds * 1000),
+        time_to_first_token_ms=(
+            int(time_to_first_token_seconds * 1000)
+            if time_to_first_token_seconds is not None
+            else None
+        ),
         voice_used=voice_used,
         successful=successful,
         user_id=user_id,
         client_token=client_token,
     )
-    db.add(analytics)
-    await db.flush()
 
 
 async def _check_usage_limit(
@@ -271,24 +614,45 @@ async def _check_usage_limit(
     user_id: Optional[str],
     client_token: str,
 ) -> Tuple[int, int]:
-    """Ensure the caller has remaining quota for the current day."""
+    """Ensure the caller has remaining quota for the current day.
+
+    Consumes one request from the caller's daily quota and sliding window
+    (see ``app.services.rate_limit``). ``db`` is only used to seed the day's
+    counter from ``query_analytics`` the first time an identity is seen.
+    """
 
     limit = 10 if user_id else 5
-    start_of_day = datetime.now(timezone.utc).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
+    identity = f"user:{user_id}" if user_id else f"client:{client_token}"
+
+    async def count_today() -> int:
+        start_of_day = datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        stmt = select(func.count()).where(QueryAnalytics.created_at >= start_of_day)
+        if user_id:
+            stmt = stmt.where(QueryAnalytics.user_id == user_id)
+        else:
+            stmt = stmt.where(QueryAnalytics.client_token == client_token)
 
-    stmt = select(func.count()).where(QueryAnalytics.created_at >= start_of_day)
-    if user_id:
-        stmt = stmt.where(QueryAnalytics.user_id == user_id)
-    else:
-        stmt = stmt.where(QueryAnalytics.client_token == client_token)
+        result = await db.execute(stmt)
+        return result.scalar() or 0
 
-    result = await db.execute(stmt)
-    count = result.scalar() or 0
+    decision = await usage_limiter.consume(identity, limit, count_today)
+
+    if decision.reason == "window":
+        logger.info(
+            "Rate limit window exceeded for user {} / client {} (retry in {}s)",
+            user_id or "anonymous",
+            client_token,
+            decision.retry_after,
+        )
+        raise HTTPException(
+            status_code=429,
+            detail={"code": "RATE_LIMITED", "retry_after": decision.retry_after},
+            headers={"Retry-After": str(decision.retry_after)},
+        )
 
-    remaining = limit - count
-    if remaining <= 0:
+    if not decision.allowed:
         logger.info(
             "Usage limit reached for user %s / client %s (limit=%s)",
             user_id or "anonymous",
@@ -300,7 +664,8 @@ async def _check_usage_limit(
             detail={"code": "LIMIT_REACHED", "limit": limit},
         )
 
-    return limit, remaining
+    # Remaining quota before this request, as callers expect
+    return limit, decision.remaining + 1
 
 
 def _detect_domain(query: str) -> Optional[str]:
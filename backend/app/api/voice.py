@@ -2,13 +2,22 @@
 Voice API endpoints for Speech-to-Text and Text-to-Speech
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse
+import asyncio
+import re
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional, Tuple
 from loguru import logger
 
+from app.core.config import settings
+from app.core.database import get_db
+from app.models import Message
 from app.services.voice import transcribe_audio, synthesize_speech
+from app.services.voice_openai import audio_store, speech_key, synthesize_speech_streaming
 
 router = APIRouter()
 
@@ -66,7 +75,8 @@ async def transcribe(
 async def synthesize(request: TTSRequest):
     """
     Synthesize speech from text (Text-to-Speech)
-    Returns audio stream in MP3 format
+    Returns audio in MP3 format; X-Audio-Key names the stored copy
+    that /audio/{key} serves with Range support
     """
     try:
         logger.info(f"Synthesizing speech: {request.text[:50]}...")
@@ -79,12 +89,183 @@ async def synthesize(request: TTSRequest):
             speed=request.speed,
         )
 
-        return StreamingResponse(audio_stream, media_type="audio/mpeg")
+        key = speech_key(request.text, request.language, request.voice, request.speed)
+        headers = _audio_headers(key)
+        headers["X-Audio-Key"] = key
+        return Response(audio_stream.getvalue(), media_type="audio/mpeg", headers=headers)
+
+    except Exception as e:
+        logger.error(f"TTS error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 
+@router.post("/synthesize/stream")
+async def synthesize_stream(request: TTSRequest):
+    """
+    Synthesize speech sentence by sentence (Text-to-Speech)
+    Streams chunked MP3 while later sentences are still being synthesized
+    """
+    logger.info(f"Streaming speech: {request.text[:50]}...")
+    stream = synthesize_speech_streaming(
+        text=request.text,
+        language=request.language,
+        voice=request.voice,
+        speed=request.speed,
+    )
+
+    # Synthesize the first sentence before answering, so a failure is still a 500
+    try:
+        first_chunk = await anext(stream, b"")
     except Exception as e:
         logger.error(f"TTS error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def audio_chunks():
+        yield first_chunk
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            # Headers are sent: end the stream early rather than corrupt it
+            logger.error(f"TTS streaming error: {e}")
+
+    return StreamingResponse(
+        audio_chunks(),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/audio/{key}")
+async def get_audio(key: str, request: Request):
+    """
+    Stored audio by content key, with ETag, Cache-Control and Range
+    """
+    if audio_store is None or not audio_store.is_key(key):
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    not_modified = _not_modified(request, key)
+    if not_modified is not None:
+        return not_modified
+
+    path = await asyncio.to_thread(audio_store.get_path, key)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return await _audio_response(request, key, path)
+
+
+@router.get("/messages/{message_id}/audio")
+async def get_message_audio(
+    message_id: str,
+    request: Request,
+    voice: str = "female",
+    speed: float = Query(1.0, ge=0.25, le=4.0),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Spoken version of an assistant message, synthesized once and then
+    replayed from the audio store (seekable through Range requests)
+    """
+    message = await db.get(Message, message_id)
+    if message is None or message.role != "assistant":
+        raise HTTPException(status_code=404, detail="Message not found")
+
+    key = speech_key(message.content, message.language, voice, speed)
+    not_modified = _not_modified(request, key)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        path = await asyncio.to_thread(audio_store.get_path, key) if audio_store is not None else None
+        if path is None:
+            logger.info(f"Synthesizing audio for message {message_id}")
+            audio_stream = await synthesize_speech(message.content, message.language, voice, speed)
+            path = await asyncio.to_thread(audio_store.get_path, key) if audio_store is not None else None
+            if path is None:
+                # No store (or it could not be written): send this synthesis whole
+                return Response(audio_stream.getvalue(), media_type="audio/mpeg", headers=_audio_headers(key))
+    except Exception as e:
+        logger.error(f"TTS error for message {message_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if message.audio_key != key:
+        message.audio_key = key
+    return await _audio_response(request, key, path)
+
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _audio_headers(key: str) -> Dict[str, str]:
+    # Content-addressed: the same key always has the same bytes
+    return {
+        "ETag": f'"{key}"',
+        "Cache-Control": f"public, max-age={settings.AUDIO_CACHE_MAX_AGE}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+
+
+def _not_modified(request: Request, key: str) -> Optional[Response]:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or f'"{key}"' in tags:
+        return Response(status_code=304, headers=_audio_headers(key))
+    return None
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single byte range; None to send the whole file.
+
+    Raises 416 for a well-formed range that lies outside the file.
+    """
+    match = _BYTE_RANGE.match(header.strip())
+    if match is None:
+        # Multiple or malformed ranges: a full 200 response is always allowed
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def _audio_response(request: Request, key: str, path: Path) -> Response:
+    headers = _audio_headers(key)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header is None or (if_range is not None and if_range != headers["ETag"]):
+        return FileResponse(path, media_type="audio/mpeg", headers=headers)
+
+    size = (await asyncio.to_thread(path.stat)).st_size
+    byte_range = _parse_range(range_header, size)
+    if byte_range is None:
+        return FileResponse(path, media_type="audio/mpeg", headers=headers)
+
+    start, end = byte_range
+    content = await asyncio.to_thread(_read_range, path, start, end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(content, status_code=206, media_type="audio/mpeg", headers=headers)
+
+
+def _read_range(path: Path, start: int, length: int) -> bytes:
+    with open(path, "rb") as audio_file:
+        audio_file.seek(start)
+        return audio_file.read(length)
+
 
 @router.get("/voices")
 async def list_voices(language: Optional[str] = None):
@@ -27,6 +27,15 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-4o-mini"  # Changed from gpt-4-turbo-preview (GPT-5 doesn't exist)
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-large"
 
+    # OpenAI HTTP client pool (shared across services)
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    OPENAI_HTTP2: bool = True
+    OPENAI_TIMEOUT: float = 60.0  # seconds
+    OPENAI_CONNECT_TIMEOUT: float = 5.0  # seconds
+    OPENAI_MAX_RETRIES: int = 2
+
     # Google Cloud (Speech services)
     GOOGLE_CLOUD_PROJECT_ID: str = ""
     GOOGLE_APPLICATION_CREDENTIALS: str = ""
@@ -40,13 +49,67 @@ class Settings(BaseSettings):
     MAX_CONTEXT_LENGTH: int = 4096
     TOP_K_RESULTS: int = 5
 
-    # Rate Limiting
+    # ANN index management and default recall/latency profile
+    VECTOR_INDEX_AUTO_CREATE: bool = True
+    VECTOR_PARTIAL_INDEXES: bool = True  # per-language / per-domain ANN indexes
+    VECTOR_HNSW_M: int = 16
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_SEARCH_MODE: str = "balanced"  # fast | balanced | accurate | exact
+
+    # Hybrid retrieval (full-text + vector, reciprocal-rank fusion)
+    RETRIEVAL_MODE: str = "hybrid"  # vector | hybrid
+    HYBRID_RRF_K: int = 60
+    HYBRID_VECTOR_WEIGHT: float = 1.0
+    HYBRID_TEXT_WEIGHT: float = 1.0
+    TEXT_SEARCH_CONFIG_AR: str = "arabic"  # Snowball Arabic, PostgreSQL 13+
+    TEXT_SEARCH_CONFIG_FR: str = "french"
+
+    # Rate Limiting (sliding window per user/client, on top of the daily quota)
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 900  # 15 minutes in seconds
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # seconds
+    REDIS_RETRY_INTERVAL: int = 30  # seconds to skip Redis after a failure
+
+    # Query embedding cache (in-process LRU + Redis)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 2048  # ~6 KB each at 1536 dimensions
+    EMBEDDING_CACHE_TTL: int = 3600  # in-process TTL, seconds
+    EMBEDDING_CACHE_REDIS_TTL: int = 604800  # 7 days
+
+    # Local embedding store shared with ingestion (mmap'd float32 matrix keyed by content hash)
+    EMBEDDING_STORE_PATH: str = "data/embeddings"  # empty to disable
+
+    # Semantic answer cache (paraphrased questions)
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_MAX_DISTANCE: float = 0.08  # cosine distance
+    ANSWER_CACHE_TTL: int = 21600  # 6 hours
+    ANSWER_CACHE_VERSION_CHECK_INTERVAL: int = 60  # seconds between corpus checks
+
+    # Audio transcoding for Whisper uploads (ffmpeg subprocesses, off the event loop)
+    FFMPEG_BINARY: str = "ffmpeg"
+    AUDIO_TRANSCODE_CONCURRENCY: int = 2  # ffmpeg processes per worker; more requests wait in line
+    AUDIO_TRANSCODE_TIMEOUT: float = 30.0  # seconds before ffmpeg is killed and the original is sent
+    WHISPER_PASSTHROUGH_MAX_BITRATE: int = 32000  # mono Opus uploads up to this many bps skip ffmpeg
+
+    # TTS audio cache (in-process LRU bounded by bytes, per worker)
+    TTS_CACHE_ENABLED: bool = True
+    TTS_CACHE_MAX_BYTES: int = 67108864  # 64 MB
+    TTS_CACHE_TTL: int = 86400  # 24 hours
+    TTS_STREAM_CONCURRENCY: int = 3  # sentences synthesized ahead by /voice/synthesize/stream
+    TTS_STREAM_MIN_CHARS: int = 80  # shorter sentences are joined with the next one
+    AUDIO_STORE_PATH: str = "data/audio"  # content-addressed MP3s on disk; empty to disable
+    AUDIO_CACHE_MAX_AGE: int = 31536000  # Cache-Control max-age for stored audio (immutable)
+
+    # Analytics (buffered, batched inserts into query_analytics)
+    ANALYTICS_BATCH_SIZE: int = 200
+    ANALYTICS_FLUSH_INTERVAL: float = 2.0  # seconds
+    ANALYTICS_QUEUE_SIZE: int = 10000
+    ANALYTICS_ENQUEUE_TIMEOUT: float = 0.05  # seconds to wait for room before dropping
 
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -8,6 +8,7 @@ from sqlalchemy import text
 from loguru import logger
 
 from app.core.config import settings
+from app.core.vector_index import ensure_text_search_indexes, ensure_vector_indexes
 
 # Create async engine
 engine = create_async_engine(
@@ -47,6 +48,15 @@ async def init_db():
         logger.error(f"❌ Database initialization failed: {e}")
         raise
 
+    if settings.VECTOR_INDEX_AUTO_CREATE:
+        try:
+            async with engine.begin() as conn:
+                await ensure_vector_indexes(conn)
+                await ensure_text_search_indexes(conn)
+        except Exception as e:
+            # Missing search indexes degrade latency, not correctness
+            logger.warning(f"⚠️ Search index creation skipped: {e}")
+
 
 async def get_db() -> AsyncSession:
     """Dependency for getting database session"""
@@ -0,0 +1,172 @@
+"""
+Shared OpenAI client with a pooled, keep-alive HTTP transport.
+
+A single ``AsyncOpenAI`` instance is created in the application lifespan and
+reused by every service, so requests share TCP/TLS connections instead of
+paying a fresh handshake per call.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import httpx
+import openai
+from loguru import logger
+
+from app.core.config import settings
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response stream wrapper that releases the in-flight slot on close."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, transport: "_InstrumentedTransport"):
+        self._stream = stream
+        self._transport = transport
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._transport.in_flight -= 1
+
+
+class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that counts in-flight requests for pool saturation metrics."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.total_requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        response.stream = _TrackedStream(response.stream, self)
+        return response
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Return open/idle connection counts from the underlying pool."""
+
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"open_connections": len(connections), "idle_connections": idle}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class OpenAIClientProvider:
+    """Owns the process-wide ``AsyncOpenAI`` client and its connection pool."""
+
+    def __init__(self) -> None:
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self._transport: Optional[_InstrumentedTransport] = None
+        self._http2 = False
+
+    def start(self) -> openai.AsyncOpenAI:
+        """Create the pooled client (idempotent)."""
+
+        if self._client is not None:
+            return self._client
+
+        self._http2 = settings.OPENAI_HTTP2 and _http2_available()
+        if settings.OPENAI_HTTP2 and not self._http2:
+            logger.warning("OPENAI_HTTP2 is enabled but 'h2' is not installed; using HTTP/1.1")
+
+        limits = httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(
+            settings.OPENAI_TIMEOUT,
+            connect=settings.OPENAI_CONNECT_TIMEOUT,
+        )
+        self._transport = _InstrumentedTransport(limits=limits, http2=self._http2)
+        http_client = httpx.AsyncClient(
+            transport=self._transport,
+            limits=limits,
+            timeout=timeout,
+            http2=self._http2,
+        )
+        self._client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=http_client,
+            timeout=timeout,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        )
+
+        logger.info(
+            "OpenAI client pool ready (max_connections={}, keepalive={}, http2={}, retries={})",
+            settings.OPENAI_MAX_CONNECTIONS,
+            settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            self._http2,
+            settings.OPENAI_MAX_RETRIES,
+        )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the client and release pooled connections."""
+
+        if self._client is None:
+            return
+        await self._client.close()
+        self._client = None
+        self._transport = None
+        logger.info("OpenAI client pool closed")
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """Return the shared client, creating it lazily outside the lifespan (scripts)."""
+
+        return self._client or self.start()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool saturation metrics for the monitoring endpoint."""
+
+        if self._transport is None:
+            return {"initialized": False}
+
+        stats = self._transport.connection_stats()
+        active = stats["open_connections"] - stats["idle_connections"]
+        return {
+            "initialized": True,
+            "http2": self._http2,
+            "max_connections": settings.OPENAI_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            **stats,
+            "active_connections": active,
+            "in_flight_requests": self._transport.in_flight,
+            "peak_in_flight_requests": self._transport.peak_in_flight,
+            "total_requests": self._transport.total_requests,
+            "saturation": round(active / settings.OPENAI_MAX_CONNECTIONS, 3),
+        }
+
+
+openai_provider = OpenAIClientProvider()
+
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """Return the shared, pooled OpenAI client."""
+
+    return openai_provider.client
@@ -0,0 +1,60 @@
+"""
+Shared Redis connection for caches and rate limiting.
+
+Redis is an optimisation, never a hard dependency: callers check
+``redis_available()`` and report failures with ``mark_redis_failure()`` so a
+down instance is skipped for ``REDIS_RETRY_INTERVAL`` seconds instead of
+costing a connect timeout on every request.
+"""
+
+from __future__ import annotations
+
+from time import monotonic
+from typing import Optional
+
+import redis.asyncio as redis
+from loguru import logger
+
+from app.core.config import settings
+
+_client: Optional[redis.Redis] = None
+_unavailable_until = 0.0
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client (created lazily)."""
+
+    global _client
+    if _client is None:
+        _client = redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
+
+
+def redis_available() -> bool:
+    """Whether Redis should be tried (false while backing off after a failure)."""
+
+    return monotonic() >= _unavailable_until
+
+
+def mark_redis_failure(exc: Exception) -> None:
+    """Back off from Redis for a while after a connection or timeout error."""
+
+    global _unavailable_until
+    if redis_available():
+        logger.warning(
+            "Redis unavailable ({}); retrying in {}s", exc, settings.REDIS_RETRY_INTERVAL
+        )
+    _unavailable_until = monotonic() + settings.REDIS_RETRY_INTERVAL
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client."""
+
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,270 @@
+"""
+Approximate-nearest-neighbour index management for ``document_chunks.embedding``.
+
+HNSW is used when the installed pgvector supports it (>= 0.5.0); otherwise an
+IVFFlat index sized from the current row count is built. Search accuracy is
+tuned per request with ``SET LOCAL``-scoped settings (see ``SEARCH_PROFILES``).
+
+Partial indexes per chunk language and per domain keep filtered searches
+inside the matching slice of the corpus instead of filtering after a global
+ANN scan.
+
+Run as a management command from the backend directory::
+
+    python -m app.core.vector_index --status
+    python -m app.core.vector_index --rebuild
+
+The GIN full-text indexes used by hybrid retrieval are managed here too.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import settings
+
+INDEX_PREFIX = "ix_document_chunks_embedding"
+TEXT_INDEX_PREFIX = "ix_document_chunks_content_fts"
+_SAFE_VALUE = re.compile(r"^[A-Za-z0-9_-]{1,50}$")
+_TS_CONFIG_NAME = re.compile(r"^[a-z_]+$")
+
+# Recall-vs-latency profiles selectable per request. ``ef_search`` applies to
+# HNSW, ``probes`` to IVFFlat; ``exact`` disables index scans entirely.
+SEARCH_PROFILES: Dict[str, Dict[str, int]] = {
+    "fast": {"ef_search": 40, "probes": 4},
+    "balanced": {"ef_search": 100, "probes": 10},
+    "accurate": {"ef_search": 400, "probes": 40},
+    "exact": {"ef_search": 1000, "probes": 1000},
+}
+
+
+async def get_pgvector_version(conn: AsyncConnection) -> Optional[Tuple[int, ...]]:
+    """Return the installed pgvector version as a tuple, if the extension exists."""
+
+    result = await conn.execute(
+        text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    )
+    version = result.scalar()
+    if not version:
+        return None
+    return tuple(int(part) for part in version.split(".") if part.isdigit())
+
+
+def supports_hnsw(version: Optional[Tuple[int, ...]]) -> bool:
+    return version is not None and version >= (0, 5, 0)
+
+
+def ivfflat_lists(row_count: int) -> int:
+    """pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond."""
+
+    if row_count > 1_000_000:
+        return int(math.sqrt(row_count))
+    return max(10, row_count // 1000)
+
+
+async def ensure_vector_indexes(conn: AsyncConnection, *, rebuild: bool = False) -> List[str]:
+    """Create (or rebuild) the ANN indexes on chunk embeddings.
+
+    Builds one global index plus, when ``VECTOR_PARTIAL_INDEXES`` is set,
+    partial indexes per chunk language and per domain so filtered searches
+    only scan the matching slice. Returns the names of the indexes in place.
+    """
+
+    version = await get_pgvector_version(conn)
+    indexes = [await _ensure_ann_index(conn, version, rebuild=rebuild)]
+
+    if settings.VECTOR_PARTIAL_INDEXES:
+        await sync_chunk_domains(conn)
+        for column in ("language", "domain"):
+            result = await conn.execute(
+                text(f"SELECT DISTINCT {column} FROM document_chunks WHERE {column} IS NOT NULL")
+            )
+            for value in result.scalars().all():
+                if not _SAFE_VALUE.match(value):
+                    logger.warning("Skipping partial index for unsafe {} value {!r}", column, value)
+                    continue
+                indexes.append(
+                    await _ensure_ann_index(
+                        conn,
+                        version,
+                        suffix=f"_{column}_{value.lower().replace('-', '_')}",
+                        predicate=f"{column} = '{value}'",
+                        rebuild=rebuild,
+                    )
+                )
+
+    return [name for name in indexes if name]
+
+
+async def _ensure_ann_index(
+    conn: AsyncConnection,
+    version: Optional[Tuple[int, ...]],
+    *,
+    suffix: str = "",
+    predicate: Optional[str] = None,
+    rebuild: bool = False,
+) -> Optional[str]:
+    """Create one (optionally partial) HNSW index, or IVFFlat on old pgvector.
+
+    Returns ``None`` when an IVFFlat index cannot be built yet because it
+    needs existing embeddings to train its lists.
+    """
+
+    where = f" WHERE {predicate}" if predicate else ""
+
+    if supports_hnsw(version):
+        name = f"{INDEX_PREFIX}_hnsw{suffix}"
+        options = (
+            f"USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {int(settings.VECTOR_HNSW_M)}, "
+            f"ef_construction = {int(settings.VECTOR_HNSW_EF_CONSTRUCTION)})"
+        )
+    else:
+        result = await conn.execute(
+            text(
+                "SELECT count(*) FROM document_chunks WHERE embedding IS NOT NULL"
+                + (f" AND {predicate}" if predicate else "")
+            )
+        )
+        row_count = result.scalar() or 0
+        if row_count == 0:
+            logger.warning(
+                "pgvector {} lacks HNSW and there are no embeddings yet; IVFFlat index{} deferred",
+                version,
+                suffix,
+            )
+            return None
+        name = f"{INDEX_PREFIX}_ivfflat{suffix}"
+        options = f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {ivfflat_lists(row_count)})"
+
+    if rebuild:
+        await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON document_chunks {options}{where}"))
+    logger.info("✅ Vector index ready ({})", name)
+    return name
+
+
+async def sync_chunk_domains(conn: AsyncConnection) -> int:
+    """Copy ``legal_documents.domain`` onto chunks whose denormalized value is stale."""
+
+    column = await conn.execute(
+        text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'document_chunks' AND column_name = 'domain'"
+        )
+    )
+    if column.scalar() is None:
+        # Tables created before the column existed are not altered by create_all
+        await conn.execute(text("ALTER TABLE document_chunks ADD COLUMN domain VARCHAR(100)"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_document_chunks_domain ON document_chunks (domain)"))
+
+    result = await conn.execute(
+        text(
+            "UPDATE document_chunks AS c SET domain = d.domain "
+            "FROM legal_documents AS d "
+            "WHERE c.document_id = d.id AND c.domain IS DISTINCT FROM d.domain"
+        )
+    )
+    if result.rowcount:
+        logger.info("Synchronized domain on {} document chunks", result.rowcount)
+    return result.rowcount
+
+
+def text_search_config(language: Optional[str]) -> str:
+    """Postgres text-search configuration used for a chunk language."""
+
+    config = {
+        "ar": settings.TEXT_SEARCH_CONFIG_AR,
+        "fr": settings.TEXT_SEARCH_CONFIG_FR,
+    }.get(language or "", "simple")
+    return config if _TS_CONFIG_NAME.match(config) else "simple"
+
+
+async def ensure_text_search_indexes(conn: AsyncConnection) -> List[str]:
+    """Create per-language GIN indexes for hybrid full-text retrieval.
+
+    The indexed expression must match the one used by the retrieval query,
+    ``to_tsvector('<config>'::regconfig, content)``, for the planner to use it.
+    """
+
+    indexes = []
+    for language in ("ar", "fr"):
+        name = f"{TEXT_INDEX_PREFIX}_{language}"
+        await conn.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS {name} ON document_chunks "
+                f"USING gin (to_tsvector('{text_search_config(language)}'::regconfig, content)) "
+                f"WHERE language = '{language}'"
+            )
+        )
+        indexes.append(name)
+    logger.info("✅ Full-text indexes ready ({})", ", ".join(indexes))
+    return indexes
+
+
+async def apply_search_profile(db: AsyncSession, mode: Optional[str], candidates: int) -> str:
+    """Scope ANN search parameters to the current transaction.
+
+    ``candidates`` is the number of rows the query will ``LIMIT`` to; HNSW
+    cannot return more rows than ``ef_search``, so it is raised accordingly.
+    """
+
+    mode = mode if mode in SEARCH_PROFILES else settings.VECTOR_SEARCH_MODE
+    profile = SEARCH_PROFILES.get(mode, SEARCH_PROFILES["balanced"])
+    ef_search = max(profile["ef_search"], candidates)
+
+    await db.execute(
+        text(
+            "SELECT set_config('hnsw.ef_search', :ef_search, true), "
+            "set_config('ivfflat.probes', :probes, true), "
+            "set_config('enable_indexscan', :indexscan, true)"
+        ),
+        {
+            "ef_search": str(ef_search),
+            "probes": str(profile["probes"]),
+            "indexscan": "off" if mode == "exact" else "on",
+        },
+    )
+    return mode
+
+
+async def list_vector_indexes(conn: AsyncConnection) -> List[Dict[str, str]]:
+    """Describe the indexes currently defined on ``document_chunks``."""
+
+    result = await conn.execute(
+        text(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE tablename = 'document_chunks' ORDER BY indexname"
+        )
+    )
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def _main(rebuild: bool, status_only: bool) -> None:
+    from app.core.database import engine
+
+    try:
+        async with engine.begin() as conn:
+            if not status_only:
+                await ensure_vector_indexes(conn, rebuild=rebuild)
+                await ensure_text_search_indexes(conn)
+            for index in await list_vector_indexes(conn):
+                print(f"{index['indexname']}: {index['indexdef']}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage pgvector ANN indexes on document_chunks")
+    parser.add_argument("--rebuild", action="store_true", help="drop and recreate the ANN index")
+    parser.add_argument("--status", action="store_true", help="only list existing indexes")
+    args = parser.parse_args()
+    asyncio.run(_main(rebuild=args.rebuild, status_only=args.status))
@@ -0,0 +1,270 @@
+"""
+Chunkers turning legal articles into the texts that get embedded.
+
+``TokenChunker`` sizes chunks in ``tiktoken`` tokens and never lets a chunk
+straddle two articles unless both are tiny:
+
+- an article that fits the budget is one chunk;
+- a longer article is split at sentence and alinéa boundaries (French and
+  Arabic punctuation, enumerations such as ``2°``) and packed greedily, with
+  the last sentences of a chunk repeated at the start of the next up to
+  ``overlap_tokens``; a single sentence over budget is cut on token
+  boundaries;
+- consecutive articles under ``merge_below_tokens`` are merged, each prefixed
+  with its heading, and the chunk lists every article number it covers.
+
+``SentenceChunker`` is the previous 500-character splitter, kept so corpora
+can be compared (see ``scripts/chunking-report.py``) or rebuilt unchanged.
+
+Chunkers consume and yield lazily, so a whole code is never held in memory.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Protocol
+
+Article = Dict[str, Any]
+
+# End of a sentence or clause in either language, or the start of an
+# enumerated alinéa ("2°", "3)", "- "), followed by whitespace
+_UNIT_BOUNDARY = re.compile(
+    r"(?<=[.!?;:؟؛])\s+"
+    r"|\s+(?=\d{1,2}\s?°|\d{1,2}\)\s|[-–]\s)"
+)
+
+_HEADINGS = {"fr": "Article {} :", "ar": "المادة {}:"}
+
+
+@dataclass
+class ArticleChunk:
+    """One text to embed and the article(s) it comes from."""
+
+    text: str
+    article: Article  # the first article covered; its number names the chunk
+    chunk_index: int
+    total_chunks: int
+    token_count: int
+    article_numbers: List[str] = field(default_factory=list)
+
+
+class Chunker(Protocol):
+    """Anything that turns a stream of articles into chunks."""
+
+    def chunk_articles(self, articles: Iterable[Article]) -> Iterator[ArticleChunk]:
+        ...
+
+
+class SentenceChunker:
+    """Previous behaviour: split on ``". "`` and pack up to ``chunk_size`` characters."""
+
+    def __init__(self, chunk_size: int = 500, encoding: Any = None):
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+
+    def chunk_text(self, text: str) -> List[str]:
+        # Split by sentences first
+        sentences = text.replace("\n", " ").split(". ")
+
+        chunks = []
+        current_chunk = ""
+
+        for sentence in sentences:
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+
+            # Add period back if it was removed
+            if not sentence.endswith("."):
+                sentence += "."
+
+            # Check if adding this sentence would exceed chunk size
+            if len(current_chunk) + len(sentence) > self.chunk_size:
+                if current_chunk:
+                    chunks.append(current_chunk.strip())
+                current_chunk = sentence
+            else:
+                current_chunk += " " + sentence if current_chunk else sentence
+
+        # Add remaining chunk
+        if current_chunk:
+            chunks.append(current_chunk.strip())
+
+        return chunks
+
+    def chunk_articles(self, articles: Iterable[Article]) -> Iterator[ArticleChunk]:
+        for article in articles:
+            texts = self.chunk_text(article["content"])
+            for index, text in enumerate(texts):
+                yield ArticleChunk(
+                    text=text,
+                    article=article,
+                    chunk_index=index,
+                    total_chunks=len(texts),
+                    token_count=self._count(text),
+                    article_numbers=[article["article_number"]],
+                )
+
+    def _count(self, text: str) -> int:
+        if self.encoding is None:
+            return 0
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+class TokenChunker:
+    """Token-budgeted, article-aware chunker (see module docstring)."""
+
+    def __init__(
+        self,
+        encoding: Any,
+        *,
+        max_tokens: int = 400,
+        overlap_tokens: int = 40,
+        merge_below_tokens: int = 80,
+    ):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.encoding = encoding
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.merge_below_tokens = merge_below_tokens
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def chunk_articles(self, articles: Iterable[Article]) -> Iterator[ArticleChunk]:
+        pending: List[tuple] = []  # small articles waiting to be merged: (article, text, tokens)
+        pending_tokens = 0
+
+        for article in articles:
+            text = " ".join(article["content"].split())
+            if not text:
+                continue
+            tokens = self.count(text)
+
+            if tokens < self.merge_below_tokens:
+                headed = self._with_heading(article, text)
+                entry = (article, headed, self.count(headed))
+                if pending and pending_tokens + entry[2] > self.max_tokens:
+                    yield self._merged(pending)
+                    pending, pending_tokens = [], 0
+                pending.append(entry)
+                pending_tokens += entry[2]
+                continue
+
+            if pending:
+                yield self._merged(pending)
+                pending, pending_tokens = [], 0
+            yield from self._split(article, text, tokens)
+
+        if pending:
+            yield self._merged(pending)
+
+    def _split(self, article: Article, text: str, tokens: int) -> Iterator[ArticleChunk]:
+        if tokens <= self.max_tokens:
+            texts = [(text, tokens)]
+        else:
+            texts = self._pack(self._units(text))
+
+        for index, (chunk_text, chunk_tokens) in enumerate(texts):
+            yield ArticleChunk(
+                text=chunk_text,
+                article=article,
+                chunk_index=index,
+                total_chunks=len(texts),
+                token_count=chunk_tokens,
+                article_numbers=[article["article_number"]],
+            )
+
+    def _units(self, text: str) -> List[tuple]:
+        """Sentences / alinéas with their token counts; oversized ones cut on tokens."""
+
+        units = []
+        for unit in _UNIT_BOUNDARY.split(text):
+            unit = unit.strip()
+            if not unit:
+                continue
+            token_ids = self.encoding.encode(unit, disallowed_special=())
+            if len(token_ids) <= self.max_tokens:
+                units.append((unit, len(token_ids)))
+                continue
+            step = self.max_tokens - self.overlap_tokens
+            for start in range(0, len(token_ids), step):
+                piece = token_ids[start : start + self.max_tokens]
+                units.append((self.encoding.decode(piece).strip(), len(piece)))
+                if start + self.max_tokens >= len(token_ids):
+                    break
+        return units
+
+    def _pack(self, units: List[tuple]) -> List[tuple]:
+        chunks: List[tuple] = []
+        current: List[tuple] = []
+        current_tokens = 0
+
+        for unit in units:
+            # Whitespace between units is about one token
+            if current and current_tokens + unit[1] + 1 > self.max_tokens:
+                chunks.append(self._joined(current))
+                current = self._overlap(current, room=self.max_tokens - unit[1] - 1)
+                current_tokens = sum(tokens for _, tokens in current) + len(current)
+            current.append(unit)
+            current_tokens += unit[1] + (1 if len(current) > 1 else 0)
+
+        if current:
+            chunks.append(self._joined(current))
+        return chunks
+
+    def _overlap(self, units: List[tuple], room: int) -> List[tuple]:
+        """Trailing whole units of the previous chunk, within the overlap budget."""
+
+        budget = min(self.overlap_tokens, room)
+        carried: List[tuple] = []
+        used = 0
+        for unit in reversed(units):
+            if used + unit[1] + 1 > budget:
+                break
+            carried.insert(0, unit)
+            used += unit[1] + 1
+        # A chunk made only of overlap would repeat itself
+        return carried if len(carried) < len(units) else []
+
+    def _joined(self, units: List[tuple]) -> tuple:
+        text = " ".join(unit for unit, _ in units)
+        return text, self.count(text)
+
+    def _merged(self, entries: List[tuple]) -> ArticleChunk:
+        article = entries[0][0]
+        if len(entries) == 1:
+            # Nothing was merged: keep the article as it reads
+            text = " ".join(article["content"].split())
+        else:
+            text = " ".join(entry[1] for entry in entries)
+        return ArticleChunk(
+            text=text,
+            article=article,
+            chunk_index=0,
+            total_chunks=1,
+            token_count=self.count(text),
+            article_numbers=[entry[0]["article_number"] for entry in entries],
+        )
+
+    @staticmethod
+    def _with_heading(article: Article, text: str) -> str:
+        heading = _HEADINGS.get(article.get("language"), _HEADINGS["fr"])
+        return f"{heading.format(article['article_number'])} {text}"
+
+
+def make_chunker(name: str, *, encoding: Any, **options: Any) -> Chunker:
+    """Build a chunker by name: ``token`` (default) or ``sentence`` (previous behaviour)."""
+
+    if name == "sentence":
+        return SentenceChunker(options.get("chunk_size", 500), encoding=encoding)
+    if name == "token":
+        return TokenChunker(
+            encoding,
+            max_tokens=options.get("max_tokens", 400),
+            overlap_tokens=options.get("overlap_tokens", 40),
+            merge_below_tokens=options.get("merge_below_tokens", 80),
+        )
+    raise ValueError(f"Unknown chunker: {name}")
@@ -0,0 +1,32 @@
+"""Content addressing for chunks, used to re-embed only what actually changed."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from typing import Iterable, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_chunk_text(text: str) -> str:
+    """NFKC with collapsed whitespace, so re-extraction noise keeps the same hash."""
+
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def chunk_content_hash(text: str, *, model: str, dimensions: int) -> str:
+    """Hash of what determines a chunk's embedding: normalized text, model and dimensions."""
+
+    payload = f"{model}:{dimensions}\n{normalize_chunk_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def document_content_hash(chunks: Iterable[Tuple[str, str]]) -> str:
+    """Hash of a document's ``(chunk_id, content_hash)`` pairs, independent of order."""
+
+    digest = hashlib.sha256()
+    for chunk_id, content_hash in sorted(chunks):
+        digest.update(f"{chunk_id}:{content_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
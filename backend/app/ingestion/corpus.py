@@ -0,0 +1,121 @@
+"""
+Processed legal corpus on disk (``backend/data/processed``).
+
+Each document is a JSON Lines file with one article per line, and
+``manifest.json`` lists the documents with their metadata and counts but no
+article text. The extractor appends articles as it parses them and readers
+iterate lines lazily, so neither side holds a whole code in memory.
+
+Corpora written before this format (one indented ``{doc_id}.json`` per
+document plus ``extraction_summary.json``) are still readable.
+
+Only the standard library is needed; extraction and ingestion scripts import
+this module standalone.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+MANIFEST_FILE = "manifest.json"
+LEGACY_SUMMARY_FILE = "extraction_summary.json"
+FORMAT = "articles-jsonl/1"
+
+
+class ArticleWriter:
+    """Append articles to ``{path}`` as JSON Lines, replacing it atomically on success."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = None
+        self.count = 0
+
+    def __enter__(self) -> "ArticleWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        return self
+
+    def write(self, article: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(article, ensure_ascii=False))
+        self._file.write("\n")
+        self.count += 1
+
+    def __exit__(self, exc_type, *exc_info: Any) -> None:
+        self._file.close()
+        if exc_type is None:
+            os.replace(self._tmp_path, self.path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+
+
+def iter_articles(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield a document's articles one at a time."""
+
+    path = Path(path)
+    if path.suffix != ".jsonl":
+        # Legacy per-document JSON: no way around loading it whole
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f).get("articles", [])
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_manifest(output_dir: Path, documents: List[Dict[str, Any]]) -> Path:
+    """Write ``manifest.json`` (atomically) for the given document entries."""
+
+    successful = [entry for entry in documents if entry.get("success")]
+    manifest = {
+        "format": FORMAT,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "total_documents": len(documents),
+        "successful": len(successful),
+        "total_articles": sum(entry.get("total_articles", 0) for entry in successful),
+        "documents": documents,
+    }
+    path = Path(output_dir) / MANIFEST_FILE
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_manifest(processed_dir: Path) -> Optional[Dict[str, Any]]:
+    """Read the manifest, falling back to a legacy ``extraction_summary.json``.
+
+    Returns ``None`` if the directory holds neither.
+    """
+
+    processed_dir = Path(processed_dir)
+    manifest_path = processed_dir / MANIFEST_FILE
+    if manifest_path.exists():
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    summary_path = processed_dir / LEGACY_SUMMARY_FILE
+    if not summary_path.exists():
+        return None
+
+    with open(summary_path, "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    documents = []
+    for result in summary.get("results", []):
+        entry = {key: value for key, value in result.items() if key != "articles"}
+        entry["articles_file"] = f"{result['doc_id']}.json"
+        documents.append(entry)
+    return {
+        "format": "legacy-json",
+        "total_documents": summary.get("total_documents", len(documents)),
+        "successful": summary.get("successful", 0),
+        "total_articles": summary.get("total_articles", 0),
+        "documents": documents,
+    }
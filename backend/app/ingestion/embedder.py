@@ -0,0 +1,245 @@
+"""
+Batched embedding requests for ingestion.
+
+Texts are packed into ``embeddings.create`` calls of up to ``max_batch_size``
+inputs and ``max_batch_tokens`` tokens (counted with ``tiktoken``), so
+throughput scales with batch size rather than with request count. A batch
+that keeps failing is split in halves and each half retried, isolating a
+bad input to a single ``None`` result instead of losing the whole batch.
+
+With a shared ``RateLimiter`` every request first acquires its share of the
+RPM/TPM budget, and a 429 pauses all workers for the ``Retry-After`` delay;
+without one, transient errors fall back to exponential backoff.
+
+With an ``EmbeddingStore``, texts already embedded (by any earlier run, in
+any environment sharing the store) are served from disk and new embeddings
+are appended to it, so only unseen text reaches the API.
+
+Only ``openai``, ``tiktoken`` and ``numpy`` are needed; the module does not load the
+backend settings so ingestion scripts can import it standalone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import tiktoken
+from loguru import logger
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, InternalServerError, RateLimitError
+
+from app.ingestion.embedding_store import EmbeddingStore
+from app.ingestion.rate_limiter import RateLimiter
+
+# OpenAI limits: 8191 tokens per input, 2048 inputs and 300k tokens per request
+MAX_INPUT_TOKENS = 8191
+
+_TRANSIENT_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+@dataclass
+class EmbeddingStats:
+    """Throughput counters over every batch sent."""
+
+    batches: int = 0
+    texts: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+    retries: int = 0
+    splits: int = 0
+    failed_texts: int = 0
+    store_hits: int = 0
+    batch_log: List[Dict[str, Any]] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "tokens": self.tokens,
+            "retries": self.retries,
+            "splits": self.splits,
+            "failed_texts": self.failed_texts,
+            "store_hits": self.store_hits,
+            "texts_per_second": round(self.texts / self.seconds, 1) if self.seconds else 0.0,
+            "tokens_per_second": round(self.tokens / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
+class BatchEmbedder:
+    """Embed many texts with as few requests as the token budget allows."""
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        *,
+        model: str,
+        dimensions: Optional[int] = None,
+        max_batch_size: int = 256,
+        max_batch_tokens: int = 100_000,
+        max_retries: int = 5,
+        initial_retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+        limiter: Optional[RateLimiter] = None,
+        store: Optional[EmbeddingStore] = None,
+    ):
+        self.client = client
+        self.limiter = limiter
+        self.store = store
+        self.model = model
+        self.dimensions = dimensions
+        self.max_batch_size = min(max_batch_size, 2048)
+        self.max_batch_tokens = min(max_batch_tokens, 300_000)
+        self.max_retries = max_retries
+        self.initial_retry_delay = initial_retry_delay
+        self.max_retry_delay = max_retry_delay
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.stats = EmbeddingStats()
+
+    def prepare(self, text: str) -> Tuple[str, int]:
+        """Return the text (truncated to the model's input limit) and its token count."""
+
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if len(tokens) > MAX_INPUT_TOKENS:
+            tokens = tokens[:MAX_INPUT_TOKENS]
+            text = self.encoding.decode(tokens)
+        return text, len(tokens)
+
+    def plan_batches(self, token_counts: Sequence[int]) -> List[List[int]]:
+        """Group text indices into batches within the size and token budgets."""
+
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for index, count in enumerate(token_counts):
+            if current and (
+                len(current) >= self.max_batch_size
+                or current_tokens + count > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += count
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Embed ``texts`` in order; entries that could not be embedded are ``None``."""
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing = list(range(len(texts)))
+        if self.store is not None:
+            results = self.store.get_many(texts)
+            missing = [i for i, embedding in enumerate(results) if embedding is None]
+            self.stats.store_hits += len(texts) - len(missing)
+        if not missing:
+            return results
+
+        prepared = [self.prepare(texts[i]) for i in missing]
+        inputs = [text for text, _ in prepared]
+        token_counts = [count for _, count in prepared]
+
+        embedded: List[Optional[List[float]]] = [None] * len(missing)
+        for batch in self.plan_batches(token_counts):
+            await self._embed_batch(batch, inputs, token_counts, embedded)
+        for i, embedding in zip(missing, embedded):
+            results[i] = embedding
+
+        if self.store is not None and not self.store.read_only:
+            # Keyed by the original text, as looked up above
+            self.store.add_many([texts[i] for i in missing], embedded)
+        return results
+
+    async def _embed_batch(
+        self,
+        batch: List[int],
+        inputs: List[str],
+        token_counts: List[int],
+        results: List[Optional[List[float]]],
+    ) -> None:
+        batch_tokens = sum(token_counts[i] for i in batch)
+        delay = self.initial_retry_delay
+        error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries):
+            if self.limiter is not None:
+                await self.limiter.acquire(batch_tokens)
+            start = perf_counter()
+            try:
+                response = await self.client.embeddings.create(**self._request(batch, inputs))
+            except _TRANSIENT_ERRORS as exc:
+                error = exc
+                if attempt < self.max_retries - 1:
+                    self.stats.retries += 1
+                    wait = _retry_after(exc) or min(delay * (2 ** attempt), self.max_retry_delay)
+                    logger.warning("Embedding batch of {} failed ({}); retrying in {:.1f}s", len(batch), exc, wait)
+                    if self.limiter is not None:
+                        self.limiter.pause(wait)
+                    else:
+                        await asyncio.sleep(wait)
+                continue
+            except Exception as exc:
+                # Invalid input somewhere in the batch: retrying as-is won't help
+                error = exc
+                break
+
+            elapsed = perf_counter() - start
+            for item in response.data:
+                results[batch[item.index]] = item.embedding
+            self._record_batch(len(batch), batch_tokens, elapsed)
+            return
+
+        # Smaller requests do not help against a persistent rate limit
+        if len(batch) > 1 and not isinstance(error, RateLimitError):
+            self.stats.splits += 1
+            middle = len(batch) // 2
+            logger.warning("Splitting failed embedding batch of {} ({})", len(batch), error)
+            await self._embed_batch(batch[:middle], inputs, token_counts, results)
+            await self._embed_batch(batch[middle:], inputs, token_counts, results)
+            return
+
+        self.stats.failed_texts += len(batch)
+        logger.error("Could not embed {} texts ({} tokens): {}", len(batch), batch_tokens, error)
+
+    def _request(self, batch: List[int], inputs: List[str]) -> Dict[str, Any]:
+        request: Dict[str, Any] = {"model": self.model, "input": [inputs[i] for i in batch]}
+        if self.dimensions:
+            request["dimensions"] = self.dimensions
+        return request
+
+    def _record_batch(self, size: int, tokens: int, elapsed: float) -> None:
+        self.stats.batches += 1
+        self.stats.texts += size
+        self.stats.tokens += tokens
+        self.stats.seconds += elapsed
+        entry = {
+            "size": size,
+            "tokens": tokens,
+            "ms": round(elapsed * 1000, 1),
+            "texts_per_second": round(size / elapsed, 1) if elapsed else 0.0,
+            "tokens_per_second": round(tokens / elapsed, 1) if elapsed else 0.0,
+        }
+        self.stats.batch_log.append(entry)
+        logger.info(
+            "Embedded batch of {} texts / {} tokens in {:.0f} ms ({:.0f} tokens/s)",
+            size,
+            tokens,
+            entry["ms"],
+            entry["tokens_per_second"],
+        )
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Delay requested by the API in a ``Retry-After`` header, if any."""
+
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,177 @@
+"""
+Local, persistent embedding store keyed by content hash.
+
+Embeddings already paid for are kept on disk so rebuilding a database, or
+ingesting into another environment, does not call OpenAI again for text it
+has seen. Each model/dimensions pair gets its own directory holding two
+append-only files:
+
+- ``vectors.f32``: a float32 matrix, one row per entry, read through ``mmap``;
+- ``keys.bin``: the 32-byte sha256 content hash of each row, in row order.
+
+A vector is always written before its key, so an interrupted append leaves at
+most a tail that is ignored on the next open. Appends take an exclusive
+``flock`` and first pick up rows added by other processes, so ingestion runs
+and the backend can share one directory.
+
+Only ``numpy`` is needed; the module does not load the backend settings so
+ingestion scripts can import it standalone.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from app.ingestion.content_hash import chunk_content_hash
+
+_KEY_BYTES = 32
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class EmbeddingStore:
+    """Append-only float32 matrix plus hash index for one model and dimension count."""
+
+    def __init__(self, root: Path, *, model: str, dimensions: int, read_only: bool = False):
+        self.model = model
+        self.dimensions = dimensions
+        self.read_only = read_only
+        self.directory = Path(root) / _UNSAFE_PATH_CHARS.sub("_", f"{model}-{dimensions}")
+        self.vectors_path = self.directory / "vectors.f32"
+        self.keys_path = self.directory / "keys.bin"
+        self._row_bytes = dimensions * 4
+        self._index: Dict[bytes, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.added = 0
+
+        if not read_only:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._refresh()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def key(self, text: str) -> bytes:
+        """Binary content hash of ``text`` for this store's model and dimensions."""
+
+        return bytes.fromhex(chunk_content_hash(text, model=self.model, dimensions=self.dimensions))
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Stored embedding of ``text``, or ``None``."""
+
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Stored embeddings in order, ``None`` where ``text`` has not been seen."""
+
+        self._refresh_if_grown()
+        results: List[Optional[List[float]]] = []
+        for text in texts:
+            row = self._index.get(self.key(text))
+            if row is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                self.hits += 1
+                results.append(self._matrix[row].tolist())
+        return results
+
+    def add_many(self, texts: Sequence[str], embeddings: Sequence[Optional[Sequence[float]]]) -> int:
+        """Append embeddings not stored yet; ``None`` entries are skipped. Returns rows added."""
+
+        if self.read_only:
+            raise RuntimeError(f"Embedding store {self.directory} is read-only")
+
+        pending: Dict[bytes, Sequence[float]] = {}
+        for text, embedding in zip(texts, embeddings):
+            if embedding is not None and len(embedding) == self.dimensions:
+                pending.setdefault(self.key(text), embedding)
+        if not pending:
+            return 0
+
+        with open(self.keys_path, "ab") as keys_file, open(self.vectors_path, "ab") as vectors_file:
+            fcntl.flock(keys_file, fcntl.LOCK_EX)
+            try:
+                # Another process may have appended since our last look
+                self._refresh()
+                new_keys = [key for key in pending if key not in self._index]
+                if not new_keys:
+                    return 0
+
+                # Drop a torn tail left by an interrupted writer, then append
+                keys_file.truncate(self._rows * _KEY_BYTES)
+                vectors_file.truncate(self._rows * self._row_bytes)
+                matrix = np.asarray([pending[key] for key in new_keys], dtype="<f4")
+                vectors_file.write(matrix.tobytes())
+                vectors_file.flush()
+                os.fsync(vectors_file.fileno())
+                keys_file.write(b"".join(new_keys))
+                keys_file.flush()
+            finally:
+                fcntl.flock(keys_file, fcntl.LOCK_UN)
+
+        self._refresh()
+        self.added += len(new_keys)
+        return len(new_keys)
+
+    def _refresh_if_grown(self) -> None:
+        try:
+            size = self.keys_path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size // _KEY_BYTES != self._rows:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        """Re-read keys and re-map the matrix up to the last complete row."""
+
+        try:
+            keys = self.keys_path.read_bytes()
+            vector_rows = self.vectors_path.stat().st_size // self._row_bytes
+        except FileNotFoundError:
+            return
+
+        rows = min(len(keys) // _KEY_BYTES, vector_rows)
+        for row in range(len(self._index), rows):
+            self._index.setdefault(keys[row * _KEY_BYTES : (row + 1) * _KEY_BYTES], row)
+        self._rows = rows
+        self._matrix = (
+            np.memmap(self.vectors_path, dtype="<f4", mode="r", shape=(rows, self.dimensions))
+            if rows
+            else None
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.directory),
+            "rows": self._rows,
+            "size_mb": round(self._rows * self._row_bytes / 1_048_576, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "added": self.added,
+        }
+
+
+def open_embedding_store(
+    root: Optional[str], *, model: str, dimensions: int, read_only: bool = False
+) -> Optional[EmbeddingStore]:
+    """Open the store under ``root``, or return ``None`` if unset or unusable."""
+
+    if not root:
+        return None
+    try:
+        return EmbeddingStore(Path(root), model=model, dimensions=dimensions, read_only=read_only)
+    except OSError as exc:
+        logger.warning("Embedding store at {} unavailable: {}", root, exc)
+        return None
@@ -0,0 +1,156 @@
+"""
+Concurrent ingestion pipeline: produce → embed → write over bounded queues.
+
+The producer (reading JSON files and chunking articles) yields batches of
+chunk records; ``embed_concurrency`` workers embed them through a shared
+``BatchEmbedder``; ``write_concurrency`` workers store them. Bounded queues
+between the stages apply backpressure, so memory stays flat however large
+the corpus. The first failing stage cancels the rest.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from app.ingestion.embedder import BatchEmbedder
+
+Store = Callable[[List[Dict[str, Any]]], Awaitable[List[str]]]
+
+
+@dataclass
+class ChunkBatch:
+    """Chunk records of one document, without embeddings yet."""
+
+    document_id: str
+    records: List[Dict[str, Any]]
+
+
+@dataclass
+class IngestionProgress:
+    """Throughput counters reported while the pipeline runs."""
+
+    started_at: float = field(default_factory=monotonic)
+    chunks_produced: int = 0
+    chunks_embedded: int = 0
+    chunks_failed: int = 0
+    chunks_written: int = 0
+    tokens_embedded: int = 0
+    written_by_document: Dict[str, int] = field(default_factory=dict)
+
+    def rates(self) -> Dict[str, float]:
+        elapsed = max(monotonic() - self.started_at, 1e-9)
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "chunks_per_second": round(self.chunks_written / elapsed, 1),
+            "tokens_per_second": round(self.tokens_embedded / elapsed, 1),
+        }
+
+    def line(self) -> str:
+        rates = self.rates()
+        return (
+            f"{self.chunks_written}/{self.chunks_produced} chunks written, "
+            f"{rates['chunks_per_second']} chunks/s, {rates['tokens_per_second']} tokens/s"
+        )
+
+
+class IngestionPipeline:
+    """Run the embed and write stages of ingestion concurrently."""
+
+    def __init__(
+        self,
+        *,
+        embedder: BatchEmbedder,
+        store: Store,
+        embed_concurrency: int = 4,
+        write_concurrency: int = 1,
+        queue_size: int = 8,
+        report_interval: float = 10.0,
+        on_progress: Optional[Callable[[IngestionProgress], None]] = None,
+    ):
+        self.embedder = embedder
+        self.store = store
+        self.embed_concurrency = max(1, embed_concurrency)
+        self.write_concurrency = max(1, write_concurrency)
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.on_progress = on_progress
+        self.progress = IngestionProgress()
+
+    async def run(self, batches: AsyncIterator[ChunkBatch]) -> IngestionProgress:
+        """Consume ``batches`` until exhausted and return the final counters."""
+
+        self.progress = IngestionProgress()
+        to_embed: "asyncio.Queue[Optional[ChunkBatch]]" = asyncio.Queue(self.queue_size)
+        to_write: "asyncio.Queue[Optional[ChunkBatch]]" = asyncio.Queue(self.queue_size)
+
+        async def produce() -> None:
+            async for batch in batches:
+                self.progress.chunks_produced += len(batch.records)
+                await to_embed.put(batch)
+            for _ in range(self.embed_concurrency):
+                await to_embed.put(None)
+
+        async def embed_worker() -> None:
+            while (batch := await to_embed.get()) is not None:
+                await to_write.put(await self._embed(batch))
+
+        async def write_worker() -> None:
+            while (batch := await to_write.get()) is not None:
+                if batch.records:
+                    stored = await self.store(batch.records)
+                    self.progress.chunks_written += len(stored)
+                    written = self.progress.written_by_document
+                    written[batch.document_id] = written.get(batch.document_id, 0) + len(stored)
+
+        async def embed_stage() -> None:
+            async with asyncio.TaskGroup() as group:
+                for _ in range(self.embed_concurrency):
+                    group.create_task(embed_worker())
+            # Every embed worker is done: release the writers
+            for _ in range(self.write_concurrency):
+                await to_write.put(None)
+
+        reporter = asyncio.create_task(self._report())
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(produce())
+                group.create_task(embed_stage())
+                for _ in range(self.write_concurrency):
+                    group.create_task(write_worker())
+        finally:
+            reporter.cancel()
+
+        logger.info("Ingestion pipeline finished: {}", self.progress.line())
+        return self.progress
+
+    async def _embed(self, batch: ChunkBatch) -> ChunkBatch:
+        # Records may already carry an embedding reused from an identical chunk
+        pending = [record for record in batch.records if record.get("embedding") is None]
+        embeddings = await self.embedder.embed([record["content"] for record in pending])
+        for record, embedding in zip(pending, embeddings):
+            record["embedding"] = embedding
+
+        ready = []
+        for record in batch.records:
+            if record["embedding"] is None:
+                self.progress.chunks_failed += 1
+                logger.warning("Skipping chunk {}: embedding failed", record["id"])
+                continue
+            ready.append(record)
+
+        self.progress.chunks_embedded += len(ready)
+        self.progress.tokens_embedded = self.embedder.stats.tokens
+        return ChunkBatch(document_id=batch.document_id, records=ready)
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            if self.on_progress is not None:
+                self.on_progress(self.progress)
+            else:
+                logger.info("Ingestion progress: {}", self.progress.line())
@@ -0,0 +1,212 @@
+"""
+Bulk writer loading legal documents and chunks straight into Postgres.
+
+Chunks are streamed with binary ``COPY`` into a temporary staging table and
+merged into ``document_chunks`` with ``INSERT ... ON CONFLICT``, one
+transaction per batch. Embeddings are sent as binary pgvector values, so a
+full corpus reload costs a handful of round trips instead of one HTTP
+request per chunk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+from pgvector.utils import from_db_binary, to_db_binary
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+CHUNK_COLUMNS = (
+    "id",
+    "document_id",
+    "content",
+    "language",
+    "domain",
+    "article_number",
+    "embedding",
+    "metadata",
+)
+
+_STAGING_TABLE = "document_chunks_staging"
+
+_MERGE_CHUNKS = f"""
+INSERT INTO document_chunks ({", ".join(CHUNK_COLUMNS)})
+SELECT {", ".join(CHUNK_COLUMNS)} FROM {_STAGING_TABLE}
+ON CONFLICT (id) DO UPDATE SET
+{", ".join(f"{column} = EXCLUDED.{column}" for column in CHUNK_COLUMNS if column != "id")}
+"""
+
+_UPSERT_DOCUMENT = """
+INSERT INTO legal_documents
+    (id, title, title_ar, domain, language, official_ref, publication_date, content, metadata)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+ON CONFLICT (id) DO UPDATE SET
+    title = EXCLUDED.title,
+    title_ar = EXCLUDED.title_ar,
+    domain = EXCLUDED.domain,
+    language = EXCLUDED.language,
+    official_ref = EXCLUDED.official_ref,
+    publication_date = EXCLUDED.publication_date,
+    content = EXCLUDED.content,
+    metadata = EXCLUDED.metadata,
+    updated_at = now()
+-- Leave unchanged documents alone: updated_at drives answer-cache invalidation
+WHERE (legal_documents.title, legal_documents.title_ar, legal_documents.domain,
+       legal_documents.language, legal_documents.official_ref,
+       legal_documents.publication_date, legal_documents.content, legal_documents.metadata)
+   IS DISTINCT FROM
+      (EXCLUDED.title, EXCLUDED.title_ar, EXCLUDED.domain, EXCLUDED.language,
+       EXCLUDED.official_ref, EXCLUDED.publication_date, EXCLUDED.content, EXCLUDED.metadata)
+RETURNING id
+"""
+
+
+class PostgresChunkWriter:
+    """Hold one pooled connection and bulk-load chunk batches through it.
+
+    Use as an async context manager::
+
+        async with PostgresChunkWriter(engine) as writer:
+            await writer.upsert_document(doc_record)
+            await writer.write_chunks(chunk_records)
+
+    The binary vector codec is registered on the borrowed connection for the
+    duration of the block and removed again before it returns to the pool,
+    where SQLAlchemy binds vectors as text. Calls from concurrent tasks are
+    serialized, as a connection runs one statement at a time.
+    """
+
+    def __init__(self, engine: AsyncEngine, *, batch_size: int = 2000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self._conn: Optional[AsyncConnection] = None
+        self._driver: Any = None
+        self._vector_schema: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self.rows_written = 0
+
+    async def __aenter__(self) -> "PostgresChunkWriter":
+        self._conn = await self.engine.connect()
+        raw = await self._conn.get_raw_connection()
+        self._driver = raw.driver_connection
+
+        # pgvector lives in "extensions" on Supabase and "public" elsewhere
+        self._vector_schema = await self._driver.fetchval(
+            "SELECT n.nspname FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace "
+            "WHERE t.typname = 'vector'"
+        )
+        if self._vector_schema is None:
+            await self._conn.close()
+            raise RuntimeError("pgvector extension is not installed in the target database")
+
+        await self._driver.set_type_codec(
+            "vector",
+            schema=self._vector_schema,
+            encoder=to_db_binary,
+            decoder=from_db_binary,
+            format="binary",
+        )
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        try:
+            if self._driver is not None and not self._driver.is_closed():
+                await self._driver.reset_type_codec("vector", schema=self._vector_schema)
+        finally:
+            await self._conn.close()
+            self._conn = None
+            self._driver = None
+
+    async def upsert_document(self, record: Dict[str, Any]) -> str:
+        """Insert or update a ``legal_documents`` row and return its id."""
+
+        async with self._lock:
+            await self._driver.fetchval(
+                _UPSERT_DOCUMENT,
+                record["id"],
+                record["title"],
+                record.get("title_ar"),
+                record["domain"],
+                record["language"],
+                record["official_ref"],
+                record.get("publication_date"),
+                record.get("content"),
+                json.dumps(record.get("metadata") or {}, ensure_ascii=False),
+            )
+        # No row is returned when nothing changed
+        return record["id"]
+
+    async def chunk_hashes(self, document_id: str) -> Dict[str, Optional[str]]:
+        """Map each stored chunk id of a document to its ``metadata.content_hash``."""
+
+        async with self._lock:
+            rows = await self._driver.fetch(
+                "SELECT id, metadata->>'content_hash' AS content_hash "
+                "FROM document_chunks WHERE document_id = $1",
+                document_id,
+            )
+        return {row["id"]: row["content_hash"] for row in rows}
+
+    async def fetch_embeddings(self, chunk_ids: List[str]) -> Dict[str, Any]:
+        """Load stored embeddings (as float32 arrays) so moved chunks can reuse them."""
+
+        if not chunk_ids:
+            return {}
+        async with self._lock:
+            rows = await self._driver.fetch(
+                "SELECT id, embedding FROM document_chunks "
+                "WHERE id = ANY($1::text[]) AND embedding IS NOT NULL",
+                chunk_ids,
+            )
+        return {row["id"]: row["embedding"] for row in rows}
+
+    async def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete chunks by id and return how many were removed."""
+
+        if not chunk_ids:
+            return 0
+        async with self._lock:
+            status = await self._driver.execute(
+                "DELETE FROM document_chunks WHERE id = ANY($1::text[])", chunk_ids
+            )
+        return int(status.split()[-1])
+
+    async def write_chunks(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Upsert chunk records (``document_chunks`` column names) in COPY batches."""
+
+        # ON CONFLICT cannot touch the same row twice in one statement
+        unique = {record["id"]: record for record in records}
+        rows = [_chunk_row(record) for record in unique.values()]
+
+        written = 0
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start : start + self.batch_size]
+            async with self._lock, self._driver.transaction():
+                await self._driver.execute(
+                    f"CREATE TEMP TABLE {_STAGING_TABLE} "
+                    "(LIKE document_chunks INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                await self._driver.copy_records_to_table(
+                    _STAGING_TABLE, records=batch, columns=CHUNK_COLUMNS
+                )
+                await self._driver.execute(_MERGE_CHUNKS)
+            written += len(batch)
+            logger.debug("Copied {} chunks ({}/{})", len(batch), written, len(rows))
+
+        self.rows_written += written
+        return written
+
+
+def _chunk_row(record: Dict[str, Any]) -> tuple:
+    return (
+        record["id"],
+        record["document_id"],
+        record["content"],
+        record["language"],
+        record.get("domain"),
+        record.get("article_number"),
+        record.get("embedding"),
+        json.dumps(record.get("metadata") or {}, ensure_ascii=False),
+    )
@@ -0,0 +1,82 @@
+"""Token-bucket limiter shared by concurrent ingestion workers (OpenAI RPM/TPM)."""
+
+from __future__ import annotations
+
+import asyncio
+from time import monotonic
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Continuously refilling bucket of ``capacity`` units per ``period`` seconds."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = self.capacity
+        self._updated = monotonic()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets for one API.
+
+    ``acquire`` waits until both buckets can cover a request, so concurrent
+    workers share the account limits instead of each backing off on its own
+    after a 429. ``pause`` stops every worker, e.g. for a ``Retry-After``.
+    """
+
+    def __init__(self, *, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+        self.waited_seconds = 0.0
+        self.pauses = 0
+
+    async def acquire(self, tokens: int) -> None:
+        # The lock keeps waiters in FIFO order and makes check-and-take atomic
+        async with self._lock:
+            while True:
+                wait = max(
+                    self._paused_until - monotonic(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(tokens),
+                )
+                if wait <= 0:
+                    break
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for ``seconds`` (e.g. after a 429)."""
+
+        self.pauses += 1
+        self._paused_until = max(self._paused_until, monotonic() + seconds)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+            "waited_seconds": round(self.waited_seconds, 1),
+            "pauses": self.pauses,
+        }
@@ -77,6 +77,9 @@ class Message(Base):
     language: Mapped[str] = mapped_column(String(10), nullable=False)
     citations: Mapped[Optional[Any]] = mapped_column(JSONB)
     voice_used: Mapped[bool] = mapped_column("voiceUsed", Boolean, default=False)
+    response_time_ms: Mapped[Optional[int]] = mapped_column("responseTime", Integer)
+    time_to_first_token_ms: Mapped[Optional[int]] = mapped_column("timeToFirstToken", Integer)
+    audio_key: Mapped[Optional[str]] = mapped_column("audioKey", String(64))  # stored TTS audio, see audio_store
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     conversation: Mapped[Conversation] = relationship(back_populates="messages")
@@ -92,6 +95,7 @@ class QueryAnalytics(Base):
     language: Mapped[str] = mapped_column(String(10), nullable=False)
     domain: Mapped[Optional[str]] = mapped_column(String(50))
     response_time_ms: Mapped[int] = mapped_column("responseTime", Integer, nullable=False)
+    time_to_first_token_ms: Mapped[Optional[int]] = mapped_column("timeToFirstToken", Integer)
     voice_used: Mapped[bool] = mapped_column("voiceUsed", Boolean, default=False)
     successful: Mapped[bool] = mapped_column(Boolean, default=True)
     user_id: Mapped[Optional[str]] = mapped_column(String, index=True)
@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Dict, List, Optional
 
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import DateTime, ForeignKey, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -46,6 +46,10 @@ class DocumentChunk(Base):
     """Chunked legal content with vector embeddings for similarity search."""
 
     __tablename__ = "document_chunks"
+    # Exact lookups of explicitly cited articles (see retrieve_exact_article)
+    __table_args__ = (
+        Index("ix_document_chunks_document_article", "document_id", "article_number"),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     document_id: Mapped[str] = mapped_column(
@@ -53,6 +57,9 @@ class DocumentChunk(Base):
     )
     content: Mapped[str] = mapped_column(Text, nullable=False)
     language: Mapped[str] = mapped_column(String(10), nullable=False, index=True)
+    # Denormalized from legal_documents.domain so filtered ANN searches
+    # can use partial indexes without joining the parent document.
+    domain: Mapped[Optional[str]] = mapped_column(String(100), index=True)
     article_number: Mapped[Optional[str]] = mapped_column(String(50))
     embedding: Mapped[Optional[List[float]]] = mapped_column(
         Vector(settings.VECTOR_DIMENSION), nullable=True
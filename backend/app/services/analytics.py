@@ -0,0 +1,150 @@
+"""Buffered writer that inserts ``QueryAnalytics`` rows in batches off the request path."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from loguru import logger
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import QueryAnalytics
+
+
+class AnalyticsWriter:
+    """Bounded in-process queue of analytics events flushed as multi-row INSERTs.
+
+    A background task writes a batch when ``batch_size`` events are queued
+    or ``flush_interval`` seconds after the first one, using its own session.
+    When the queue is full, ``record`` waits up to ``enqueue_timeout`` for
+    room (backpressure) and then drops the event. ``stop`` drains the queue.
+    Before ``start`` (e.g. in scripts) events are written immediately.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        enqueue_timeout: float,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="analytics-writer")
+            logger.info(
+                "Analytics writer started (batch={}, interval={}s, queue={})",
+                self.batch_size,
+                self.flush_interval,
+                self._queue.maxsize,
+            )
+
+    async def stop(self) -> None:
+        """Stop the background task and write everything still queued."""
+
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        while not self._queue.empty():
+            await self._write(self._take(self.batch_size))
+        logger.info("Analytics writer stopped ({} rows written, {} dropped)", self.written, self.dropped)
+
+    async def record(self, **fields: Any) -> None:
+        """Queue one analytics row (``QueryAnalytics`` attribute names)."""
+
+        row = {
+            "id": str(uuid4()),
+            "created_at": datetime.now(timezone.utc),
+            **fields,
+        }
+        if self._task is None:
+            await self._write([row])
+            return
+
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(row), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                logger.warning("Analytics queue full; dropped event ({} dropped so far)", self.dropped)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    batch.extend(self._take(self.batch_size - len(batch)))
+                    remaining = deadline - loop.time()
+                    if len(batch) >= self.batch_size or remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+            finally:
+                # Shielded so a shutdown mid-batch still writes what was collected
+                await asyncio.shield(self._write(batch))
+
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        rows = []
+        while len(rows) < limit and not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        return rows
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(insert(QueryAnalytics), rows)
+                await session.commit()
+        except Exception as exc:
+            # Analytics must never break chat; the batch is lost
+            self.failed += len(rows)
+            logger.error("Failed to write {} analytics rows: {}", len(rows), exc)
+            return
+        self.written += len(rows)
+        self.batches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+analytics_writer = AnalyticsWriter(
+    max_queue=settings.ANALYTICS_QUEUE_SIZE,
+    batch_size=settings.ANALYTICS_BATCH_SIZE,
+    flush_interval=settings.ANALYTICS_FLUSH_INTERVAL,
+    enqueue_timeout=settings.ANALYTICS_ENQUEUE_TIMEOUT,
+)
@@ -0,0 +1,234 @@
+"""Semantic answer cache keyed on the neighbourhood of the query embedding."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import count
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import LegalDocument
+
+BucketKey = Tuple[str, Optional[str]]
+
+
+@dataclass
+class _CachedAnswer:
+    bucket: BucketKey
+    vector: np.ndarray
+    answer: str
+    citations: List[Dict[str, Any]]
+    created_at: float = field(default_factory=monotonic)
+
+
+class _Bucket:
+    """Entries sharing a (language, domain) pair with a lazily stacked matrix."""
+
+    def __init__(self) -> None:
+        self.entries: Dict[int, _CachedAnswer] = {}
+        self._ids: List[int] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def add(self, entry_id: int, entry: _CachedAnswer) -> None:
+        self.entries[entry_id] = entry
+        self._matrix = None
+
+    def remove(self, entry_id: int) -> None:
+        if self.entries.pop(entry_id, None) is not None:
+            self._matrix = None
+
+    def nearest(self, vector: np.ndarray) -> Tuple[Optional[int], float]:
+        """Return the closest entry id and its cosine distance."""
+
+        if not self.entries:
+            return None, 2.0
+        if self._matrix is None:
+            self._ids = list(self.entries)
+            self._matrix = np.stack([self.entries[i].vector for i in self._ids])
+        similarities = self._matrix @ vector
+        best = int(np.argmax(similarities))
+        return self._ids[best], float(1.0 - similarities[best])
+
+
+class SemanticAnswerCache:
+    """Bounded cache returning stored answers for paraphrased questions.
+
+    Entries are grouped by (language, domain); a lookup hits when the nearest
+    cached query embedding lies within ``max_distance`` cosine distance.
+    Entries expire after ``ttl`` seconds, the least recently used entry is
+    evicted beyond ``max_entries``, and everything is dropped when
+    ``legal_documents.updated_at`` moves.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        max_distance: float,
+        ttl: int,
+        version_check_interval: int,
+        enabled: bool = True,
+    ):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self.enabled = enabled
+        self._lru: "OrderedDict[int, _CachedAnswer]" = OrderedDict()
+        self._buckets: Dict[BucketKey, _Bucket] = {}
+        self._ids = count()
+        self._corpus_version: Optional[Any] = None
+        self._version_checked_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        *,
+        embedding: List[float],
+        language: str,
+        domain: Optional[str],
+    ) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """Return ``(answer, citations)`` for a nearby cached query, if any."""
+
+        if not self.enabled:
+            return None
+
+        await self._check_corpus_version(db)
+
+        bucket = self._buckets.get((language, domain))
+        if bucket is None:
+            self.misses += 1
+            return None
+
+        vector = _normalize(embedding)
+        while True:
+            entry_id, distance = bucket.nearest(vector)
+            if entry_id is None:
+                break
+            entry = bucket.entries[entry_id]
+            if monotonic() - entry.created_at <= self.ttl:
+                break
+            self._drop(entry_id)
+
+        if entry_id is None or distance > self.max_distance:
+            self.misses += 1
+            return None
+
+        self._lru.move_to_end(entry_id)
+        self.hits += 1
+        logger.info("Semantic cache hit (distance={:.4f}, lang={}, domain={})", distance, language, domain)
+        return entry.answer, entry.citations
+
+    async def store(
+        self,
+        db: AsyncSession,
+        *,
+        embedding: List[float],
+        language: str,
+        domain: Optional[str],
+        answer: str,
+        citations: List[Dict[str, Any]],
+    ) -> None:
+        """Cache an answer, replacing a near-identical entry in the same bucket."""
+
+        if not self.enabled:
+            return
+
+        await self._check_corpus_version(db)
+
+        key = (language, domain)
+        bucket = self._buckets.setdefault(key, _Bucket())
+        vector = _normalize(embedding)
+
+        existing_id, distance = bucket.nearest(vector)
+        if existing_id is not None and distance <= self.max_distance / 4:
+            self._drop(existing_id)
+
+        entry_id = next(self._ids)
+        entry = _CachedAnswer(bucket=key, vector=vector, answer=answer, citations=citations)
+        bucket.add(entry_id, entry)
+        self._lru[entry_id] = entry
+
+        while len(self._lru) > self.max_entries:
+            oldest_id = next(iter(self._lru))
+            self._drop(oldest_id)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every cached answer."""
+
+        self._lru.clear()
+        self._buckets.clear()
+        self.invalidations += 1
+
+    def _drop(self, entry_id: int) -> None:
+        entry = self._lru.pop(entry_id, None)
+        if entry is None:
+            return
+        bucket = self._buckets.get(entry.bucket)
+        if bucket is not None:
+            bucket.remove(entry_id)
+            if not bucket.entries:
+                del self._buckets[entry.bucket]
+
+    async def _check_corpus_version(self, db: AsyncSession) -> None:
+        """Invalidate the cache when the legal corpus has been updated."""
+
+        now = monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+
+        try:
+            async with db.begin_nested():
+                result = await db.execute(select(func.max(LegalDocument.updated_at)))
+                version = result.scalar()
+        except Exception as exc:
+            logger.warning("Could not read corpus version, clearing semantic cache: {}", exc)
+            self.invalidate()
+            return
+
+        if version != self._corpus_version and self._lru:
+            logger.info("Legal corpus changed ({} → {}); clearing semantic cache", self._corpus_version, version)
+            self.invalidate()
+        self._corpus_version = version
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._lru),
+            "max_entries": self.max_entries,
+            "max_distance": self.max_distance,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+answer_cache = SemanticAnswerCache(
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    max_distance=settings.ANSWER_CACHE_MAX_DISTANCE,
+    ttl=settings.ANSWER_CACHE_TTL,
+    version_check_interval=settings.ANSWER_CACHE_VERSION_CHECK_INTERVAL,
+    enabled=settings.ANSWER_CACHE_ENABLED,
+)
@@ -0,0 +1,101 @@
+"""Parse explicit article references ("الفصل 505 من القانون الجنائي", "article 53 code de la famille")."""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+_EASTERN_DIGITS = str.maketrans("\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669\u06F0\u06F1\u06F2\u06F3\u06F4\u06F5\u06F6\u06F7\u06F8\u06F9", "01234567890123456789")
+_ARABIC_MARKS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+
+_NUMBER = r"(\d+(?:\s*-\s*\d+)?)"
+_ARTICLE_PATTERNS = [
+    re.compile(rf"(?:المادة|الماده|مادة|الفصل|فصل)\s+(?:رقم\s+)?{_NUMBER}"),
+    re.compile(rf"\b(?:article|art\.?)\s*(?:n°|no|n)?\s*{_NUMBER}\b"),
+]
+_FIRST_ARTICLE_PATTERNS = [
+    re.compile(r"(?:المادة|الماده|الفصل)\s+(?:الاولى|الأولى|الاول|الأول)"),
+    re.compile(r"\barticle\s+(?:premier|1er)\b"),
+]
+
+# Aliases per code, keyed like backend/data/legal_docs/metadata.json. They
+# are matched (accent- and case-folded) against the query to pick the code,
+# and against legal_documents titles to find its document ids.
+CODE_ALIASES: Dict[str, List[str]] = {
+    "code_procedure_penale": ["المسطرة الجنائية", "code de procedure penale", "procedure penale"],
+    "code_procedure_civile": ["المسطرة المدنية", "code de procedure civile", "procedure civile"],
+    "code_penal": ["القانون الجنائي", "المجموعة الجنائية", "code penal"],
+    "moudawana": ["مدونة الاسرة", "code de la famille", "moudawana"],
+    "code_travail": ["مدونة الشغل", "code du travail"],
+    "code_obligations_contrats": [
+        "قانون الالتزامات والعقود",
+        "ق.ل.ع",
+        "code des obligations et des contrats",
+        "dahir des obligations et des contrats",
+    ],
+    "code_commerce": ["مدونة التجارة", "code de commerce"],
+    "cgi_2024": ["المدونة العامة للضرائب", "code general des impots"],
+    "protection_consommateur": ["حماية المستهلك", "protection du consommateur", "loi 31-08"],
+    "protection_donnees": ["حماية المعطيات", "حماية البيانات", "protection des donnees", "loi 09-08"],
+}
+
+
+@dataclass(frozen=True)
+class ArticleReference:
+    """An explicit "article N of code X" reference found in a query."""
+
+    article_number: str
+    code: str
+
+    def article_candidates(self) -> Tuple[str, ...]:
+        """Stored spellings of the article number (the extractor emits '١' for المادة الأولى)."""
+
+        if self.article_number == "1":
+            return ("1", "١")
+        return (self.article_number,)
+
+
+def fold_text(text: str) -> str:
+    """Case-, accent- and diacritic-insensitive form used for alias matching."""
+
+    text = unicodedata.normalize("NFKD", text.translate(_EASTERN_DIGITS))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = _ARABIC_MARKS.sub("", text)
+    text = text.replace("أ", "ا").replace("إ", "ا").replace("آ", "ا")
+    return re.sub(r"\s+", " ", text.casefold()).strip()
+
+
+def match_code(text: str) -> Optional[str]:
+    """Return the code key whose longest alias occurs in ``text``."""
+
+    folded = fold_text(text)
+    best: Optional[Tuple[int, str]] = None
+    for code, aliases in CODE_ALIASES.items():
+        for alias in aliases:
+            alias_folded = fold_text(alias)
+            if alias_folded in folded and (best is None or len(alias_folded) > best[0]):
+                best = (len(alias_folded), code)
+    return best[1] if best else None
+
+
+def parse_article_reference(query: str) -> Optional[ArticleReference]:
+    """Extract an article number plus code name, or ``None`` if either is missing."""
+
+    code = match_code(query)
+    if code is None:
+        return None
+
+    folded = fold_text(query)
+    for pattern in _ARTICLE_PATTERNS:
+        match = pattern.search(folded)
+        if match:
+            number = re.sub(r"\s+", "", match.group(1))
+            return ArticleReference(article_number=number, code=code)
+
+    for pattern in _FIRST_ARTICLE_PATTERNS:
+        if pattern.search(folded):
+            return ArticleReference(article_number="1", code=code)
+
+    return None
@@ -0,0 +1,234 @@
+"""
+Container/codec probing of uploaded audio, and the format Whisper uploads use.
+
+``probe_audio`` reads just enough of an Ogg or WebM/Matroska file, in pure
+Python and without decoding, to report its codec, channel count, sample rate,
+duration and average bitrate. That lets ``voice_openai`` send recordings that
+are already compact mono Opus (what the browser ``VoiceRecorder`` produces)
+to Whisper unchanged, and only run ffmpeg on everything else.
+
+Only the standard library is needed; the module does not load the backend
+settings so benchmark scripts can import it standalone.
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+# ffmpeg output settings for Whisper uploads
+WHISPER_FFMPEG_ARGS = (
+    "-vn",              # Drop any video/cover art stream
+    "-ac", "1",         # Mono
+    "-ar", "16000",     # 16kHz (sufficient for voice)
+    "-c:a", "libopus",  # Opus (best compression for speech)
+    "-b:a", "24k",      # 24kbps is ideal for voice
+    "-f", "webm",
+)
+WHISPER_TARGET_CHANNELS = 1
+
+_OPUS_GRANULE_RATE = 48000  # Ogg Opus granule positions always count 48 kHz samples
+
+
+@dataclass
+class AudioInfo:
+    """What a header probe learned about an audio file (``None`` where unknown)."""
+
+    container: str  # "ogg" or "webm"
+    codec: Optional[str]  # "opus", "vorbis", ...
+    channels: Optional[int]
+    sample_rate: Optional[int]  # input rate for Opus (it always codes at 48 kHz)
+    duration_s: Optional[float]
+    size: int
+
+    @property
+    def bitrate(self) -> Optional[float]:
+        """Average bits per second, container overhead included."""
+        if not self.duration_s:
+            return None
+        return self.size * 8 / self.duration_s
+
+
+def probe_audio(data: bytes) -> Optional[AudioInfo]:
+    """Probe an Ogg or WebM/Matroska file; ``None`` for other or unreadable input."""
+
+    try:
+        if data[:4] == b"OggS":
+            return _probe_ogg(data)
+        if data[:4] == b"\x1a\x45\xdf\xa3":
+            return _probe_matroska(data)
+    except (IndexError, ValueError, struct.error):
+        return None
+    return None
+
+
+def is_whisper_ready(info: Optional[AudioInfo], max_bitrate: float) -> bool:
+    """True if re-encoding to the Whisper target would not make ``info`` meaningfully smaller.
+
+    Opus always codes at 48 kHz internally, so its size is governed by the
+    channel count and bitrate alone; other codecs are always transcoded.
+    """
+
+    return (
+        info is not None
+        and info.codec == "opus"
+        and info.channels is not None
+        and info.channels <= WHISPER_TARGET_CHANNELS
+        and info.bitrate is not None
+        and info.bitrate <= max_bitrate
+    )
+
+
+def _probe_ogg(data: bytes) -> AudioInfo:
+    # First page: 27-byte header, segment table, then the codec's ID header
+    segments = data[26]
+    payload = data[27 + segments :]
+    codec = channels = sample_rate = None
+    pre_skip = 0
+    if payload[:8] == b"OpusHead":
+        codec = "opus"
+        channels = payload[9]
+        pre_skip, sample_rate = struct.unpack_from("<HI", payload, 10)
+    elif payload[:7] == b"\x01vorbis":
+        codec = "vorbis"
+        channels = payload[11]
+        sample_rate = struct.unpack_from("<I", payload, 12)[0]
+
+    duration_s = None
+    if codec == "opus":
+        # Last page carrying a packet end holds the final granule position
+        end = len(data)
+        while (page := data.rfind(b"OggS", 0, end)) > 0:
+            granule = struct.unpack_from("<q", data, page + 6)[0]
+            if granule >= 0:
+                duration_s = max(granule - pre_skip, 0) / _OPUS_GRANULE_RATE
+                break
+            end = page
+
+    return AudioInfo("ogg", codec, channels, sample_rate or None, duration_s, len(data))
+
+
+# Matroska element IDs (marker bits included)
+_TRACK_ENTRY = 0xAE
+_CLUSTER = 0x1F43B675
+_MASTERS = {
+    0x18538067,  # Segment
+    0x1549A966,  # Info
+    0x1654AE6B,  # Tracks
+    _TRACK_ENTRY,
+    0xE1,        # Audio
+    _CLUSTER,
+    0xA0,        # BlockGroup
+}
+_DOC_TYPE = 0x4282
+_TIMECODE_SCALE = 0x2AD7B1
+_DURATION = 0x4489
+_TRACK_TYPE = 0x83
+_CODEC_ID = 0x86
+_CODEC_PRIVATE = 0x63A2
+_SAMPLING_FREQUENCY = 0xB5
+_CHANNELS = 0x9F
+_CLUSTER_TIMECODE = 0xE7
+_SIMPLE_BLOCK = 0xA3
+_BLOCK = 0xA1
+_AUDIO_TRACK = 2
+
+
+def _read_vint(data: bytes, pos: int, keep_marker: bool) -> Tuple[Optional[int], int]:
+    """EBML variable-length integer at ``pos``; value ``None`` means "unknown size"."""
+
+    first = data[pos]
+    length = 8 - first.bit_length() + 1
+    if not 1 <= length <= 8 or len(data) < pos + length:
+        raise ValueError("invalid or truncated EBML integer")
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[pos + 1 : pos + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, pos + length
+    return value, pos + length
+
+
+def _probe_matroska(data: bytes) -> AudioInfo:
+    """Walk element headers, descending into the masters we need and skipping the rest.
+
+    Recorders stream Segments and Clusters with unknown sizes, so masters are
+    entered rather than bounded: the IDs read here are unique across levels.
+    """
+
+    container = "webm"
+    timecode_scale = 1_000_000  # ns per tick
+    duration_ticks: Optional[float] = None
+    track: Dict[str, Any] = {}
+    audio_track: Optional[Dict[str, Any]] = None
+    cluster_timecode = 0
+    last_block_ticks: Optional[int] = None
+
+    _, pos = _read_vint(data, 0, keep_marker=True)
+    header_size, pos = _read_vint(data, pos, keep_marker=False)
+    header_end = pos + (header_size or 0)
+    while pos < header_end:
+        element, pos = _read_vint(data, pos, keep_marker=True)
+        size, pos = _read_vint(data, pos, keep_marker=False)
+        if element == _DOC_TYPE and data[pos : pos + size] == b"matroska":
+            container = "matroska"
+        pos += size or 0
+
+    view = memoryview(data)
+    while pos < len(data):
+        element, pos = _read_vint(data, pos, keep_marker=True)
+        size, pos = _read_vint(data, pos, keep_marker=False)
+        if element in _MASTERS:
+            if element == _TRACK_ENTRY:
+                track = {}
+            elif element == _CLUSTER and duration_ticks and audio_track:
+                # Header says it all; only live recordings need their blocks walked
+                break
+            continue
+        if size is None or pos + size > len(data):
+            # Unknown-size leaf or truncated upload: nothing more to learn
+            break
+        value = view[pos : pos + size]
+        pos += size
+
+        if element == _TIMECODE_SCALE:
+            timecode_scale = int.from_bytes(value, "big")
+        elif element == _DURATION:
+            duration_ticks = struct.unpack(">d" if size == 8 else ">f", value)[0]
+        elif element == _TRACK_TYPE:
+            track["type"] = int.from_bytes(value, "big")
+        elif element == _CODEC_ID:
+            codec_id = bytes(value).rstrip(b"\0").decode("ascii", "replace")
+            track["codec"] = codec_id[2:].lower() if codec_id.startswith("A_") else codec_id.lower()
+        elif element == _CODEC_PRIVATE and value[:8] == b"OpusHead":
+            track["head_channels"] = value[9]
+            track["head_rate"] = struct.unpack_from("<I", value, 12)[0]
+        elif element == _SAMPLING_FREQUENCY:
+            track["rate"] = int(struct.unpack(">d" if size == 8 else ">f", value)[0])
+        elif element == _CHANNELS:
+            track["channels"] = int.from_bytes(value, "big")
+        elif element == _CLUSTER_TIMECODE:
+            cluster_timecode = int.from_bytes(value, "big")
+        elif element in (_SIMPLE_BLOCK, _BLOCK):
+            _, offset = _read_vint(value, 0, keep_marker=False)
+            relative = struct.unpack_from(">h", value, offset)[0]
+            last_block_ticks = cluster_timecode + relative
+
+        if audio_track is None and track.get("type") == _AUDIO_TRACK:
+            # First audio track; its dict keeps filling until the next TrackEntry
+            audio_track = track
+
+    audio_track = audio_track or {}
+    codec = audio_track.get("codec")
+    channels = audio_track.get("channels") or audio_track.get("head_channels")
+    sample_rate = audio_track.get("head_rate") or audio_track.get("rate")
+
+    duration_s = None
+    if duration_ticks:
+        duration_s = duration_ticks * timecode_scale / 1e9
+    elif last_block_ticks:
+        # No Duration (live recording): the last block's timestamp is within a frame of it
+        duration_s = last_block_ticks * timecode_scale / 1e9
+
+    return AudioInfo(container, codec, channels, sample_rate, duration_s, len(data))
@@ -0,0 +1,110 @@
+"""
+Content-addressed store for synthesized speech on local disk.
+
+Blobs are named by the TTS cache key (sha256 of model, text, voice and
+speed) and sharded two levels deep (``ab/cd/abcd….mp3``) so no directory
+grows past a few hundred files. A key always maps to the same bytes, so
+blobs are written once, never modified, and can be served with a strong
+``ETag`` and long-lived ``Cache-Control``. Writes go to a temporary file
+that is renamed into place, so readers never see a partial blob and
+concurrent workers may race to write the same key harmlessly.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+
+class AudioStore:
+    """Write-once audio blobs under ``root``, keyed by SHA-256 hex digest."""
+
+    def __init__(self, root: Path, *, suffix: str = ".mp3"):
+        self.root = Path(root)
+        self.suffix = suffix
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.bytes_written = 0
+
+    @staticmethod
+    def is_key(key: str) -> bool:
+        return bool(_KEY.match(key))
+
+    def path(self, key: str) -> Path:
+        """Blob path of ``key`` (which must be a lowercase SHA-256 hex digest)."""
+
+        if not self.is_key(key):
+            raise ValueError(f"Invalid audio key: {key!r}")
+        return self.root / key[:2] / key[2:4] / f"{key}{self.suffix}"
+
+    def get_path(self, key: str) -> Optional[Path]:
+        """Path of a stored blob, or ``None`` if ``key`` is not stored."""
+
+        path = self.path(key)
+        if path.is_file():
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, audio: bytes) -> Path:
+        """Store ``audio`` under ``key`` (no-op if already present)."""
+
+        path = self.path(key)
+        if path.is_file():
+            return path
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(audio)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        self.writes += 1
+        self.bytes_written += len(audio)
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.root),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "written_mb": round(self.bytes_written / 1_048_576, 1),
+        }
+
+
+def open_audio_store(root: Optional[str]) -> Optional[AudioStore]:
+    """Open the store under ``root``, or return ``None`` if unset or unusable."""
+
+    if not root:
+        return None
+    try:
+        return AudioStore(Path(root))
+    except OSError as exc:
+        logger.warning("Audio store at {} unavailable: {}", root, exc)
+        return None
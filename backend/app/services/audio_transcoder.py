@@ -0,0 +1,139 @@
+"""
+Audio transcoding through ffmpeg subprocesses, off the event loop.
+
+Each transcode pipes the upload into ``ffmpeg`` on stdin and reads the result
+from stdout, so nothing is decoded in the API process and no temporary files
+are written; the event loop only waits on pipes. A semaphore caps how many
+ffmpeg processes run at once (``AUDIO_TRANSCODE_CONCURRENCY``); requests
+beyond that wait in line, and the queue depth, run times and failures are
+reported under ``audio_transcoder`` in ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from time import perf_counter
+from typing import Any, Dict, Sequence
+
+from app.core.config import settings
+
+
+class TranscodeError(RuntimeError):
+    """ffmpeg failed, timed out or could not be started."""
+
+
+class AudioTranscoder:
+    """Bounded pool of concurrent ffmpeg processes."""
+
+    def __init__(self, *, binary: str, concurrency: int, timeout: float):
+        self.binary = binary
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.queued = 0
+        self.peak_queued = 0
+        self.running = 0
+        self.transcodes = 0
+        self.passthroughs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.wait_ms = 0.0
+        self.transcode_ms = 0.0
+        self.max_transcode_ms = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def transcode(self, audio: bytes, output_args: Sequence[str]) -> bytes:
+        """Run ``ffmpeg -i pipe:0 <output_args> pipe:1`` on ``audio``."""
+
+        queued_at = perf_counter()
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.wait_ms += (perf_counter() - queued_at) * 1000
+
+        self.running += 1
+        started = perf_counter()
+        try:
+            output = await self._run(audio, output_args)
+        except TranscodeError:
+            self.failures += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+        elapsed_ms = (perf_counter() - started) * 1000
+        self.transcodes += 1
+        self.transcode_ms += elapsed_ms
+        self.max_transcode_ms = max(self.max_transcode_ms, elapsed_ms)
+        self.bytes_in += len(audio)
+        self.bytes_out += len(output)
+        return output
+
+    def record_passthrough(self) -> None:
+        """Count an upload sent as-is because it was already in the target format."""
+
+        self.passthroughs += 1
+
+    async def _run(self, audio: bytes, output_args: Sequence[str]) -> bytes:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.binary,
+                "-hide_banner",
+                "-loglevel", "error",
+                "-i", "pipe:0",
+                *output_args,
+                "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as exc:
+            raise TranscodeError(f"cannot start {self.binary}: {exc}") from exc
+
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(audio), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise TranscodeError(f"{self.binary} timed out after {self.timeout}s")
+        finally:
+            # Timed out or cancelled (client disconnected): do not leave ffmpeg running
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+        if process.returncode != 0:
+            detail = stderr.decode("utf-8", "replace").strip().splitlines()
+            raise TranscodeError(
+                f"{self.binary} exited with {process.returncode}: {detail[-1] if detail else 'no output'}"
+            )
+        return stdout
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self.transcodes + self.failures
+        return {
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "transcodes": self.transcodes,
+            "passthroughs": self.passthroughs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_ms / completed, 1) if completed else 0.0,
+            "avg_transcode_ms": round(self.transcode_ms / self.transcodes, 1) if self.transcodes else 0.0,
+            "max_transcode_ms": round(self.max_transcode_ms, 1),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+
+audio_transcoder = AudioTranscoder(
+    binary=settings.FFMPEG_BINARY,
+    concurrency=settings.AUDIO_TRANSCODE_CONCURRENCY,
+    timeout=settings.AUDIO_TRANSCODE_TIMEOUT,
+)
@@ -0,0 +1,186 @@
+"""Two-tier cache for query embeddings (in-process LRU in front of Redis)."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import struct
+import unicodedata
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis, mark_redis_failure, redis_available
+from app.ingestion.embedding_store import open_embedding_store
+
+_ARABIC_MARKS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = "?؟!.,،;؛:«»\"' "
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache key.
+
+    Applies NFKC, drops Arabic diacritics and tatweel, case-folds, collapses
+    whitespace and strips surrounding punctuation.
+    """
+
+    text = unicodedata.normalize("NFKC", query)
+    text = _ARABIC_MARKS.sub("", text)
+    text = _WHITESPACE.sub(" ", text.casefold())
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def pack_embedding(embedding: List[float]) -> bytes:
+    """Encode an embedding as little-endian float32 bytes."""
+
+    return struct.pack(f"<{len(embedding)}f", *embedding)
+
+
+def unpack_embedding(payload: bytes) -> List[float]:
+    """Decode little-endian float32 bytes back into a list of floats."""
+
+    return list(struct.unpack(f"<{len(payload) // 4}f", payload))
+
+
+class EmbeddingCache:
+    """Bounded LRU of packed embeddings backed by a shared Redis tier."""
+
+    def __init__(
+        self,
+        *,
+        model: str,
+        dimensions: int,
+        max_entries: int,
+        ttl: int,
+        redis_ttl: int,
+        enabled: bool = True,
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.redis_errors = 0
+        self.api_calls = 0
+        self.api_time_ms = 0.0
+
+    def make_key(self, query: str) -> str:
+        """Cache key namespaced by model and dimensions."""
+
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"emb:v1:{self.model}:{self.dimensions}:{digest}"
+
+    async def get(self, query: str) -> Optional[List[float]]:
+        """Return a cached embedding, checking the local LRU then Redis."""
+
+        if not self.enabled:
+            return None
+
+        key = self.make_key(query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > monotonic():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return unpack_embedding(payload)
+            del self._entries[key]
+
+        if redis_available():
+            try:
+                payload = await get_redis().get(key)
+            except (RedisError, OSError) as exc:
+                self.redis_errors += 1
+                mark_redis_failure(exc)
+                payload = None
+            if payload and len(payload) == self.dimensions * 4:
+                self.redis_hits += 1
+                self._remember(key, payload)
+                return unpack_embedding(payload)
+
+        self.misses += 1
+        return None
+
+    async def set(self, query: str, embedding: List[float]) -> None:
+        """Store an embedding in both tiers."""
+
+        if not self.enabled or len(embedding) != self.dimensions:
+            return
+
+        key = self.make_key(query)
+        payload = pack_embedding(embedding)
+        self._remember(key, payload)
+
+        if redis_available():
+            try:
+                await get_redis().set(key, payload, ex=self.redis_ttl)
+            except (RedisError, OSError) as exc:
+                self.redis_errors += 1
+                mark_redis_failure(exc)
+
+    def record_api_call(self, duration_ms: float) -> None:
+        """Track uncached embedding latency to estimate cache savings."""
+
+        self.api_calls += 1
+        self.api_time_ms += duration_ms
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        self._entries[key] = (monotonic() + self.ttl, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop the local tier (Redis entries expire on their own)."""
+
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and estimated latency saved."""
+
+        hits = self.memory_hits + self.redis_hits
+        lookups = hits + self.misses
+        avg_api_ms = self.api_time_ms / self.api_calls if self.api_calls else 0.0
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "redis_errors": self.redis_errors,
+            "api_calls": self.api_calls,
+            "avg_api_latency_ms": round(avg_api_ms, 1),
+            "estimated_saved_ms": round(hits * avg_api_ms, 1),
+        }
+
+
+embedding_cache = EmbeddingCache(
+    model=settings.OPENAI_EMBEDDING_MODEL,
+    dimensions=settings.VECTOR_DIMENSION,
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    ttl=settings.EMBEDDING_CACHE_TTL,
+    redis_ttl=settings.EMBEDDING_CACHE_REDIS_TTL,
+    enabled=settings.EMBEDDING_CACHE_ENABLED,
+)
+
+# Embeddings already paid for by ingestion; consulted before calling the API
+embedding_store = open_embedding_store(
+    settings.EMBEDDING_STORE_PATH,
+    model=settings.OPENAI_EMBEDDING_MODEL,
+    dimensions=settings.VECTOR_DIMENSION,
+    read_only=True,
+)
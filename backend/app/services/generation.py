@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, List, Tuple
 
 from loguru import logger
-import openai
 
 from app.core.config import settings
+from app.core.openai_client import get_openai_client
 
 
 SYSTEM_PROMPTS = {
@@ -58,6 +58,62 @@ async def generate_answer(
         logger.warning("No legal context available for query")
         return _fallback_answer(language), []
 
+    try:
+        client = get_openai_client()
+        response = await client.chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            messages=build_messages(query, context, language),
+            temperature=0.2,
+            max_tokens=1600,
+        )
+        answer = response.choices[0].message.content
+        citations = extract_citations(documents)
+        logger.info("Answer generated successfully")
+        return answer, citations
+
+    except Exception as exc:
+        logger.error(f"Generation error: {exc}")
+        raise
+
+
+async def stream_answer(
+    *, query: str, documents: List[Dict[str, Any]], language: str = "ar"
+) -> AsyncIterator[str]:
+    """Stream the answer as text deltas using the retrieved legal context."""
+
+    logger.info("Streaming answer for query in {} with {} documents", language, len(documents))
+
+    context = build_context(documents, language)
+
+    if not context:
+        logger.warning("No legal context available for query")
+        yield _fallback_answer(language)
+        return
+
+    try:
+        client = get_openai_client()
+        stream = await client.chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            messages=build_messages(query, context, language),
+            temperature=0.2,
+            max_tokens=1600,
+            stream=True,
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    except Exception as exc:
+        logger.error(f"Streaming generation error: {exc}")
+        raise
+
+
+def build_messages(query: str, context: str, language: str) -> List[Dict[str, str]]:
+    """Build the chat-completion messages for a query and its legal context."""
+
     if language == "ar":
         user_prompt = f"""السؤال: {query}
 
@@ -87,25 +143,10 @@ Instructions strictes :
 
 Fournis une réponse détaillée avec citations."""
 
-    try:
-        client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        response = await client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPTS[language]},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.2,
-            max_tokens=1600,
-        )
-        answer = response.choices[0].message.content
-        citations = extract_citations(documents)
-        logger.info("Answer generated successfully")
-        return answer, citations
-
-    except Exception as exc:
-        logger.error(f"Generation error: {exc}")
-        raise
+    return [
+        {"role": "system", "content": SYSTEM_PROMPTS[language]},
+        {"role": "user", "content": user_prompt},
+    ]
 
 
 def build_context(documents: Iterable[Dict[str, Any]], language: str) -> str:
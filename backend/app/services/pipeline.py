@@ -0,0 +1,65 @@
+"""Small stage runner for the chat pipeline: concurrent fan-out with per-stage timings."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Awaitable, Dict, Iterator
+
+
+class StagePipeline:
+    """Times named stages of one request and runs independent ones concurrently.
+
+    ``gather`` runs its stages in an ``asyncio.TaskGroup``: the first failing
+    stage cancels the others and its exception is re-raised unwrapped, so
+    callers keep handling ``HTTPException`` and friends as before.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Record the wall time of a block in milliseconds under ``name``."""
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((perf_counter() - start) * 1000, 1)
+
+    async def run(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        with self.stage(name):
+            return await awaitable
+
+    async def gather(self, **stages: Awaitable[Any]) -> Dict[str, Any]:
+        """Run independent stages concurrently and return their results by name."""
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                tasks = {
+                    name: group.create_task(self.run(name, awaitable))
+                    for name, awaitable in stages.items()
+                }
+        except BaseExceptionGroup as errors:
+            raise _first_error(errors) from None
+
+        return {name: task.result() for name, task in tasks.items()}
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the pipeline started."""
+
+        return perf_counter() - self.started_at
+
+    def summary(self) -> str:
+        return ", ".join(f"{name}={value:.1f}ms" for name, value in self.timings.items())
+
+
+def _first_error(errors: BaseExceptionGroup) -> BaseException:
+    error: BaseException = errors
+    while isinstance(error, BaseExceptionGroup):
+        error = error.exceptions[0]
+    return error
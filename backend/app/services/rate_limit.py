@@ -0,0 +1,213 @@
+"""
+Per-identity chat quotas: a daily question limit plus a sliding request window.
+
+Counters live in Redis and are checked and consumed atomically by a Lua
+script, so the hot path needs no ``COUNT(*)`` over ``query_analytics``. The
+daily counter is seeded once per identity and day from the analytics table
+(so deploys or Redis restarts do not hand out fresh quota). When Redis is
+unavailable an in-process limiter with the same semantics takes over.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from time import time
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+from uuid import uuid4
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis, mark_redis_failure, redis_available
+
+CountToday = Callable[[], Awaitable[int]]
+
+# KEYS[1] daily counter, KEYS[2] sliding-window sorted set
+# ARGV: daily_limit, daily_ttl, seed, window_limit, window_ms, now_ms, member
+# Returns {status, daily_count, retry_after_ms}; status 0 = allowed,
+# -1 = daily limit reached, -2 = counter needs seeding, -3 = window full.
+_CONSUME_SCRIPT = """
+local count = redis.call('GET', KEYS[1])
+if not count then
+  local seed = tonumber(ARGV[3])
+  if seed < 0 then
+    return {-2, 0, 0}
+  end
+  redis.call('SET', KEYS[1], seed, 'EX', ARGV[2], 'NX')
+  count = redis.call('GET', KEYS[1])
+end
+count = tonumber(count)
+if count >= tonumber(ARGV[1]) then
+  return {-1, count, 0}
+end
+local window_limit = tonumber(ARGV[4])
+if window_limit > 0 then
+  local now = tonumber(ARGV[6])
+  local window = tonumber(ARGV[5])
+  redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - window)
+  if redis.call('ZCARD', KEYS[2]) >= window_limit then
+    local oldest = redis.call('ZRANGE', KEYS[2], 0, 0, 'WITHSCORES')
+    return {-3, count, tonumber(oldest[2]) + window - now}
+  end
+  redis.call('ZADD', KEYS[2], now, ARGV[7])
+  redis.call('PEXPIRE', KEYS[2], window)
+end
+count = redis.call('INCR', KEYS[1])
+return {0, count, 0}
+"""
+
+
+@dataclass(frozen=True)
+class QuotaDecision:
+    """Outcome of one quota check; ``used`` includes the current request when allowed."""
+
+    allowed: bool
+    limit: int
+    used: int
+    reason: Optional[str] = None  # "daily" or "window" when rejected
+    retry_after: int = 0  # seconds, for window rejections
+
+    @property
+    def remaining(self) -> int:
+        return max(self.limit - self.used, 0)
+
+
+class UsageLimiter:
+    """Daily quota and sliding-window limiter backed by Redis with a local fallback."""
+
+    def __init__(self, *, window_limit: int, window_seconds: int, enabled: bool = True):
+        self.window_limit = window_limit if enabled else 0
+        self.window_seconds = window_seconds
+        self._script = None
+        # Local fallback: identity -> (day, count) and identity -> request times
+        self._daily: Dict[str, Tuple[str, int]] = {}
+        self._windows: Dict[str, Deque[float]] = {}
+        self.redis_errors = 0
+        self.local_decisions = 0
+        self.rejections = 0
+
+    async def consume(self, identity: str, daily_limit: int, count_today: CountToday) -> QuotaDecision:
+        """Check both limits and, if allowed, count the request against them.
+
+        ``count_today`` returns today's usage from the analytics table; it is
+        only awaited when the day's counter does not exist yet.
+        """
+
+        decision = None
+        if redis_available():
+            try:
+                decision = await self._consume_redis(identity, daily_limit, count_today)
+            except (RedisError, OSError) as exc:
+                self.redis_errors += 1
+                mark_redis_failure(exc)
+
+        if decision is None:
+            self.local_decisions += 1
+            decision = await self._consume_local(identity, daily_limit, count_today)
+
+        if not decision.allowed:
+            self.rejections += 1
+        return decision
+
+    async def _consume_redis(self, identity: str, daily_limit: int, count_today: CountToday) -> QuotaDecision:
+        client = get_redis()
+        if self._script is None or self._script.registered_client is not client:
+            self._script = client.register_script(_CONSUME_SCRIPT)
+
+        day, ttl = _current_day()
+        # Hash tag keeps both keys in one slot on Redis Cluster
+        keys = [f"quota:v1:{{{identity}}}:{day}", f"rate:v1:{{{identity}}}"]
+        seed = -1
+        while True:
+            status, used, retry_after_ms = await self._script(
+                keys=keys,
+                args=[
+                    daily_limit,
+                    ttl,
+                    seed,
+                    self.window_limit,
+                    self.window_seconds * 1000,
+                    int(time() * 1000),
+                    uuid4().hex,
+                ],
+            )
+            if status != -2:
+                break
+            seed = await count_today()
+
+        return _decision(int(status), daily_limit, int(used), int(retry_after_ms) / 1000)
+
+    async def _consume_local(self, identity: str, daily_limit: int, count_today: CountToday) -> QuotaDecision:
+        day, _ = _current_day()
+        stored_day, used = self._daily.get(identity, (None, 0))
+        if stored_day != day:
+            seeded = await count_today()
+            # Another request for this identity may have seeded it meanwhile
+            stored_day, used = self._daily.get(identity, (None, 0))
+            if stored_day != day:
+                if len(self._daily) > 10_000:
+                    self._daily = {key: value for key, value in self._daily.items() if value[0] == day}
+                used = seeded
+                self._daily[identity] = (day, used)
+
+        if used >= daily_limit:
+            return _decision(-1, daily_limit, used, 0)
+
+        if self.window_limit > 0:
+            now = time()
+            if len(self._windows) > 10_000:
+                self._windows = {
+                    key: times
+                    for key, times in self._windows.items()
+                    if times and times[-1] > now - self.window_seconds
+                }
+            window = self._windows.setdefault(identity, deque())
+            while window and window[0] <= now - self.window_seconds:
+                window.popleft()
+            if len(window) >= self.window_limit:
+                return _decision(-3, daily_limit, used, window[0] + self.window_seconds - now)
+            window.append(now)
+
+        used += 1
+        self._daily[identity] = (day, used)
+        return _decision(0, daily_limit, used, 0)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "window_limit": self.window_limit,
+            "window_seconds": self.window_seconds,
+            "redis_errors": self.redis_errors,
+            "local_decisions": self.local_decisions,
+            "rejections": self.rejections,
+        }
+
+
+def _decision(status: int, limit: int, used: int, retry_after: float) -> QuotaDecision:
+    if status == -1:
+        return QuotaDecision(allowed=False, limit=limit, used=used, reason="daily")
+    if status == -3:
+        return QuotaDecision(
+            allowed=False,
+            limit=limit,
+            used=used,
+            reason="window",
+            retry_after=max(int(retry_after + 0.999), 1),
+        )
+    return QuotaDecision(allowed=True, limit=limit, used=used)
+
+
+def _current_day() -> Tuple[str, int]:
+    """UTC day key and seconds until it rolls over (plus slack for clock skew)."""
+
+    now = datetime.now(timezone.utc)
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return now.strftime("%Y%m%d"), int((tomorrow - now).total_seconds()) + 3600
+
+
+usage_limiter = UsageLimiter(
+    window_limit=settings.RATE_LIMIT_REQUESTS,
+    window_seconds=settings.RATE_LIMIT_WINDOW,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
@@ -1,21 +1,35 @@
-"""Document retrieval service powered by pgvector similarity search."""
+"""Document retrieval service: pgvector similarity search with optional full-text fusion."""
 
 from __future__ import annotations
 
-from time import perf_counter
-from typing import Any, Dict, List, Optional
+import asyncio
+import re
+from time import monotonic, perf_counter
+from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
-from sqlalchemy import Select, select
+from sqlalchemy import Select, bindparam, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.ext.asyncio import AsyncSession
-import openai
 
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.openai_client import get_openai_client
+from app.core.vector_index import apply_search_profile, text_search_config
+from app.services.article_reference import match_code, parse_article_reference
+from app.services.embedding_cache import embedding_cache, embedding_store
 from app.models import DocumentChunk, LegalDocument
 
 
 DEFAULT_MATCH_THRESHOLD = 0.30  # Optimized for quality (was 0.6, but 0.05 in practice)
 
+_WORD = re.compile(r"\w+")
+
+# Code key -> legal_documents ids, refreshed periodically (the table is small)
+_CODE_DOCUMENTS_TTL = 300.0
+_code_documents: Dict[str, List[Any]] = {}
+_code_documents_loaded_at = float("-inf")
+
 
 async def retrieve_relevant_documents(
     *,
@@ -25,117 +39,422 @@ async def retrieve_relevant_documents(
     top_k: int = 5,
     match_threshold: float = DEFAULT_MATCH_THRESHOLD,
     filter_domain: Optional[str] = None,
+    embedding: Optional[List[float]] = None,
+    search_mode: Optional[str] = None,
+    retrieval_mode: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+    exact_lookup: bool = True,
 ) -> List[Dict[str, Any]]:
     """Retrieve the most relevant legal document chunks for a query.
 
     This function performs the full retrieval stage of the RAG pipeline:
+    0. Answers explicit "article N of code X" queries by exact lookup
+       (see ``retrieve_exact_article``), skipping the steps below, unless
+       ``exact_lookup`` is false because the caller already tried it.
     1. Generates an embedding for the user query using OpenAI.
     2. Executes a pgvector cosine-distance search against chunk embeddings.
-    3. Returns enriched metadata for downstream generation and citation steps.
+    3. In ``hybrid`` mode, concurrently runs a Postgres full-text search and
+       merges both rankings with weighted reciprocal-rank fusion.
+    4. Returns enriched metadata for downstream generation and citation steps.
+
+    Callers that already embedded the query (e.g. for the semantic answer
+    cache) pass ``embedding`` to skip step 1. ``search_mode`` selects the
+    recall/latency profile of the ANN index scan (see ``SEARCH_PROFILES``).
+    Branch durations in milliseconds are written into ``timings`` if given.
     """
 
     if not query.strip():
         return []
 
+    retrieval_mode = retrieval_mode or settings.RETRIEVAL_MODE
+    timings = timings if timings is not None else {}
+
+    if exact_lookup:
+        exact_start = perf_counter()
+        exact = await retrieve_exact_article(db, query, top_k=top_k)
+        timings["exact_ms"] = (perf_counter() - exact_start) * 1000
+        if exact:
+            return exact
+
     logger.info(
-        "Retrieving documents for query (lang={}, top_k={}, domain={})",
+        "Retrieving documents for query (mode={}, lang={}, top_k={}, domain={})",
+        retrieval_mode,
         language,
         top_k,
         filter_domain,
     )
 
-    embedding = await generate_query_embedding(query)
-    if not embedding:
-        logger.warning("No embedding returned for query; skipping retrieval")
+    candidate_count = top_k * 10
+
+    async def vector_branch() -> List[Dict[str, Any]]:
+        query_embedding = embedding
+        if query_embedding is None:
+            embed_start = perf_counter()
+            query_embedding = await generate_query_embedding(query)
+            timings["embedding_ms"] = (perf_counter() - embed_start) * 1000
+        if not query_embedding:
+            logger.warning("No embedding returned for query; skipping vector search")
+            return []
+
+        search_start = perf_counter()
+        results = await _vector_search(
+            db,
+            embedding=query_embedding,
+            language=language,
+            filter_domain=filter_domain,
+            candidate_count=candidate_count,
+            match_threshold=match_threshold,
+            search_mode=search_mode,
+        )
+        timings["vector_ms"] = (perf_counter() - search_start) * 1000
+        return results
+
+    if retrieval_mode != "hybrid":
+        return (await vector_branch())[:top_k]
+
+    async def text_branch() -> List[Dict[str, Any]]:
+        search_start = perf_counter()
+        # A session cannot run two statements at once, so the full-text
+        # branch uses its own connection to overlap with the vector search.
+        async with AsyncSessionLocal() as text_db:
+            results = await _text_search(
+                text_db,
+                query=query,
+                language=language,
+                filter_domain=filter_domain,
+                candidate_count=candidate_count,
+            )
+        timings["text_ms"] = (perf_counter() - search_start) * 1000
+        return results
+
+    vector_results, text_results = await asyncio.gather(vector_branch(), text_branch())
+
+    fusion_start = perf_counter()
+    fused = reciprocal_rank_fusion(
+        [
+            (vector_results, settings.HYBRID_VECTOR_WEIGHT),
+            (text_results, settings.HYBRID_TEXT_WEIGHT),
+        ],
+        k=settings.HYBRID_RRF_K,
+    )[:top_k]
+    timings["fusion_ms"] = (perf_counter() - fusion_start) * 1000
+
+    logger.info(
+        "Hybrid retrieval: {} vector + {} text → {} fused ({})",
+        len(vector_results),
+        len(text_results),
+        len(fused),
+        ", ".join(f"{name}={value:.1f}" for name, value in timings.items()),
+    )
+    return fused
+
+
+async def retrieve_exact_article(
+    db: AsyncSession,
+    query: str,
+    *,
+    top_k: int = 5,
+) -> List[Dict[str, Any]]:
+    """Return the chunks of an explicitly cited article ("الفصل 505 من القانون الجنائي").
+
+    Queries naming both an article number and a code are answered by an
+    indexed lookup on ``(document_id, article_number)`` instead of embedding
+    and vector search. Returns an empty list when the query has no such
+    reference or the article is not in the corpus, so callers fall back to
+    semantic retrieval.
+    """
+
+    reference = parse_article_reference(query)
+    if reference is None:
         return []
 
-    search_start = perf_counter()
+    document_ids = (await _documents_by_code(db)).get(reference.code)
+    if not document_ids:
+        logger.info("Article reference to {} but no matching document is loaded", reference.code)
+        return []
 
-    similarity_score = (
-        1 - DocumentChunk.embedding.cosine_distance(embedding)
-    ).label("similarity")
-
-    stmt: Select = (
-        select(
-            DocumentChunk.id.label("chunk_id"),
-            DocumentChunk.content,
-            DocumentChunk.language,
-            DocumentChunk.article_number,
-            DocumentChunk.metadata.label("chunk_metadata"),
-            LegalDocument.id.label("document_id"),
-            LegalDocument.title,
-            LegalDocument.title_ar,
-            LegalDocument.domain,
-            LegalDocument.language.label("document_language"),
-            LegalDocument.official_ref,
-            LegalDocument.publication_date,
-            LegalDocument.metadata.label("document_metadata"),
-            similarity_score,
+    article_numbers = reference.article_candidates()
+    candidates = (
+        select(*_chunk_columns())
+        .where(DocumentChunk.document_id.in_(document_ids))
+        .where(
+            or_(
+                DocumentChunk.article_number.in_(article_numbers),
+                # Short articles merged into a chunk named after the first one
+                DocumentChunk.metadata["article_numbers"].has_any(array(list(article_numbers))),
+            )
         )
-        .join(LegalDocument, DocumentChunk.document_id == LegalDocument.id)
-        .where(DocumentChunk.embedding.isnot(None))
-        .order_by(DocumentChunk.embedding.cosine_distance(embedding))
-        .limit(top_k * 10)
+        .subquery("candidates")
     )
+    result = await db.execute(_with_documents(candidates, literal_column("1.0").label("similarity")))
+    rows = result.mappings().all()
+    if not rows:
+        logger.info("Article {} of {} not found; falling back to search", reference.article_number, reference.code)
+        return []
 
-    if language:
-        stmt = stmt.where(DocumentChunk.language == language)
-    if filter_domain:
-        stmt = stmt.where(LegalDocument.domain == filter_domain)
+    # Keep the article's chunks in reading order
+    rows = sorted(rows, key=lambda row: (row["chunk_metadata"] or {}).get("chunk_index", 0))
+    logger.info(
+        "Exact article lookup: {} article {} → {} chunks",
+        reference.code,
+        reference.article_number,
+        len(rows),
+    )
+    return [_row_to_document(row, similarity=1.0) for row in rows[:top_k]]
+
+
+async def _documents_by_code(db: AsyncSession) -> Dict[str, List[Any]]:
+    """Map code keys to document ids by matching their aliases against titles."""
+
+    global _code_documents_loaded_at
+
+    if monotonic() - _code_documents_loaded_at < _CODE_DOCUMENTS_TTL:
+        return _code_documents
+
+    result = await db.execute(select(LegalDocument.id, LegalDocument.title, LegalDocument.title_ar))
+    _code_documents.clear()
+    for document_id, title, title_ar in result.all():
+        code = match_code(f"{title or ''} {title_ar or ''}")
+        if code:
+            _code_documents.setdefault(code, []).append(document_id)
+    _code_documents_loaded_at = monotonic()
+    return _code_documents
+
+
+async def _vector_search(
+    db: AsyncSession,
+    *,
+    embedding: List[float],
+    language: Optional[str],
+    filter_domain: Optional[str],
+    candidate_count: int,
+    match_threshold: float,
+    search_mode: Optional[str],
+) -> List[Dict[str, Any]]:
+    """Cosine-distance ANN search, best first, filtered by ``match_threshold``."""
+
+    search_start = perf_counter()
+    search_mode = await apply_search_profile(db, search_mode, candidate_count)
+
+    distance = DocumentChunk.embedding.cosine_distance(embedding)
+
+    # The ANN scan runs on document_chunks alone: language and domain are
+    # chunk columns, rendered as literals so the planner can match the
+    # per-language / per-domain partial indexes. Document metadata is joined
+    # onto the (at most candidate_count) surviving rows afterwards.
+    candidates = _filtered_chunks(
+        select(*_chunk_columns(), distance.label("distance")),
+        language=language,
+        filter_domain=filter_domain,
+    )
+    candidates = (
+        candidates.where(DocumentChunk.embedding.isnot(None))
+        .order_by(distance)
+        .limit(candidate_count)
+    )
+
+    ranked = candidates.subquery("candidates")
+    stmt = _with_documents(ranked, (1 - ranked.c.distance).label("similarity")).order_by(
+        ranked.c.distance
+    )
 
     result = await db.execute(stmt)
     rows = result.mappings().all()
 
     duration_ms = (perf_counter() - search_start) * 1000
     logger.info(
-        "Vector search returned {} rows in {:.1f} ms", len(rows), duration_ms
+        "Vector search ({}) returned {} rows in {:.1f} ms", search_mode, len(rows), duration_ms
     )
 
-    # Filter by similarity threshold and retain top_k highest scores
+    # Filter by similarity threshold, keeping the ranking order
     filtered: List[Dict[str, Any]] = []
     for row in rows:
         similarity = row["similarity"]
         if similarity is None or similarity < match_threshold:
             continue
+        filtered.append(_row_to_document(row, similarity=similarity))
+
+    return filtered
+
+
+async def _text_search(
+    db: AsyncSession,
+    *,
+    query: str,
+    language: Optional[str],
+    filter_domain: Optional[str],
+    candidate_count: int,
+) -> List[Dict[str, Any]]:
+    """Full-text search over chunk content ranked by ``ts_rank_cd``.
+
+    Uses the same ``to_tsvector('<config>', content)`` expression as the
+    per-language GIN indexes so the planner can use them.
+    """
+
+    terms = _WORD.findall(query)
+    if not terms:
+        return []
+
+    config = literal_column(f"'{text_search_config(language)}'::regconfig")
+    document_vector = func.to_tsvector(config, DocumentChunk.content)
+    # OR the terms together: natural-language questions rarely contain
+    # every word of the matching article.
+    text_query = func.websearch_to_tsquery(config, " or ".join(terms))
+    rank = func.ts_rank_cd(document_vector, text_query)
+
+    candidates = _filtered_chunks(
+        select(*_chunk_columns(), rank.label("text_rank")),
+        language=language,
+        filter_domain=filter_domain,
+    )
+    candidates = (
+        candidates.where(document_vector.op("@@")(text_query))
+        .order_by(rank.desc())
+        .limit(candidate_count)
+    )
+
+    ranked = candidates.subquery("candidates")
+    stmt = _with_documents(ranked, ranked.c.text_rank).order_by(ranked.c.text_rank.desc())
+
+    result = await db.execute(stmt)
+    return [
+        _row_to_document(row, text_rank=row["text_rank"])
+        for row in result.mappings().all()
+    ]
+
 
-        filtered.append(
-            {
-                "chunk_id": row["chunk_id"],
-                "content": row["content"],
-                "language": row["language"],
-                "article_number": row["article_number"],
-                "similarity": similarity,
-                "metadata": row["chunk_metadata"] or {},
-                "document": {
-                    "id": row["document_id"],
-                    "title": row["title"],
-                    "title_ar": row["title_ar"],
-                    "domain": row["domain"],
-                    "language": row["document_language"],
-                    "official_ref": row["official_ref"],
-                    "publication_date": row["publication_date"],
-                    "metadata": row["document_metadata"] or {},
-                },
-            }
+def reciprocal_rank_fusion(
+    ranked_lists: List[Tuple[List[Dict[str, Any]], float]],
+    *,
+    k: int = 60,
+) -> List[Dict[str, Any]]:
+    """Merge ranked result lists with weighted reciprocal-rank fusion.
+
+    Each chunk scores ``sum(weight / (k + rank))`` over the lists it appears
+    in. Scores from the individual branches (similarity, text rank) are kept.
+    """
+
+    scores: Dict[str, float] = {}
+    merged: Dict[str, Dict[str, Any]] = {}
+
+    for results, weight in ranked_lists:
+        if weight <= 0:
+            continue
+        for rank, doc in enumerate(results, start=1):
+            chunk_id = doc["chunk_id"]
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + weight / (k + rank)
+            if chunk_id in merged:
+                for key in ("similarity", "text_rank"):
+                    if merged[chunk_id].get(key) is None and doc.get(key) is not None:
+                        merged[chunk_id][key] = doc[key]
+            else:
+                merged[chunk_id] = dict(doc)
+
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    for chunk_id in ordered:
+        merged[chunk_id]["rrf_score"] = scores[chunk_id]
+    return [merged[chunk_id] for chunk_id in ordered]
+
+
+def _chunk_columns() -> Tuple[Any, ...]:
+    return (
+        DocumentChunk.id.label("chunk_id"),
+        DocumentChunk.document_id,
+        DocumentChunk.content,
+        DocumentChunk.language,
+        DocumentChunk.article_number,
+        DocumentChunk.metadata.label("chunk_metadata"),
+    )
+
+
+def _filtered_chunks(
+    stmt: Select, *, language: Optional[str], filter_domain: Optional[str]
+) -> Select:
+    if language:
+        stmt = stmt.where(
+            DocumentChunk.language == bindparam("language", language, literal_execute=True)
+        )
+    if filter_domain:
+        stmt = stmt.where(
+            DocumentChunk.domain == bindparam("domain", filter_domain, literal_execute=True)
         )
+    return stmt
 
-        if len(filtered) >= top_k:
-            break
 
-    return filtered
+def _with_documents(ranked: Any, score: Any) -> Select:
+    """Join document metadata onto a ranked chunk subquery."""
+
+    return select(
+        ranked.c.chunk_id,
+        ranked.c.content,
+        ranked.c.language,
+        ranked.c.article_number,
+        ranked.c.chunk_metadata,
+        LegalDocument.id.label("document_id"),
+        LegalDocument.title,
+        LegalDocument.title_ar,
+        LegalDocument.domain,
+        LegalDocument.language.label("document_language"),
+        LegalDocument.official_ref,
+        LegalDocument.publication_date,
+        LegalDocument.metadata.label("document_metadata"),
+        score,
+    ).join(LegalDocument, ranked.c.document_id == LegalDocument.id)
+
+
+def _row_to_document(
+    row: Any,
+    *,
+    similarity: Optional[float] = None,
+    text_rank: Optional[float] = None,
+) -> Dict[str, Any]:
+    return {
+        "chunk_id": row["chunk_id"],
+        "content": row["content"],
+        "language": row["language"],
+        "article_number": row["article_number"],
+        "similarity": similarity,
+        "text_rank": text_rank,
+        "metadata": row["chunk_metadata"] or {},
+        "document": {
+            "id": row["document_id"],
+            "title": row["title"],
+            "title_ar": row["title_ar"],
+            "domain": row["domain"],
+            "language": row["document_language"],
+            "official_ref": row["official_ref"],
+            "publication_date": row["publication_date"],
+            "metadata": row["document_metadata"] or {},
+        },
+    }
 
 
 async def generate_query_embedding(query: str) -> List[float]:
-    """Generate embedding vector for query using OpenAI."""
+    """Generate embedding vector for query using OpenAI (cached by normalized query)."""
+
+    cached = await embedding_cache.get(query)
+    if cached is not None:
+        return cached
+
+    stored = embedding_store.get(query) if embedding_store is not None else None
+    if stored is not None:
+        await embedding_cache.set(query, stored)
+        return stored
 
     try:
-        client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        client = get_openai_client()
+        embed_start = perf_counter()
         response = await client.embeddings.create(
             model=settings.OPENAI_EMBEDDING_MODEL,
             input=query,
+            dimensions=settings.VECTOR_DIMENSION,
         )
-        return response.data[0].embedding
+        embedding_cache.record_api_call((perf_counter() - embed_start) * 1000)
+        embedding = response.data[0].embedding
 
     except Exception as exc:
         logger.error(f"Embedding generation error: {exc}")
         raise
+
+    await embedding_cache.set(query, embedding)
+    return embedding
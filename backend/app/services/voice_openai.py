@@ -3,16 +3,29 @@ Voice services using 100% OpenAI (Whisper STT + TTS-1-HD)
 Production-ready implementation for government deployment
 """
 
-from typing import Tuple, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Tuple, Optional
+from collections import OrderedDict, deque
 from io import BytesIO
+from time import monotonic
+import asyncio
 import hashlib
+import re
 from loguru import logger
 import openai
-from pydub import AudioSegment
 
 from app.core.config import settings
+from app.core.openai_client import get_openai_client
+from app.services.audio_format import WHISPER_FFMPEG_ARGS, is_whisper_ready, probe_audio
+from app.services.audio_store import open_audio_store
+from app.services.audio_transcoder import audio_transcoder
 
 
+# High-quality model for government-grade output
+TTS_MODEL = "tts-1-hd"
+
+# Sentence boundary in Arabic or French text (punctuation stays with its sentence)
+_SENTENCE_END = re.compile(r"(?<=[.!?؟])\s+")
+
 # Voice selection optimized for Moroccan users
 VOICE_PROFILES = {
     "ar": {
@@ -32,75 +45,196 @@ VOICE_PROFILES = {
 
 class VoiceCache:
     """
-    Simple in-memory cache for TTS responses.
-    In production, use Redis with TTL for better performance.
-    """
+    In-process LRU of synthesized audio, bounded by total bytes.
 
-    def __init__(self):
-        self.tts_cache = {}
+    Entries expire after ``ttl`` seconds. Concurrent misses for the same
+    text, voice, speed and model share one in-flight synthesis instead of
+    each calling the TTS API.
+    """
 
-    def get_cache_key(self, text: str, voice: str, speed: float) -> str:
+    def __init__(self, *, max_bytes: int, ttl: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._in_flight: Dict[str, "asyncio.Task[bytes]"] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.oversized = 0
+
+    def get_cache_key(self, text: str, voice: str, speed: float, model: str = TTS_MODEL) -> str:
         """Generate cache key for TTS request."""
-        key = f"{text}:{voice}:{speed}"
+        key = f"{model}:{text}:{voice}:{speed}"
         return hashlib.sha256(key.encode()).hexdigest()
 
-    def get(self, text: str, voice: str, speed: float) -> Optional[bytes]:
+    def get(self, text: str, voice: str, speed: float, model: str = TTS_MODEL) -> Optional[bytes]:
         """Retrieve cached audio."""
-        cache_key = self.get_cache_key(text, voice, speed)
-        return self.tts_cache.get(cache_key)
+        if not self.enabled:
+            return None
+        audio = self._lookup(self.get_cache_key(text, voice, speed, model))
+        if audio is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return audio
 
-    def set(self, text: str, voice: str, speed: float, audio: bytes):
+    def set(self, text: str, voice: str, speed: float, audio: bytes, model: str = TTS_MODEL):
         """Store audio in cache."""
-        cache_key = self.get_cache_key(text, voice, speed)
-        # Limit cache size to 1000 entries
-        if len(self.tts_cache) > 1000:
-            # Remove oldest entry
-            self.tts_cache.pop(next(iter(self.tts_cache)))
-        self.tts_cache[cache_key] = audio
+        if self.enabled:
+            self._remember(self.get_cache_key(text, voice, speed, model), audio)
+
+    async def get_or_synthesize(
+        self,
+        text: str,
+        voice: str,
+        speed: float,
+        synthesize: Callable[[], Awaitable[bytes]],
+        model: str = TTS_MODEL,
+    ) -> bytes:
+        """Cached audio, or the result of ``synthesize()`` shared by concurrent callers."""
+        if not self.enabled:
+            return await synthesize()
+
+        cache_key = self.get_cache_key(text, voice, speed, model)
+        audio = self._lookup(cache_key)
+        if audio is not None:
+            self.hits += 1
+            return audio
+
+        task = self._in_flight.get(cache_key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._fill(cache_key, synthesize))
+            self._in_flight[cache_key] = task
+            task.add_done_callback(lambda done: self._settle(cache_key, done))
+        else:
+            self.coalesced += 1
+
+        # A caller going away must not cancel the synthesis others are waiting on
+        return await asyncio.shield(task)
+
+    async def _fill(self, cache_key: str, synthesize: Callable[[], Awaitable[bytes]]) -> bytes:
+        audio = await synthesize()
+        self._remember(cache_key, audio)
+        return audio
+
+    def _settle(self, cache_key: str, task: "asyncio.Task[bytes]") -> None:
+        self._in_flight.pop(cache_key, None)
+        # Mark a failure as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def _lookup(self, cache_key: str) -> Optional[bytes]:
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, audio = entry
+        if expires_at <= monotonic():
+            self._drop(cache_key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(cache_key)
+        return audio
+
+    def _remember(self, cache_key: str, audio: bytes) -> None:
+        if len(audio) > self.max_bytes:
+            self.oversized += 1
+            return
+        if cache_key in self._entries:
+            self._drop(cache_key)
+        self._entries[cache_key] = (monotonic() + self.ttl, audio)
+        self.bytes += len(audio)
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, cache_key: str) -> None:
+        _, audio = self._entries.pop(cache_key)
+        self.bytes -= len(audio)
+
+    def clear(self) -> None:
+        """Drop every entry (in-flight syntheses still complete)."""
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and memory use."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "size_mb": round(self.bytes / 1_048_576, 2),
+            "max_mb": round(self.max_bytes / 1_048_576, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "oversized": self.oversized,
+            "in_flight": len(self._in_flight),
+        }
 
 
 # Global cache instance
-voice_cache = VoiceCache()
+voice_cache = VoiceCache(
+    max_bytes=settings.TTS_CACHE_MAX_BYTES,
+    ttl=settings.TTS_CACHE_TTL,
+    enabled=settings.TTS_CACHE_ENABLED,
+)
 
+# Synthesized audio persisted across restarts, shared by workers
+audio_store = open_audio_store(settings.AUDIO_STORE_PATH)
 
-def optimize_audio_for_whisper(audio_data: bytes) -> Tuple[bytes, str]:
+
+async def optimize_audio_for_whisper(audio_data: bytes) -> Tuple[bytes, str]:
     """
     Optimize audio for Whisper API to reduce costs while maintaining quality.
 
     Whisper optimal settings:
     - 16kHz sample rate (sufficient for voice)
     - Mono channel
-    - 16-bit depth
     - WebM Opus format (best compression)
 
+    A header probe (see audio_format) sends uploads that are already mono
+    Opus at or below WHISPER_PASSTHROUGH_MAX_BITRATE unchanged, such as the
+    browser recorder's WebM. Anything else is transcoded in an ffmpeg
+    subprocess fed through pipes (see audio_transcoder), so it never blocks
+    the event loop.
+
     Returns:
         Tuple of (optimized_audio_bytes, format)
     """
-    try:
-        # Load audio
-        audio = AudioSegment.from_file(BytesIO(audio_data))
-
-        # Apply Whisper-optimal settings
-        audio = audio.set_frame_rate(16000)  # 16kHz
-        audio = audio.set_channels(1)         # Mono
-        audio = audio.set_sample_width(2)     # 16-bit
-
-        # Export as WebM Opus with optimized bitrate
-        output = BytesIO()
-        audio.export(
-            output,
-            format="webm",
-            codec="libopus",
-            bitrate="24k",  # 24kbps is ideal for voice
+    info = probe_audio(audio_data)
+    original_format = "ogg" if info is not None and info.container == "ogg" else "webm"
+    if is_whisper_ready(info, settings.WHISPER_PASSTHROUGH_MAX_BITRATE):
+        audio_transcoder.record_passthrough()
+        logger.info(
+            f"Audio already optimal ({info.codec}/{info.container}, {info.channels} ch, "
+            f"{info.bitrate / 1000:.1f} kbps): skipping transcode"
         )
+        return audio_data, original_format
 
-        optimized_data = output.getvalue()
+    try:
+        optimized_data = await audio_transcoder.transcode(audio_data, WHISPER_FFMPEG_ARGS)
 
         # Log compression ratio
         original_size = len(audio_data)
         optimized_size = len(optimized_data)
         compression_ratio = (1 - optimized_size / original_size) * 100
 
+        if optimized_size >= original_size:
+            logger.info(
+                f"Audio transcode did not shrink the upload ({original_size} → {optimized_size} bytes). "
+                f"Using original audio."
+            )
+            return audio_data, original_format
+
         logger.info(
             f"Audio optimized: {original_size} → {optimized_size} bytes "
             f"({compression_ratio:.1f}% reduction)"
@@ -111,7 +245,7 @@ def optimize_audio_for_whisper(audio_data: bytes) -> Tuple[bytes, str]:
     except Exception as e:
         logger.warning(f"Audio optimization failed: {e}. Using original audio.")
         # Fallback to original audio
-        return audio_data, "webm"
+        return audio_data, original_format
 
 
 async def transcribe_audio(
@@ -143,12 +277,12 @@ async def transcribe_audio(
 
         # Optimize audio to reduce API costs
         if optimize:
-            audio_data, audio_format = optimize_audio_for_whisper(audio_data)
+            audio_data, audio_format = await optimize_audio_for_whisper(audio_data)
         else:
             audio_format = "webm"
 
-        # Initialize OpenAI client
-        client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        # Shared, pooled OpenAI client
+        client = get_openai_client()
 
         # Whisper automatically detects language but we provide a hint
         language_code = "ar" if language == "ar" else "fr"
@@ -186,6 +320,57 @@ async def transcribe_audio(
         raise
 
 
+def select_voice(language: str = "ar", voice: str = "default") -> str:
+    """OpenAI voice for a language and voice profile (default/male/female/neutral)."""
+    voice_profiles = VOICE_PROFILES.get(language, VOICE_PROFILES["ar"])
+    return voice_profiles.get(voice, voice_profiles["default"])
+
+
+def speech_key(text: str, language: str = "ar", voice: str = "default", speed: float = 1.0) -> str:
+    """Content address of the audio ``synthesize_speech`` produces for these arguments."""
+    return voice_cache.get_cache_key(text, select_voice(language, voice), speed)
+
+
+async def _request_speech(text: str, selected_voice: str, speed: float) -> bytes:
+    """One TTS-1-HD call returning MP3 bytes."""
+    # Shared, pooled OpenAI client
+    client = get_openai_client()
+
+    # Generate speech with TTS-1-HD (higher quality than TTS-1)
+    response = await client.audio.speech.create(
+        model=TTS_MODEL,
+        voice=selected_voice,
+        input=text,
+        speed=speed,
+        response_format="mp3",  # MP3 for broad compatibility
+    )
+    return response.content
+
+
+async def _synthesize_bytes(text: str, selected_voice: str, speed: float, use_cache: bool) -> bytes:
+    """MP3 bytes from the memory cache, the audio store or TTS-1-HD, in that order."""
+    if not use_cache:
+        return await _request_speech(text, selected_voice, speed)
+
+    async def synthesize() -> bytes:
+        cache_key = voice_cache.get_cache_key(text, selected_voice, speed)
+        if audio_store is not None:
+            stored = await asyncio.to_thread(audio_store.read, cache_key)
+            if stored is not None:
+                return stored
+
+        audio = await _request_speech(text, selected_voice, speed)
+        if audio_store is not None:
+            try:
+                await asyncio.to_thread(audio_store.put, cache_key, audio)
+            except OSError as exc:
+                logger.warning(f"Could not persist TTS audio {cache_key}: {exc}")
+        return audio
+
+    # Cached audio, or one synthesis shared by concurrent identical requests
+    return await voice_cache.get_or_synthesize(text, selected_voice, speed, synthesize)
+
+
 async def synthesize_speech(
     text: str,
     language: str = "ar",
@@ -221,37 +406,8 @@ async def synthesize_speech(
     try:
         logger.info(f"Synthesizing speech with TTS-1-HD (language: {language})")
 
-        # Select appropriate voice for language
-        voice_profiles = VOICE_PROFILES.get(language, VOICE_PROFILES["ar"])
-        selected_voice = voice_profiles.get(voice, voice_profiles["default"])
-
-        # Check cache first
-        if use_cache:
-            cached_audio = voice_cache.get(text, selected_voice, speed)
-            if cached_audio:
-                logger.info("Using cached TTS audio")
-                audio_stream = BytesIO(cached_audio)
-                audio_stream.seek(0)
-                return audio_stream
-
-        # Initialize OpenAI client
-        client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-
-        # Generate speech with TTS-1-HD (higher quality than TTS-1)
-        response = await client.audio.speech.create(
-            model="tts-1-hd",  # High-quality model for government-grade output
-            voice=selected_voice,
-            input=text,
-            speed=speed,
-            response_format="mp3",  # MP3 for broad compatibility
-        )
-
-        # Get audio content
-        audio_content = response.content
-
-        # Cache for future use
-        if use_cache:
-            voice_cache.set(text, selected_voice, speed, audio_content)
+        selected_voice = select_voice(language, voice)
+        audio_content = await _synthesize_bytes(text, selected_voice, speed, use_cache)
 
         # Return as stream
         audio_stream = BytesIO(audio_content)
@@ -272,40 +428,72 @@ async def synthesize_speech(
         raise
 
 
-async def synthesize_speech_streaming(text: str, language: str = "ar", voice: str = "default", speed: float = 1.0):
+def split_sentences(text: str, min_chars: int = 0) -> List[str]:
     """
-    Stream TTS for long responses (>500 characters).
+    Split text into sentences (Arabic and French), keeping their punctuation.
 
-    Splits text into sentences and yields audio chunks progressively.
-    Provides better UX for long legal answers.
+    Consecutive sentences shorter than ``min_chars`` are joined, so
+    abbreviations ("Art. 5") and short clauses do not each cost a TTS call.
+    """
+    segments: List[str] = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if segments and len(segments[-1]) < min_chars:
+            segments[-1] = f"{segments[-1]} {sentence}"
+        else:
+            segments.append(sentence)
+    return segments
 
-    Yields:
-        BytesIO: Audio chunks as they're generated
+
+async def synthesize_speech_streaming(
+    text: str,
+    language: str = "ar",
+    voice: str = "default",
+    speed: float = 1.0,
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[bytes]:
     """
-    import re
+    Stream TTS for long responses (>500 characters).
 
-    # Split into sentences (Arabic and French)
-    sentence_pattern = r'[.!?؟]+\s+'
-    sentences = re.split(sentence_pattern, text)
+    Splits text into sentences and synthesizes up to ``concurrency`` of them
+    at once, yielding MP3 audio in sentence order as soon as each is ready,
+    so playback starts after the first sentence instead of the whole answer.
+    Sentences go through the same cache and audio store as synthesize_speech.
 
-    logger.info(f"Streaming TTS for {len(sentences)} sentences")
+    Yields:
+        bytes: MP3 audio of consecutive sentences (concatenable frames)
+    """
+    sentences = split_sentences(text, settings.TTS_STREAM_MIN_CHARS)
+    selected_voice = select_voice(language, voice)
+    concurrency = max(1, concurrency or settings.TTS_STREAM_CONCURRENCY)
 
-    for i, sentence in enumerate(sentences):
-        if not sentence.strip():
-            continue
+    logger.info(f"Streaming TTS for {len(sentences)} sentences ({concurrency} concurrent)")
 
-        logger.debug(f"Synthesizing sentence {i+1}/{len(sentences)}")
+    remaining = iter(sentences)
+    pending: Deque["asyncio.Task[bytes]"] = deque()
 
-        # Generate audio for this sentence
-        audio_chunk = await synthesize_speech(
-            text=sentence.strip(),
-            language=language,
-            voice=voice,
-            speed=speed,
-            use_cache=True,
-        )
+    def schedule_next() -> None:
+        sentence = next(remaining, None)
+        if sentence is not None:
+            pending.append(asyncio.create_task(_synthesize_bytes(sentence, selected_voice, speed, True)))
 
-        yield audio_chunk
+    try:
+        for _ in range(concurrency):
+            schedule_next()
+
+        index = 0
+        while pending:
+            audio_chunk = await pending.popleft()
+            schedule_next()
+            index += 1
+            logger.debug(f"Streaming sentence {index}/{len(sentences)}: {len(audio_chunk)} bytes")
+            yield audio_chunk
+    finally:
+        # Client went away or a sentence failed: stop the look-ahead
+        for task in pending:
+            task.cancel()
 
 
 async def detect_language_from_audio(audio_data: bytes) -> str:
@@ -318,7 +506,7 @@ async def detect_language_from_audio(audio_data: bytes) -> str:
         Language code ("ar" or "fr")
     """
     try:
-        client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        client = get_openai_client()
 
         # Transcribe without language hint
         response = await client.audio.transcriptions.create(
@@ -359,8 +547,7 @@ def get_available_voices(language: Optional[str] = None) -> dict:
 
 def clear_voice_cache():
     """Clear the TTS cache (useful for testing)."""
-    global voice_cache
-    voice_cache = VoiceCache()
+    voice_cache.clear()
     logger.info("Voice cache cleared")
 
 
@@ -13,6 +13,14 @@ import sys
 from app.api import chat, voice, documents
 from app.core.config import settings
 from app.core.database import init_db
+from app.core.openai_client import openai_provider
+from app.core.redis import close_redis
+from app.services.analytics import analytics_writer
+from app.services.answer_cache import answer_cache
+from app.services.embedding_cache import embedding_cache, embedding_store
+from app.services.audio_transcoder import audio_transcoder
+from app.services.rate_limit import usage_limiter
+from app.services.voice_openai import audio_store, voice_cache
 
 # Configure logging
 logger.remove()
@@ -35,8 +43,13 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting Mo7ami Backend API")
     await init_db()
     logger.info("✅ Database initialized")
+    openai_provider.start()
+    analytics_writer.start()
     yield
     logger.info("👋 Shutting down Mo7ami Backend API")
+    await analytics_writer.stop()
+    await openai_provider.close()
+    await close_redis()
 
 
 # Initialize FastAPI app
@@ -82,6 +95,22 @@ async def health_check():
     )
 
 
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for connection pools and caches."""
+    return {
+        "openai_pool": openai_provider.metrics(),
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_store": embedding_store.stats() if embedding_store is not None else None,
+        "answer_cache": answer_cache.stats(),
+        "tts_cache": voice_cache.stats(),
+        "audio_store": audio_store.stats() if audio_store is not None else None,
+        "audio_transcoder": audio_transcoder.stats(),
+        "rate_limit": usage_limiter.stats(),
+        "analytics": analytics_writer.stats(),
+    }
+
+
 # Include routers
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["Chat"])
 app.include_router(voice.router, prefix="/api/v1/voice", tags=["Voice"])
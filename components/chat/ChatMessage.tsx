@@ -19,6 +19,7 @@ interface Message {
   language: Language;
   citations?: Citation[];
   timestamp: Date;
+  messageId?: string; // server id of a stored assistant message
 }
 
 interface ChatMessageProps {
@@ -76,6 +77,7 @@ export function ChatMessage({ message }: ChatMessageProps) {
               <AudioPlayer
                 text={message.content}
                 language={message.language}
+                messageId={message.messageId}
               />
             )}
           </div>
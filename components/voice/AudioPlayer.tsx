@@ -10,12 +10,17 @@ interface AudioPlayerProps {
   text: string;
   language: Language;
   autoPlay?: boolean;
+  messageId?: string; // stored assistant message: streamed and seekable, synthesized once
 }
 
+const VOICE = "female";
+const SPEED = 1.25; // 25% faster for quicker responses
+
 export function AudioPlayer({
   text,
   language,
   autoPlay = false,
+  messageId,
 }: AudioPlayerProps) {
   const [isPlaying, setIsPlaying] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
@@ -44,23 +49,34 @@ export function AudioPlayer({
     setError(null);
 
     try {
-      // Request TTS from backend with faster speed
-      const response = await axios.post(
-        `${process.env.NEXT_PUBLIC_API_URL}/api/v1/voice/synthesize`,
-        {
-          text,
-          language,
-          voice: "female",
-          speed: 1.25, // 25% faster for quicker responses
-        },
-        {
-          responseType: "blob",
-        }
-      );
+      let audioUrl: string;
+      let objectUrl: string | null = null;
 
-      // Create audio blob URL
-      const audioBlob = new Blob([response.data], { type: "audio/mpeg" });
-      const audioUrl = URL.createObjectURL(audioBlob);
+      if (messageId) {
+        // Served from the backend audio store with Range/ETag: the browser
+        // streams, seeks and replays it from its HTTP cache
+        const params = new URLSearchParams({ voice: VOICE, speed: String(SPEED) });
+        audioUrl = `${process.env.NEXT_PUBLIC_API_URL}/api/v1/voice/messages/${encodeURIComponent(messageId)}/audio?${params}`;
+      } else {
+        // Request TTS from backend with faster speed
+        const response = await axios.post(
+          `${process.env.NEXT_PUBLIC_API_URL}/api/v1/voice/synthesize`,
+          {
+            text,
+            language,
+            voice: VOICE,
+            speed: SPEED,
+          },
+          {
+            responseType: "blob",
+          }
+        );
+
+        // Create audio blob URL
+        const audioBlob = new Blob([response.data], { type: "audio/mpeg" });
+        objectUrl = URL.createObjectURL(audioBlob);
+        audioUrl = objectUrl;
+      }
 
       // Create and play audio
       const audio = new Audio(audioUrl);
@@ -73,7 +89,9 @@ export function AudioPlayer({
 
       audio.onended = () => {
         setIsPlaying(false);
-        URL.revokeObjectURL(audioUrl);
+        if (objectUrl) {
+          URL.revokeObjectURL(objectUrl);
+        }
       };
 
       audio.onerror = () => {
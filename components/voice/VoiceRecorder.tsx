@@ -72,7 +72,9 @@ export function VoiceRecorder({ onTranscript, language, disabled = false }: Voic
       const types = ["audio/webm;codecs=opus", "audio/webm", "audio/mp4"];
       const mimeType = types.find(t => MediaRecorder.isTypeSupported(t)) || "audio/webm";
 
-      const mediaRecorder = new MediaRecorder(stream, { mimeType });
+      // 24 kbps mono Opus is what the backend would transcode to anyway, so
+      // these uploads go to Whisper without re-encoding
+      const mediaRecorder = new MediaRecorder(stream, { mimeType, audioBitsPerSecond: 24000 });
       mediaRecorderRef.current = mediaRecorder;
 
       mediaRecorder.ondataavailable = (event) => {
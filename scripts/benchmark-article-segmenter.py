@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Article segmentation benchmark for Mo7ami
+Times the single-pass segmenter of extract-legal-text.py against the previous
+per-page, multi-pattern regex parser on the PDFs in backend/data/legal_docs
+
+Text is extracted once per PDF; only parsing is timed (best of --repeat runs).
+The previous parser compiled with re.MULTILINE, so its "$" lookahead ended
+every article at the first line break; "legacy" times it as it was, and
+"legacy (whole)" times the same patterns matching whole articles (DOTALL only),
+i.e. what the lazy lookahead scans cost once they return full articles.
+"""
+
+import argparse
+import importlib.util
+import json
+import re
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DATA_DIR = SCRIPTS_DIR.parent / "backend" / "data" / "legal_docs"
+
+# extract-legal-text.py is not importable by name (hyphenated)
+_spec = importlib.util.spec_from_file_location("extract_legal_text", SCRIPTS_DIR / "extract-legal-text.py")
+extract_legal_text = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(extract_legal_text)
+
+# Patterns of the previous parser, kept here for comparison only
+LEGACY_PATTERNS = {
+    'fr': [
+        r'Article\s+(\d+(?:\s*-\s*\d+)?)\s*:?\s*(.+?)(?=Article\s+\d+|$)',
+        r'Art\.\s*(\d+(?:\s*-\s*\d+)?)\s*:?\s*(.+?)(?=Art\.\s*\d+|$)',
+        r'Article\s+premier\s*:?\s*(.+?)(?=Article\s+\d+|$)',
+    ],
+    'ar': [
+        r'المادة\s+(\d+(?:\s*-\s*\d+)?)\s*:?\s*(.+?)(?=المادة\s+\d+|$)',
+        r'الفصل\s+(\d+(?:\s*-\s*\d+)?)\s*:?\s*(.+?)(?=الفصل\s+\d+|$)',
+        r'المادة\s+الأولى\s*:?\s*(.+?)(?=المادة\s+\d+|$)',
+    ],
+}
+
+
+def legacy_segments(text: str, language: str, flags: int = re.DOTALL | re.MULTILINE) -> List[str]:
+    """Article contents as the previous parser found them (per page, per pattern)"""
+    contents = []
+    for page_text in text.split('--- Page'):
+        if not page_text.strip():
+            continue
+        for pattern in LEGACY_PATTERNS.get(language, LEGACY_PATTERNS['fr']):
+            for match in re.finditer(pattern, page_text, flags):
+                contents.append(match.group(match.lastindex).strip())
+    return contents
+
+
+def best_of(repeat: int, parse: Callable[[], List]) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        segments = parse()
+        timings.append(perf_counter() - started)
+    return {"ms": min(timings) * 1000, "segments": segments}
+
+
+def main(repeat: int) -> bool:
+    metadata_path = DATA_DIR / "metadata.json"
+    if not metadata_path.exists():
+        print(f"❌ Metadata file not found: {metadata_path}")
+        return False
+
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        all_metadata = json.load(f)
+
+    extractor = extract_legal_text.LegalTextExtractor()
+    print(f"{'document':<26} {'pages':>5} {'chars':>7} │ {'legacy ms':>9} {'articles':>8} {'avg len':>7} │ "
+          f"{'legacy (whole) ms':>17} {'avg len':>7} │ {'single-pass ms':>14} {'articles':>8} {'avg len':>7} │ "
+          f"{'vs whole':>8}")
+
+    total_legacy = total_whole = total_single = 0.0
+    for doc_id, metadata in all_metadata.items():
+        pdf_path = DATA_DIR / metadata['filename']
+        if not pdf_path.exists():
+            continue
+
+        text = extractor.extract_text_from_pdf(pdf_path)
+        language = extractor.detect_language(text)
+        pages = text.count('\n--- Page ')
+
+        legacy = best_of(repeat, lambda: legacy_segments(text, language))
+        whole = best_of(repeat, lambda: legacy_segments(text, language, flags=re.DOTALL))
+        single = best_of(repeat, lambda: list(extractor.segment_articles(text, language)))
+        total_legacy += legacy["ms"]
+        total_whole += whole["ms"]
+        total_single += single["ms"]
+
+        legacy_lengths = [len(content) for content in legacy["segments"]]
+        whole_lengths = [len(content) for content in whole["segments"]]
+        single_lengths = [len(content) for _, content, _ in single["segments"]]
+        print(
+            f"{doc_id:<26} {pages:>5} {len(text):>7} │ "
+            f"{legacy['ms']:>9.1f} {len(legacy_lengths):>8} {_mean(legacy_lengths):>7.0f} │ "
+            f"{whole['ms']:>17.1f} {_mean(whole_lengths):>7.0f} │ "
+            f"{single['ms']:>14.1f} {len(single_lengths):>8} {_mean(single_lengths):>7.0f} │ "
+            f"{whole['ms'] / max(single['ms'], 1e-6):>7.1f}x"
+        )
+
+    print(f"\nTotal parse time: legacy {total_legacy:.1f} ms (first line of each article only), "
+          f"legacy (whole) {total_whole:.1f} ms, single-pass {total_single:.1f} ms "
+          f"({total_whole / max(total_single, 1e-6):.1f}x faster than whole-article legacy)")
+    return True
+
+
+def _mean(values: List[int]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark article segmentation on the legal PDFs")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per document (best is reported)")
+    args = parser.parse_args()
+    sys.exit(0 if main(max(1, args.repeat)) else 1)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Whisper upload fast-path benchmark for Mo7ami
+Measures the CPU time the codec probe in backend/app/services/audio_format.py
+saves by sending already-compact mono Opus uploads to Whisper unchanged,
+instead of always re-encoding them with ffmpeg
+
+Clips are generated with ffmpeg (recorder-like WebM/Ogg Opus, browser-default
+bitrate, stereo, WAV and MP3 uploads) unless --clips points at real recordings.
+For each clip, probe and transcode are timed (best of --repeat); transcode CPU
+is ffmpeg's own user+system time, read from the child rusage.
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter, process_time
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+BACKEND_DIR = ROOT_DIR / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.audio_format import WHISPER_FFMPEG_ARGS, is_whisper_ready, probe_audio  # noqa: E402
+
+FFMPEG = os.getenv("FFMPEG_BINARY", "ffmpeg")
+PASSTHROUGH_MAX_BITRATE = int(os.getenv("WHISPER_PASSTHROUGH_MAX_BITRATE", "32000"))
+
+# Generated clips: output arguments per file (speech-band tone plus pink noise)
+SAMPLE_CLIPS = {
+    "recorder.webm": ["-ac", "1", "-c:a", "libopus", "-b:a", "24k", "-f", "webm"],
+    "recorder.ogg": ["-ac", "1", "-c:a", "libopus", "-b:a", "24k", "-f", "ogg"],
+    "browser-default.webm": ["-ac", "1", "-c:a", "libopus", "-b:a", "128k", "-f", "webm"],
+    "stereo.webm": ["-ac", "2", "-c:a", "libopus", "-b:a", "64k", "-f", "webm"],
+    "upload.wav": ["-ac", "2", "-ar", "44100", "-c:a", "pcm_s16le", "-f", "wav"],
+    "upload.mp3": ["-ac", "1", "-ar", "44100", "-c:a", "libmp3lame", "-b:a", "128k", "-f", "mp3"],
+}
+
+
+def generate_clips(output_dir: Path, duration: float) -> List[Path]:
+    source = (
+        f"sine=frequency=220:sample_rate=48000:duration={duration}[tone];"
+        f"anoisesrc=color=pink:amplitude=0.05:sample_rate=48000:duration={duration}[noise];"
+        f"[tone][noise]amix=inputs=2"
+    )
+    paths = []
+    for name, output_args in SAMPLE_CLIPS.items():
+        path = output_dir / name
+        subprocess.run(
+            [FFMPEG, "-hide_banner", "-loglevel", "error", "-y", "-filter_complex", source, *output_args, str(path)],
+            check=True,
+        )
+        paths.append(path)
+    return paths
+
+
+def child_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def time_transcode(data: bytes, repeat: int) -> Dict:
+    """Best-of-``repeat`` ffmpeg CPU and wall time for the Whisper transcode"""
+    cpu_times, wall_times = [], []
+    output = b""
+    for _ in range(repeat):
+        cpu_before, started = child_cpu(), perf_counter()
+        output = subprocess.run(
+            [FFMPEG, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", *WHISPER_FFMPEG_ARGS, "pipe:1"],
+            input=data,
+            capture_output=True,
+            check=True,
+        ).stdout
+        wall_times.append(perf_counter() - started)
+        cpu_times.append(child_cpu() - cpu_before)
+    return {"cpu_ms": min(cpu_times) * 1000, "wall_ms": min(wall_times) * 1000, "size": len(output)}
+
+
+def time_probe(data: bytes, repeat: int) -> Dict:
+    """Best-of-``repeat`` CPU time of the header probe (repeated to get above timer resolution)"""
+    rounds = 100
+    timings = []
+    info = None
+    for _ in range(repeat):
+        started = process_time()
+        for _ in range(rounds):
+            info = probe_audio(data)
+        timings.append((process_time() - started) / rounds)
+    return {"cpu_ms": min(timings) * 1000, "info": info}
+
+
+def main(clips_dir: Path, duration: float, repeat: int) -> bool:
+    if shutil.which(FFMPEG) is None:
+        print(f"❌ ffmpeg not found ({FFMPEG}); install it or set FFMPEG_BINARY")
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if clips_dir is not None:
+            paths = sorted(path for path in clips_dir.iterdir() if path.is_file())
+        else:
+            print(f"🎙️  Generating {len(SAMPLE_CLIPS)} sample clips of {duration:.0f}s")
+            paths = generate_clips(Path(tmp), duration)
+
+        print(f"{'clip':<24} {'bytes':>8} │ {'codec':<7} {'ch':>2} {'kbps':>6} {'probe ms':>8} │ "
+              f"{'ffmpeg cpu ms':>13} {'wall ms':>8} {'out bytes':>9} │ {'fast path':<10}")
+
+        always_cpu = fast_cpu = 0.0
+        passthrough = 0
+        for path in paths:
+            data = path.read_bytes()
+            probe = time_probe(data, repeat)
+            transcode = time_transcode(data, repeat)
+            info = probe["info"]
+            ready = is_whisper_ready(info, PASSTHROUGH_MAX_BITRATE)
+
+            always_cpu += transcode["cpu_ms"]
+            fast_cpu += probe["cpu_ms"] + (0.0 if ready else transcode["cpu_ms"])
+            passthrough += ready
+
+            codec = (info.codec if info else None) or "-"
+            channels = info.channels if info and info.channels else "-"
+            kbps = f"{info.bitrate / 1000:.1f}" if info and info.bitrate else "-"
+            print(
+                f"{path.name:<24} {len(data):>8} │ {codec:<7} {channels:>2} {kbps:>6} {probe['cpu_ms']:>8.3f} │ "
+                f"{transcode['cpu_ms']:>13.1f} {transcode['wall_ms']:>8.1f} {transcode['size']:>9} │ "
+                f"{'send as-is' if ready else 'transcode':<10}"
+            )
+
+    saved = always_cpu - fast_cpu
+    print(f"\n{passthrough}/{len(paths)} clips skip ffmpeg (mono Opus ≤ {PASSTHROUGH_MAX_BITRATE / 1000:.0f} kbps)")
+    print(f"CPU: always transcode {always_cpu:.1f} ms, with probe fast path {fast_cpu:.1f} ms "
+          f"({saved:.1f} ms saved, {saved / max(always_cpu, 1e-9) * 100:.0f}%)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Whisper upload codec-probe fast path")
+    parser.add_argument("--clips", type=Path, default=None, help="directory of recordings (default: generate samples)")
+    parser.add_argument("--duration", type=float, default=15.0, help="length of generated clips in seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per clip (best is reported)")
+    args = parser.parse_args()
+    sys.exit(0 if main(args.clips, args.duration, max(1, args.repeat)) else 1)
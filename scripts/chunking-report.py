@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Chunking report for Mo7ami
+Compares the token-budgeted chunker with the previous 500-character sentence
+splitter on the processed corpus (backend/data/processed), without calling
+OpenAI or touching the database
+
+Per document and in total: chunk count, embedded tokens, chunk size spread,
+tiny chunks, vector index size (chunks x dimensions x float32) and embedding
+cost, with the token chunker's delta against the sentence splitter.
+"""
+
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import tiktoken
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPTS_DIR.parent / "backend"
+PROCESSED_DIR = BACKEND_DIR / "data" / "processed"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.ingestion.chunker import make_chunker  # noqa: E402
+from app.ingestion.corpus import iter_articles, load_manifest  # noqa: E402
+
+# ingest-to-database.py is not importable by name (hyphenated); only its settings are used
+_spec = importlib.util.spec_from_file_location("ingest_to_database", SCRIPTS_DIR / "ingest-to-database.py")
+ingest_to_database = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(ingest_to_database)
+
+EMBEDDING_MODEL = ingest_to_database.EMBEDDING_MODEL
+EMBEDDING_DIMENSIONS = ingest_to_database.EMBEDDING_DIMENSIONS
+EMBEDDING_PRICE_PER_MILLION = 0.13  # USD per 1M input tokens, text-embedding-3-large
+TINY_CHUNK_TOKENS = 50
+
+
+def chunk_stats(chunker, articles_path: Path) -> Dict:
+    """Size distribution of the chunks one chunker makes of a document"""
+    sizes = [chunk.token_count for chunk in chunker.chunk_articles(iter_articles(articles_path))]
+    tokens = sum(sizes)
+    return {
+        "chunks": len(sizes),
+        "tokens": tokens,
+        "avg": tokens / len(sizes) if sizes else 0.0,
+        "min": min(sizes, default=0),
+        "max": max(sizes, default=0),
+        "tiny": sum(1 for size in sizes if size < TINY_CHUNK_TOKENS),
+    }
+
+
+def index_mb(chunks: int) -> float:
+    return chunks * EMBEDDING_DIMENSIONS * 4 / 1_048_576
+
+
+def cost(tokens: int) -> float:
+    return tokens * EMBEDDING_PRICE_PER_MILLION / 1_000_000
+
+
+def delta(new: float, old: float) -> str:
+    return f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+
+
+def main(max_tokens: int, overlap: int, merge_below: int) -> bool:
+    manifest = load_manifest(PROCESSED_DIR)
+    if manifest is None:
+        print(f"❌ No processed corpus in {PROCESSED_DIR}")
+        print("   Run extract-legal-text.py first")
+        return False
+
+    try:
+        encoding = tiktoken.encoding_for_model(EMBEDDING_MODEL)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+
+    chunkers = {
+        "sentence": make_chunker("sentence", encoding=encoding),
+        "token": make_chunker(
+            "token",
+            encoding=encoding,
+            max_tokens=max_tokens,
+            overlap_tokens=overlap,
+            merge_below_tokens=merge_below,
+        ),
+    }
+
+    print(f"Token chunker: max {max_tokens} tokens, overlap {overlap}, merge below {merge_below}\n")
+    print(f"{'document':<26} │ {'chunker':<8} {'chunks':>6} {'tokens':>8} {'avg':>5} {'min':>4} {'max':>4} "
+          f"{'<' + str(TINY_CHUNK_TOKENS):>4} │ {'chunks Δ':>8} {'tokens Δ':>8}")
+
+    totals: Dict[str, Dict[str, int]] = {name: {"chunks": 0, "tokens": 0, "tiny": 0} for name in chunkers}
+    for entry in manifest["documents"]:
+        if not entry.get("success"):
+            continue
+        articles_path = PROCESSED_DIR / entry["articles_file"]
+        if not articles_path.exists():
+            print(f"⚠️  Missing articles file: {articles_path}")
+            continue
+
+        stats: List[Dict] = []
+        for name, chunker in chunkers.items():
+            result = chunk_stats(chunker, articles_path)
+            stats.append(result)
+            for key in totals[name]:
+                totals[name][key] += result[key]
+
+        for name, result in zip(chunkers, stats):
+            deltas = ""
+            if name == "token":
+                deltas = f"{delta(result['chunks'], stats[0]['chunks']):>8} {delta(result['tokens'], stats[0]['tokens']):>8}"
+            label = entry["doc_id"] if name == "sentence" else ""
+            print(f"{label:<26} │ {name:<8} {result['chunks']:>6} {result['tokens']:>8} {result['avg']:>5.0f} "
+                  f"{result['min']:>4} {result['max']:>4} {result['tiny']:>4} │ {deltas}")
+
+    old, new = totals["sentence"], totals["token"]
+    print(f"\n{'':<10} {'sentence':>12} {'token':>12} {'delta':>8}")
+    rows = [
+        ("chunks", old["chunks"], new["chunks"], "{:>12,}"),
+        (f"<{TINY_CHUNK_TOKENS} tokens", old["tiny"], new["tiny"], "{:>12,}"),
+        ("tokens", old["tokens"], new["tokens"], "{:>12,}"),
+        ("index MB", index_mb(old["chunks"]), index_mb(new["chunks"]), "{:>12.1f}"),
+        ("cost USD", cost(old["tokens"]), cost(new["tokens"]), "{:>12.4f}"),
+    ]
+    for label, before, after, fmt in rows:
+        print(f"{label:<10} {fmt.format(before)} {fmt.format(after)} {delta(after, before):>8}")
+    print(f"\nIndex size counts {EMBEDDING_DIMENSIONS}-dim float32 vectors only; "
+          f"cost is at ${EMBEDDING_PRICE_PER_MILLION}/1M tokens ({EMBEDDING_MODEL})")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare chunkers on the processed legal corpus")
+    parser.add_argument("--max-tokens", type=int, default=ingest_to_database.CHUNK_MAX_TOKENS)
+    parser.add_argument("--overlap", type=int, default=ingest_to_database.CHUNK_OVERLAP_TOKENS)
+    parser.add_argument("--merge-below", type=int, default=ingest_to_database.CHUNK_MERGE_BELOW_TOKENS)
+    args = parser.parse_args()
+    sys.exit(0 if main(args.max_tokens, args.overlap, args.merge_below) else 1)
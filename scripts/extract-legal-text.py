@@ -3,16 +3,61 @@
 Legal Text Extractor for Mo7ami
 Extracts and parses legal text from downloaded PDFs
 Handles both Arabic and French legal documents
+
+With --workers > 1, extraction runs on a process pool: every PDF is split into
+page ranges extracted in parallel (each worker opens the file itself, as
+PyMuPDF documents cannot be shared across processes), and each document is
+parsed into articles as soon as all of its pages are in.
+
+Articles are streamed to backend/data/processed/{doc_id}.jsonl (one article
+per line) as they are parsed, and manifest.json lists the documents (see
+backend/app/ingestion/corpus.py).
 """
 
+import os
 import re
+import sys
 import json
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Tuple
 import fitz  # PyMuPDF
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from tqdm import tqdm
 
+# Backend package (processed corpus format)
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.ingestion.corpus import ArticleWriter, write_manifest  # noqa: E402
+
+# One scan over the whole document: page markers (to track page numbers) and
+# article headings in either language. Headings must open a line, so
+# references such as "- Article 101 de la loi ..." are not taken as articles,
+# and an article runs until the next heading, across page breaks. Tokens start
+# with a literal newline rather than "^" so the scan can skip ahead to line
+# breaks (about 3x faster than MULTILINE anchors on these documents).
+ARTICLE_NUMBER = r'\d+(?:[ \t]*-[ \t]*\d+)?(?:[ \t]+(?:bis|ter|quater|quinquies|sexies))?'
+SEGMENT_TOKENS = re.compile(
+    r'\n(?:'
+    r'--- Page (?P<page>\d+) ---(?=\n)'  # leaves the line break to a heading on the next line
+    r'|[ \t]*(?:'
+    r'(?:Article|ARTICLE|Art\.)[ \t]*(?:(?P<fr_first>premier|1er)|(?P<fr_num>' + ARTICLE_NUMBER + r'))'
+    r'|(?:المادة|الفصل)[ \t]+(?:(?P<ar_first>الأولى)|(?P<ar_num>\d+(?:[ \t]*-[ \t]*\d+)?))'
+    r')(?![^\W\d_])[ \t]*:?'
+    r')'
+)
+
+# Amendment note on the heading line, e.g. "(Modifié par la loi n° 87-70 ...)."
+HEADING_NOTE = re.compile(r'^\(.*\)\.?(?:\s*\(\d+\))?$')
+
+# Pages extracted per pool task: small enough to spread one large code over
+# every core, large enough that reopening the PDF per task stays negligible
+PAGES_PER_TASK = 32
+
 @dataclass
 class LegalArticle:
     """Represents a parsed legal article"""
@@ -27,33 +72,11 @@ class LegalArticle:
 class LegalTextExtractor:
     """Extract and parse legal text from PDFs"""
 
-    def __init__(self):
-        self.article_patterns = {
-            'fr': [
-                r'Article\s+(\d+(?:\s*-\s*\d+)?)\s*:?\s*(.+?)(?=Article\s+\d+|$)',  # Article 123
-                r'Art\.\s*(\d+(?:\s*-\s*\d+)?)\s*:?\s*(.+?)(?=Art\.\s*\d+|$)',      # Art. 123
-                r'Article\s+premier\s*:?\s*(.+?)(?=Article\s+\d+|$)',                # Article premier
-            ],
-            'ar': [
-                r'المادة\s+(\d+(?:\s*-\s*\d+)?)\s*:?\s*(.+?)(?=المادة\s+\d+|$)',    # المادة 123
-                r'الفصل\s+(\d+(?:\s*-\s*\d+)?)\s*:?\s*(.+?)(?=الفصل\s+\d+|$)',     # الفصل 123
-                r'المادة\s+الأولى\s*:?\s*(.+?)(?=المادة\s+\d+|$)',                 # المادة الأولى
-            ]
-        }
-
     def extract_text_from_pdf(self, pdf_path: Path) -> str:
         """Extract all text from PDF"""
         try:
-            doc = fitz.open(pdf_path)
-            full_text = ""
-
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text = page.get_text()
-                full_text += f"\n--- Page {page_num + 1} ---\n{text}"
-
-            doc.close()
-            return full_text
+            with fitz.open(pdf_path) as doc:
+                return "".join(extract_page_range(pdf_path, 0, len(doc), doc=doc))
 
         except Exception as e:
             print(f"❌ Error extracting text from {pdf_path}: {e}")
@@ -74,57 +97,82 @@ class LegalTextExtractor:
         language: str = 'auto'
     ) -> List[LegalArticle]:
         """Parse legal text into individual articles"""
+        return list(self.iter_articles(text, code_name, official_ref, language))
+
+    def iter_articles(
+        self,
+        text: str,
+        code_name: str,
+        official_ref: str,
+        language: str = 'auto'
+    ) -> Iterator[LegalArticle]:
+        """Yield articles one at a time as the segmenter finds them"""
 
         if language == 'auto':
             language = self.detect_language(text)
 
-        articles = []
-        patterns = self.article_patterns.get(language, self.article_patterns['fr'])
-
-        # Split by pages first
-        pages = text.split('--- Page')
-
-        for page_idx, page_text in enumerate(pages):
-            if not page_text.strip():
+        for article_num, content, page_number in self.segment_articles(text, language):
+            # Keep an amendment note on the heading line as the title
+            title = None
+            heading_rest, _, body = content.partition('\n')
+            heading_rest = heading_rest.strip()
+            if body.strip() and len(heading_rest) < 150 and HEADING_NOTE.match(heading_rest):
+                title = heading_rest
+                content = body
+
+            # Clean content
+            content = self.clean_text(content)
+
+            if content and len(content) > 20:  # Minimum content length
+                yield LegalArticle(
+                    article_number=article_num,
+                    title=title,
+                    content=content,
+                    language=language,
+                    page_number=page_number,
+                    code_name=code_name,
+                    official_ref=official_ref
+                )
+
+    def segment_articles(self, text: str, language: str) -> Iterator[Tuple[str, str, int]]:
+        """Split text into ``(article_number, raw_content, page_number)`` in one pass
+
+        Runs in linear time: every token is matched once and each article's
+        content is assembled from the spans between tokens, leaving page
+        markers out. Content keeps the rest of the heading line as its first
+        line (empty when the heading stands alone).
+        """
+        if not text.startswith('\n'):
+            text = '\n' + text  # tokens are anchored on the preceding line break
+
+        page = 1
+        current = None  # (article_number, page_number) of the open article
+        pieces: List[str] = []
+        position = 0
+
+        for token in SEGMENT_TOKENS.finditer(text):
+            if current is not None:
+                pieces.append(text[position:token.start()])
+            position = token.end()
+
+            if token.group('page'):
+                page = int(token.group('page'))
                 continue
 
-            # Try each pattern
-            for pattern in patterns:
-                matches = re.finditer(pattern, page_text, re.DOTALL | re.MULTILINE)
-
-                for match in matches:
-                    if len(match.groups()) >= 2:
-                        article_num = match.group(1).strip()
-                        content = match.group(2).strip()
-                    elif len(match.groups()) == 1:
-                        # Article premier / المادة الأولى
-                        article_num = "1" if language == 'fr' else "١"
-                        content = match.group(1).strip()
-                    else:
-                        continue
-
-                    # Extract title if present (usually first line)
-                    title = None
-                    content_lines = content.split('\n')
-                    if len(content_lines) > 1 and len(content_lines[0]) < 150:
-                        title = content_lines[0].strip()
-                        content = '\n'.join(content_lines[1:]).strip()
-
-                    # Clean content
-                    content = self.clean_text(content)
-
-                    if content and len(content) > 20:  # Minimum content length
-                        articles.append(LegalArticle(
-                            article_number=article_num,
-                            title=title,
-                            content=content,
-                            language=language,
-                            page_number=page_idx + 1,
-                            code_name=code_name,
-                            official_ref=official_ref
-                        ))
-
-        return articles
+            if current is not None:
+                yield current[0], ''.join(pieces).lstrip(' \t').rstrip(), current[1]
+            if token.group('fr_first') or token.group('ar_first'):
+                # Article premier / المادة الأولى
+                article_num = "1" if language == 'fr' else "١"
+            else:
+                article_num = re.sub(r'\s*-\s*', '-', token.group('fr_num') or token.group('ar_num'))
+                article_num = re.sub(r'\s+', ' ', article_num)
+            current = (article_num, page)
+            pieces = []
+
+        if current is not None:
+            pieces.append(text[position:])
+            yield current[0], ''.join(pieces).lstrip(' \t').rstrip(), current[1]
 
     def clean_text(self, text: str) -> str:
         """Clean extracted text"""
@@ -144,9 +192,10 @@ class LegalTextExtractor:
     def extract_structured_content(
         self,
         pdf_path: Path,
-        metadata: Dict
+        metadata: Dict,
+        output_path: Path
     ) -> Dict:
-        """Extract structured content from legal PDF"""
+        """Extract structured content from legal PDF, writing articles to ``output_path``"""
 
         print(f"\n📖 Processing: {metadata['name']}")
         print(f"   File: {pdf_path}")
@@ -154,6 +203,13 @@ class LegalTextExtractor:
         # Extract raw text
         raw_text = self.extract_text_from_pdf(pdf_path)
 
+        return self.structure_text(raw_text, metadata, output_path)
+
+    def structure_text(self, raw_text: str, metadata: Dict, output_path: Path) -> Dict:
+        """Parse extracted text, streaming its articles to ``output_path`` as JSON Lines
+
+        Returns the document's manifest entry (everything but the articles).
+        """
         if not raw_text:
             return {"success": False, "error": "Failed to extract text"}
 
@@ -161,38 +217,133 @@ class LegalTextExtractor:
         language = self.detect_language(raw_text)
         print(f"   Detected language: {language.upper()}")
 
-        # Parse articles
-        articles = self.parse_articles(
-            raw_text,
-            metadata['name'],
-            metadata['official_ref'],
-            language
-        )
+        # Parse articles, writing each as soon as it is found
+        with ArticleWriter(output_path) as writer:
+            for article in self.iter_articles(
+                raw_text,
+                metadata['name'],
+                metadata['official_ref'],
+                language
+            ):
+                writer.write(asdict(article))
 
-        print(f"   ✅ Extracted {len(articles)} articles")
+        print(f"   ✅ Extracted {writer.count} articles")
 
         return {
             "success": True,
             "metadata": metadata,
             "language": language,
-            "total_articles": len(articles),
-            "articles": [
-                {
-                    "article_number": art.article_number,
-                    "title": art.title,
-                    "content": art.content,
-                    "language": art.language,
-                    "page_number": art.page_number,
-                    "code_name": art.code_name,
-                    "official_ref": art.official_ref
-                }
-                for art in articles
-            ],
+            "total_articles": writer.count,
+            "articles_file": output_path.name,
             "raw_text_length": len(raw_text),
             "raw_text_preview": raw_text[:500]
         }
 
-def main():
+    def extract_documents(
+        self,
+        jobs: List[Tuple[str, Path, Dict]],
+        workers: int,
+        output_dir: Path,
+    ) -> Dict[str, Dict]:
+        """Extract ``(doc_id, pdf_path, metadata)`` jobs on a process pool
+
+        Workers write each document's articles to ``output_dir`` themselves,
+        so only manifest entries travel back to this process.
+        Returns results keyed by doc_id, each with a ``timings`` entry holding
+        the summed extraction and parsing seconds spent in workers.
+        """
+        results: Dict[str, Dict] = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}  # future -> (doc_id, part index) or (doc_id, None) for parsing
+            parts: Dict[str, List[Optional[List[str]]]] = {}
+            failed = set()
+            timings: Dict[str, Dict[str, float]] = {}
+            jobs_by_id = {doc_id: (pdf_path, metadata) for doc_id, pdf_path, metadata in jobs}
+
+            def submit_parse(doc_id: str, raw_text: str) -> None:
+                future = pool.submit(
+                    _structure_document, raw_text, jobs_by_id[doc_id][1], output_dir / f"{doc_id}.jsonl"
+                )
+                pending[future] = (doc_id, None)
+
+            for doc_id, pdf_path, metadata in jobs:
+                timings[doc_id] = {"extract_s": 0.0, "parse_s": 0.0, "pages": 0, "tasks": 0}
+                try:
+                    with fitz.open(pdf_path) as doc:
+                        page_count = len(doc)
+                except Exception as e:
+                    print(f"❌ Error extracting text from {pdf_path}: {e}")
+                    page_count = 0
+
+                ranges = [
+                    (start, min(start + PAGES_PER_TASK, page_count))
+                    for start in range(0, page_count, PAGES_PER_TASK)
+                ]
+                timings[doc_id].update(pages=page_count, tasks=len(ranges))
+                parts[doc_id] = [None] * len(ranges)
+                if not ranges:
+                    submit_parse(doc_id, "")
+                for index, (start, stop) in enumerate(ranges):
+                    future = pool.submit(_extract_pages_timed, str(pdf_path), start, stop)
+                    pending[future] = (doc_id, index)
+
+            with tqdm(total=len(jobs), desc="Processing documents") as progress:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        doc_id, index = pending.pop(future)
+
+                        if index is None:
+                            result, seconds = future.result()
+                            timings[doc_id]["parse_s"] += seconds
+                            results[doc_id] = {**result, "timings": _rounded(timings[doc_id])}
+                            progress.update(1)
+                            continue
+
+                        try:
+                            texts, seconds = future.result()
+                        except Exception as e:
+                            print(f"❌ Error extracting text from {jobs_by_id[doc_id][0]}: {e}")
+                            # One failed range fails the document, as in the sequential path
+                            failed.add(doc_id)
+                            texts, seconds = [], 0.0
+                        timings[doc_id]["extract_s"] += seconds
+                        parts[doc_id][index] = texts
+
+                        if all(part is not None for part in parts[doc_id]):
+                            page_texts = parts.pop(doc_id)
+                            raw_text = "" if doc_id in failed else "".join(
+                                text for part in page_texts for text in part
+                            )
+                            submit_parse(doc_id, raw_text)
+
+        return results
+
+
+def extract_page_range(pdf_path: Path, start: int, stop: int, doc=None) -> List[str]:
+    """Text of pages ``start``..``stop - 1``, each prefixed with its page marker"""
+    if doc is None:
+        with fitz.open(pdf_path) as doc:
+            return extract_page_range(pdf_path, start, stop, doc=doc)
+    return [f"\n--- Page {page_num + 1} ---\n{doc[page_num].get_text()}" for page_num in range(start, stop)]
+
+
+def _extract_pages_timed(pdf_path: str, start: int, stop: int) -> Tuple[List[str], float]:
+    """Pool task: open the PDF in this worker and extract a page range"""
+    started = perf_counter()
+    return extract_page_range(Path(pdf_path), start, stop), perf_counter() - started
+
+
+def _structure_document(raw_text: str, metadata: Dict, output_path: Path) -> Tuple[Dict, float]:
+    """Pool task: parse a document's text and write its articles"""
+    started = perf_counter()
+    return LegalTextExtractor().structure_text(raw_text, metadata, output_path), perf_counter() - started
+
+
+def _rounded(timings: Dict[str, float]) -> Dict[str, float]:
+    return {key: round(value, 2) if isinstance(value, float) else value for key, value in timings.items()}
+
+def main(workers: int = 1):
     """Main extraction function"""
     print("=" * 80)
     print("📚 Mo7ami Legal Text Extraction Pipeline")
@@ -215,28 +366,37 @@ def main():
 
     extractor = LegalTextExtractor()
     results = []
+    started = perf_counter()
 
-    # Process each document
-    for doc_id, metadata in tqdm(all_metadata.items(), desc="Processing documents"):
+    jobs = []
+    for doc_id, metadata in all_metadata.items():
         pdf_path = data_dir / metadata['filename']
 
         if not pdf_path.exists():
             print(f"\n⏭️  Skipping {metadata['name']} (file not found)")
             continue
-
-        # Extract content
-        result = extractor.extract_structured_content(pdf_path, metadata)
-        results.append({
-            "doc_id": doc_id,
-            **result
-        })
-
-        # Save individual processed file
-        output_file = output_dir / f"{doc_id}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-
-        print(f"   💾 Saved to: {output_file}")
+        jobs.append((doc_id, pdf_path, metadata))
+
+    if workers > 1:
+        print(f"\n⚙️  Extracting {len(jobs)} documents with {workers} worker processes")
+        extracted = extractor.extract_documents(jobs, workers, output_dir)
+    else:
+        extracted = {}
+        # Process each document
+        for doc_id, pdf_path, metadata in tqdm(jobs, desc="Processing documents"):
+            doc_started = perf_counter()
+            result = extractor.extract_structured_content(pdf_path, metadata, output_dir / f"{doc_id}.jsonl")
+            extracted[doc_id] = {**result, "timings": {"total_s": round(perf_counter() - doc_started, 2)}}
+
+    for doc_id, pdf_path, metadata in jobs:
+        result = {"doc_id": doc_id, **extracted[doc_id]}
+        results.append(result)
+
+        articles_file = output_dir / result.get("articles_file", "-")
+        print(
+            f"   💾 {metadata['name']}: {result.get('total_articles', 0)} articles "
+            f"({', '.join(f'{key} {value}' for key, value in result['timings'].items())}) → {articles_file}"
+        )
 
     # Summary
     print("\n" + "=" * 80)
@@ -248,6 +408,7 @@ def main():
 
     print(f"✅ Successfully processed: {successful}/{len(results)} documents")
     print(f"📄 Total articles extracted: {total_articles}")
+    print(f"⏱️  Extraction took {perf_counter() - started:.1f}s with {workers} worker(s)")
 
     # Print breakdown
     print("\n📑 Articles by document:")
@@ -255,22 +416,22 @@ def main():
         if result.get('success'):
             print(f"   • {result['metadata']['name']}: {result['total_articles']} articles")
 
-    # Save summary
-    summary_path = output_dir / "extraction_summary.json"
-    with open(summary_path, 'w', encoding='utf-8') as f:
-        json.dump({
-            "total_documents": len(results),
-            "successful": successful,
-            "total_articles": total_articles,
-            "results": results
-        }, f, ensure_ascii=False, indent=2)
-
-    print(f"\n💾 Summary saved to: {summary_path}")
+    # Save manifest (document entries only; articles live in the .jsonl files)
+    manifest_path = write_manifest(output_dir, results)
+
+    print(f"\n💾 Manifest saved to: {manifest_path}")
     print("=" * 80)
 
     return successful == len(results)
 
 if __name__ == "__main__":
-    import sys
-    success = main()
+    parser = argparse.ArgumentParser(description="Extract and parse legal articles from PDFs")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes for page extraction and parsing (1 = sequential, default: CPU count)",
+    )
+    args = parser.parse_args()
+    success = main(workers=max(1, args.workers))
     sys.exit(0 if success else 1)
@@ -3,25 +3,61 @@
 Database Ingestion Script for Mo7ami
 Ingests processed legal documents into Supabase with vector embeddings
 With retry logic, rate limit handling, and progress checkpointing
+
+Chunks are content-addressed (hash of normalized text, model and dimensions in
+metadata.content_hash). With the postgres backend, re-ingestion diffs against
+the database: unchanged chunks are skipped, moved chunks reuse their stored
+embedding, and chunks that no longer exist are deleted.
+
+Articles are chunked by backend/app/ingestion/chunker.py: up to
+CHUNK_MAX_TOKENS tiktoken tokens, split at sentence/alinéa boundaries, with
+consecutive short articles merged (metadata.article_numbers lists them).
+--chunker sentence keeps the previous 500-character splitter; compare the two
+with scripts/chunking-report.py.
+
+Documents are read lazily from the processed corpus (manifest.json plus one
+JSON Lines file of articles per document, see backend/app/ingestion/corpus.py),
+so memory stays flat however large a code grows.
+
+Every embedding is also kept in a local store (backend/data/embeddings by
+default), so rebuilding a database from backend/data/processed only calls
+OpenAI for text that has never been embedded.
+
+Reading/chunking, embedding and writing run as a concurrent asyncio pipeline
+(see backend/app/ingestion/pipeline.py) sharing one OpenAI RPM/TPM budget.
 """
 
 import os
 import sys
 import json
+import argparse
 import asyncio
-import time
+from collections import Counter
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Dict
+from typing import AsyncIterator, Iterator, List, Dict
 from datetime import datetime
 from dotenv import load_dotenv
-import openai
-from openai import RateLimitError, APIError, APITimeoutError
-from supabase import create_client, Client
-from tqdm import tqdm
+from openai import AsyncOpenAI
 import hashlib
 
+# Backend package (batched embedder, direct Postgres backend)
+ROOT_DIR = Path(__file__).resolve().parents[1]
+BACKEND_DIR = ROOT_DIR / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.ingestion.chunker import make_chunker  # noqa: E402
+from app.ingestion.content_hash import chunk_content_hash, document_content_hash  # noqa: E402
+from app.ingestion.corpus import iter_articles, load_manifest  # noqa: E402
+from app.ingestion.embedder import BatchEmbedder  # noqa: E402
+from app.ingestion.embedding_store import open_embedding_store  # noqa: E402
+from app.ingestion.pipeline import ChunkBatch, IngestionPipeline, IngestionProgress  # noqa: E402
+from app.ingestion.rate_limiter import RateLimiter  # noqa: E402
+
 # Load environment variables
 load_dotenv()
+load_dotenv(BACKEND_DIR / ".env")
 
 # Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -31,7 +67,21 @@ SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 # Embedding configuration
 EMBEDDING_MODEL = "text-embedding-3-large"
 EMBEDDING_DIMENSIONS = 1536
-CHUNK_SIZE = 500  # characters
+CHUNK_MAX_TOKENS = 400  # token budget per chunk (see backend/app/ingestion/chunker.py)
+CHUNK_OVERLAP_TOKENS = 40  # trailing sentences repeated at the start of the next chunk
+CHUNK_MERGE_BELOW_TOKENS = 80  # consecutive articles shorter than this share a chunk
+EMBEDDING_BATCH_SIZE = 256  # inputs per embeddings request
+EMBEDDING_BATCH_TOKENS = 100_000  # tiktoken budget per embeddings request
+
+# Local embedding store shared with the backend (EMBEDDING_STORE_PATH is relative to backend/)
+EMBEDDING_STORE_PATH = BACKEND_DIR / os.getenv("EMBEDDING_STORE_PATH", "data/embeddings")
+
+# Chunks per pipeline batch: embedded together, then written with one COPY
+WRITE_BATCH_SIZE = 500
+
+# Account limits shared by all embedding workers (see your OpenAI usage tier)
+EMBEDDING_RPM = int(os.getenv("OPENAI_EMBEDDING_RPM", "3000"))
+EMBEDDING_TPM = int(os.getenv("OPENAI_EMBEDDING_TPM", "1000000"))
 
 # Retry configuration
 MAX_RETRIES = 5
@@ -41,18 +91,60 @@ MAX_RETRY_DELAY = 60  # seconds
 class LegalDocumentIngester:
     """Ingest legal documents into database with embeddings"""
 
-    def __init__(self, checkpoint_file: Path = None):
+    def __init__(
+        self,
+        checkpoint_file: Path = None,
+        backend: str = "postgres",
+        concurrency: int = 4,
+        queue_size: int = 8,
+        embedding_store: Path = None,
+        chunker: str = "token",
+    ):
         if not OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not set in environment")
-        if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-            raise ValueError("Supabase credentials not set in environment")
 
-        self.openai_client = openai.OpenAI(
+        self.openai_client = AsyncOpenAI(
             api_key=OPENAI_API_KEY,
-            timeout=30.0,  # 30 second timeout
+            timeout=60.0,  # large batches take longer than single inputs
             max_retries=0  # We handle retries ourselves
         )
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+        self.embedder = BatchEmbedder(
+            self.openai_client,
+            model=EMBEDDING_MODEL,
+            dimensions=EMBEDDING_DIMENSIONS,
+            max_batch_size=EMBEDDING_BATCH_SIZE,
+            max_batch_tokens=EMBEDDING_BATCH_TOKENS,
+            max_retries=MAX_RETRIES,
+            initial_retry_delay=INITIAL_RETRY_DELAY,
+            max_retry_delay=MAX_RETRY_DELAY,
+            limiter=RateLimiter(
+                requests_per_minute=EMBEDDING_RPM,
+                tokens_per_minute=EMBEDDING_TPM,
+            ),
+            store=open_embedding_store(
+                embedding_store, model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIMENSIONS
+            ),
+        )
+        self.chunker = make_chunker(
+            chunker,
+            encoding=self.embedder.encoding,
+            max_tokens=CHUNK_MAX_TOKENS,
+            overlap_tokens=CHUNK_OVERLAP_TOKENS,
+            merge_below_tokens=CHUNK_MERGE_BELOW_TOKENS,
+        )
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.backend = backend
+        self.supabase = None
+        self.writer = None  # PostgresChunkWriter while ingest_all_documents runs
+        if backend == "supabase":
+            from supabase import create_client
+
+            if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+                raise ValueError("Supabase credentials not set in environment")
+            self.supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+        elif not os.getenv("DATABASE_URL"):
+            raise ValueError("DATABASE_URL not set in environment (needed by --backend postgres)")
         self.checkpoint_file = checkpoint_file or Path("/tmp/ingestion_checkpoint.json")
         self.checkpoint_data = self.load_checkpoint()
 
@@ -85,82 +177,82 @@ class LegalDocumentIngester:
         except Exception as e:
             print(f"⚠️  Could not save checkpoint: {e}")
 
-    def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using OpenAI with retry logic"""
-        retry_delay = INITIAL_RETRY_DELAY
+    @asynccontextmanager
+    async def open_backend(self):
+        """Hold a bulk-writer connection for the postgres backend"""
+        if self.backend != "postgres":
+            yield
+            return
 
-        for attempt in range(MAX_RETRIES):
-            try:
-                response = self.openai_client.embeddings.create(
-                    model=EMBEDDING_MODEL,
-                    input=text,
-                    dimensions=EMBEDDING_DIMENSIONS
-                )
-                return response.data[0].embedding
-
-            except RateLimitError as e:
-                if attempt < MAX_RETRIES - 1:
-                    wait_time = min(retry_delay * (2 ** attempt), MAX_RETRY_DELAY)
-                    print(f"⏳ Rate limit hit, waiting {wait_time}s... (attempt {attempt + 1}/{MAX_RETRIES})")
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ Rate limit exceeded after {MAX_RETRIES} attempts: {e}")
-                    return None
-
-            except APITimeoutError as e:
-                if attempt < MAX_RETRIES - 1:
-                    wait_time = min(retry_delay * (2 ** attempt), MAX_RETRY_DELAY)
-                    print(f"⏳ API timeout, retrying in {wait_time}s... (attempt {attempt + 1}/{MAX_RETRIES})")
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ API timeout after {MAX_RETRIES} attempts: {e}")
-                    return None
-
-            except APIError as e:
-                if attempt < MAX_RETRIES - 1:
-                    wait_time = min(retry_delay * (2 ** attempt), MAX_RETRY_DELAY)
-                    print(f"⏳ API error, retrying in {wait_time}s... (attempt {attempt + 1}/{MAX_RETRIES})")
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ API error after {MAX_RETRIES} attempts: {e}")
-                    return None
+        from app.core.database import engine
+        from app.ingestion.postgres_writer import PostgresChunkWriter
 
+        try:
+            async with PostgresChunkWriter(engine) as writer:
+                self.writer = writer
+                yield
+        finally:
+            self.writer = None
+            await engine.dispose()
+
+    async def store_document(self, doc_record: Dict) -> str:
+        """Upsert a legal_documents row and return its id"""
+        if self.writer is not None:
+            return await self.writer.upsert_document(doc_record)
+        doc_result = await asyncio.to_thread(
+            lambda: self.supabase.table('legal_documents').upsert(doc_record).execute()
+        )
+        return doc_result.data[0]['id']
+
+    async def store_chunks(self, chunk_records: List[Dict]) -> List[str]:
+        """Write chunk records, returning the ids that were stored"""
+        if self.writer is not None:
+            await self.writer.write_chunks(chunk_records)
+            return [record["id"] for record in chunk_records]
+
+        stored = await asyncio.to_thread(self._upsert_chunks_rest, chunk_records)
+        self.mark_processed(stored)
+        return stored
+
+    def _upsert_chunks_rest(self, chunk_records: List[Dict]) -> List[str]:
+        """Blocking per-chunk Supabase upserts (run in a worker thread)"""
+        stored = []
+        for chunk_record in chunk_records:
+            try:
+                self.supabase.table('document_chunks').upsert(chunk_record).execute()
+                stored.append(chunk_record["id"])
             except Exception as e:
-                print(f"❌ Unexpected error generating embedding: {e}")
-                return None
-
-        return None
-
-    def chunk_text(self, text: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
-        """Split text into chunks for embedding"""
-        # Split by sentences first
-        sentences = text.replace('\n', ' ').split('. ')
-
-        chunks = []
-        current_chunk = ""
-
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-
-            # Add period back if it was removed
-            if not sentence.endswith('.'):
-                sentence += '.'
-
-            # Check if adding this sentence would exceed chunk size
-            if len(current_chunk) + len(sentence) > chunk_size:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-            else:
-                current_chunk += " " + sentence if current_chunk else sentence
-
-        # Add remaining chunk
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-
-        return chunks
+                print(f"❌ Failed to insert chunk {chunk_record['id']}: {e}")
+        return stored
+
+    async def reuse_embeddings(self, records: List[Dict], stored_by_hash: Dict[str, str]) -> int:
+        """Give records whose content is stored under another id that embedding
+
+        Happens when chunking shifts (e.g. an article is split differently):
+        the text is unchanged, so there is no need to embed it again.
+        """
+        donors = {
+            record["id"]: stored_by_hash[record["metadata"]["content_hash"]]
+            for record in records
+            if record["metadata"]["content_hash"] in stored_by_hash
+        }
+        if not donors:
+            return 0
+        embeddings = await self.writer.fetch_embeddings(sorted(set(donors.values())))
+        reused = 0
+        for record in records:
+            donor = donors.get(record["id"])
+            if donor in embeddings:
+                record["embedding"] = embeddings[donor]
+                reused += 1
+        return reused
+
+    def mark_processed(self, chunk_ids: List[str]):
+        """Record stored chunks in the checkpoint"""
+        if "processed_chunks" not in self.checkpoint_data:
+            self.checkpoint_data["processed_chunks"] = set()
+        self.checkpoint_data["processed_chunks"].update(chunk_ids)
+        self.save_checkpoint()
 
     def create_document_id(self, code_name: str, article_num: str) -> str:
         """Create unique document ID"""
@@ -168,115 +260,121 @@ class LegalDocumentIngester:
         text = text.replace(" ", "_").replace("-", "_")
         return hashlib.md5(text.encode()).hexdigest()[:16]
 
-    async def ingest_document(self, doc_data: Dict) -> Dict:
-        """Ingest a single legal document"""
-        try:
-            metadata = doc_data['metadata']
-
-            # Create legal document record
-            doc_record = {
-                "id": self.create_document_id(metadata['name'], metadata.get('official_ref', '')),
-                "title": metadata['name'],
-                "title_ar": metadata.get('name_ar', ''),
-                "domain": metadata['domain'],
-                "language": doc_data['language'],
-                "official_ref": metadata['official_ref'],
-                "publication_date": None,  # Would need to parse from official_ref
-                "content": doc_data.get('raw_text_preview', ''),
-                "metadata": {
-                    "total_articles": doc_data['total_articles'],
-                    "source_file": metadata['filename'],
-                    "priority": metadata.get('priority', 99)
-                }
+    def iter_chunk_records(self, document_id: str, doc_entry: Dict, articles_path: Path) -> Iterator[Dict]:
+        """Chunk records (without embeddings) of a document, read lazily from its articles file"""
+        metadata = doc_entry['metadata']
+
+        for chunk in self.chunker.chunk_articles(iter_articles(articles_path)):
+            article = chunk.article
+
+            # Create unique chunk ID (merged articles are named after the first one)
+            chunk_id = f"{document_id}_art{article['article_number']}_chunk{chunk.chunk_index}"
+
+            chunk_metadata = {
+                "title": article.get('title'),
+                "page_number": article.get('page_number'),
+                "chunk_index": chunk.chunk_index,
+                "total_chunks": chunk.total_chunks,
+                "token_count": chunk.token_count,
+                "code_name": article['code_name'],
+                "official_ref": article['official_ref'],
+                "content_hash": chunk_content_hash(
+                    chunk.text, model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIMENSIONS
+                ),
             }
+            if len(chunk.article_numbers) > 1:
+                chunk_metadata["article_numbers"] = chunk.article_numbers
 
-            # Upsert document
-            doc_result = self.supabase.table('legal_documents').upsert(doc_record).execute()
-            document_id = doc_result.data[0]['id']
-
-            print(f"   📄 Created document: {metadata['name']} (ID: {document_id})")
-
-            # Process articles
-            articles = doc_data.get('articles', [])
-            total_chunks = 0
-
-            for article in tqdm(articles, desc=f"   Processing articles", leave=False):
-                # Create chunks from article content
-                chunks = self.chunk_text(article['content'])
-
-                for chunk_idx, chunk_text in enumerate(chunks):
-                    # Create unique chunk ID
-                    chunk_id = f"{document_id}_art{article['article_number']}_chunk{chunk_idx}"
-
-                    # Skip if already processed (checkpoint)
-                    if chunk_id in self.checkpoint_data.get("processed_chunks", set()):
-                        total_chunks += 1
-                        continue
-
-                    # Generate embedding
-                    embedding = self.generate_embedding(chunk_text)
-
-                    if not embedding:
-                        print(f"⚠️  Skipping chunk {chunk_id} - embedding failed")
-                        continue
-
-                    # Create chunk record
-                    chunk_record = {
-                        "id": chunk_id,
-                        "document_id": document_id,
-                        "content": chunk_text,
-                        "language": article['language'],
-                        "article_number": article['article_number'],
-                        "embedding": embedding,
-                        "metadata": {
-                            "title": article.get('title'),
-                            "page_number": article.get('page_number'),
-                            "chunk_index": chunk_idx,
-                            "total_chunks": len(chunks),
-                            "code_name": article['code_name'],
-                            "official_ref": article['official_ref']
-                        }
-                    }
-
-                    # Insert chunk
-                    try:
-                        self.supabase.table('document_chunks').upsert(chunk_record).execute()
-                        total_chunks += 1
-
-                        # Update checkpoint
-                        if "processed_chunks" not in self.checkpoint_data:
-                            self.checkpoint_data["processed_chunks"] = set()
-                        self.checkpoint_data["processed_chunks"].add(chunk_id)
-
-                        # Save checkpoint every 10 chunks
-                        if total_chunks % 10 == 0:
-                            self.save_checkpoint()
-
-                    except Exception as e:
-                        print(f"❌ Failed to insert chunk {chunk_id}: {e}")
-
-            print(f"   ✅ Ingested {len(articles)} articles, {total_chunks} chunks")
-
-            # Mark document as completed
-            if "completed_documents" not in self.checkpoint_data:
-                self.checkpoint_data["completed_documents"] = set()
-            self.checkpoint_data["completed_documents"].add(document_id)
-            self.save_checkpoint()
-
-            return {
-                "success": True,
+            # Create chunk record (embedded by the pipeline)
+            yield {
+                "id": chunk_id,
                 "document_id": document_id,
-                "articles": len(articles),
-                "chunks": total_chunks
+                "content": chunk.text,
+                "language": article['language'],
+                "domain": metadata['domain'],
+                "article_number": article['article_number'],
+                "embedding": None,
+                "metadata": chunk_metadata,
             }
 
-        except Exception as e:
-            print(f"   ❌ Error ingesting document: {e}")
-            self.save_checkpoint()  # Save progress even on error
-            return {
-                "success": False,
-                "error": str(e)
+    def scan_chunk_hashes(self, document_id: str, doc_entry: Dict, articles_path: Path) -> Dict:
+        """First pass over a document: chunk ids and content hashes only"""
+        hashes: Dict[str, str] = {}
+        occurrences: Counter = Counter()
+        for record in self.iter_chunk_records(document_id, doc_entry, articles_path):
+            # Repeated article numbers yield repeated ids; the database keeps the last one
+            hashes[record["id"]] = record["metadata"]["content_hash"]
+            occurrences[record["id"]] += 1
+        return {"hashes": hashes, "occurrences": occurrences}
+
+    async def prepare_document(self, doc_entry: Dict, articles_path: Path) -> Dict:
+        """Upsert a legal document and work out which of its chunks need writing
+
+        Only chunk ids and hashes are held in memory; the records themselves
+        are produced again, lazily, by ``_document_batches``.
+        """
+        metadata = doc_entry['metadata']
+        document_id = self.create_document_id(metadata['name'], metadata.get('official_ref', ''))
+
+        # Create legal document record
+        doc_record = {
+            "id": document_id,
+            "title": metadata['name'],
+            "title_ar": metadata.get('name_ar', ''),
+            "domain": metadata['domain'],
+            "language": doc_entry['language'],
+            "official_ref": metadata['official_ref'],
+            "publication_date": None,  # Would need to parse from official_ref
+            "content": doc_entry.get('raw_text_preview', ''),
+            "metadata": {
+                "total_articles": doc_entry['total_articles'],
+                "source_file": metadata['filename'],
+                "priority": metadata.get('priority', 99)
             }
+        }
+
+        # Chunking and hashing a whole code is CPU work: keep it off the event loop
+        scan = await asyncio.to_thread(self.scan_chunk_hashes, document_id, doc_entry, articles_path)
+        hashes = scan["hashes"]
+        duplicates = sum(scan["occurrences"].values()) - len(hashes)
+        if duplicates:
+            print(f"   ⚠️  {duplicates} chunks share an id with a later chunk (duplicate article numbers)")
+
+        # Changes only when some chunk does, so unchanged documents keep updated_at
+        doc_record["metadata"]["content_hash"] = document_content_hash(hashes.items())
+
+        # Upsert document
+        document_id = await self.store_document(doc_record)
+
+        print(f"   📄 Upserted document: {metadata['name']} (ID: {document_id})")
+
+        if self.writer is not None:
+            # Diff against the database by id and content hash
+            stored = await self.writer.chunk_hashes(document_id)
+            pending = {chunk_id for chunk_id, content_hash in hashes.items() if stored.get(chunk_id) != content_hash}
+            stored_by_hash = {content_hash: chunk_id for chunk_id, content_hash in stored.items() if content_hash}
+            orphans = sorted(set(stored) - set(hashes))
+        else:
+            # Skip if already processed (checkpoint)
+            processed = self.checkpoint_data.get("processed_chunks", set())
+            pending = {chunk_id for chunk_id in hashes if chunk_id not in processed}
+            stored_by_hash, orphans = {}, []
+
+        print(f"   ♻️  {len(hashes) - len(pending)} unchanged, {len(pending)} to write, {len(orphans)} to delete")
+
+        return {
+            "document_id": document_id,
+            "articles": doc_entry['total_articles'],
+            "unchanged": len(hashes) - len(pending),
+            "reused": 0,
+            "deleted": 0,
+            "plan": {
+                "pending": pending,
+                "occurrences": scan["occurrences"],
+                "stored_by_hash": stored_by_hash,
+                "orphans": orphans,
+            },
+        }
 
     async def ingest_all_documents(self, processed_dir: Path):
         """Ingest all processed documents"""
@@ -284,55 +382,25 @@ class LegalDocumentIngester:
         print("💾 Mo7ami Database Ingestion Pipeline (Enhanced)")
         print("=" * 80)
 
-        # Load extraction summary
-        summary_path = processed_dir / "extraction_summary.json"
-        if not summary_path.exists():
-            print(f"❌ Extraction summary not found: {summary_path}")
+        # Load corpus manifest
+        summary = load_manifest(processed_dir)
+        if summary is None:
+            print(f"❌ Corpus manifest not found in: {processed_dir}")
             print("   Run extract-legal-text.py first")
             return False
+        if summary["format"] == "legacy-json":
+            print("⚠️  Legacy processed corpus (whole-file JSON); re-run extract-legal-text.py to stream JSON Lines")
 
-        with open(summary_path, 'r', encoding='utf-8') as f:
-            summary = json.load(f)
-
-        # Check for existing checkpoint
-        if self.checkpoint_data.get("completed_documents"):
+        # Check for existing checkpoint (the postgres backend diffs against the database instead)
+        if self.backend == "supabase" and self.checkpoint_data.get("completed_documents"):
             print(f"\n🔄 Resuming from checkpoint ({len(self.checkpoint_data['completed_documents'])} documents completed)")
             print(f"   {len(self.checkpoint_data.get('processed_chunks', []))} chunks already processed\n")
 
         print(f"\n📚 Total documents to ingest: {summary['successful']}")
         print(f"📄 Total articles: {summary['total_articles']}\n")
 
-        results = []
-
-        # Process each document
-        for result in summary['results']:
-            if not result.get('success'):
-                continue
-
-            doc_id = result['doc_id']
-
-            # Skip if already completed
-            if doc_id in self.checkpoint_data.get("completed_documents", set()):
-                print(f"✅ Skipping {doc_id} (already completed)")
-                continue
-
-            processed_file = processed_dir / f"{doc_id}.json"
-
-            if not processed_file.exists():
-                print(f"⏭️  Skipping {doc_id} (file not found)")
-                continue
-
-            # Load processed data
-            with open(processed_file, 'r', encoding='utf-8') as f:
-                doc_data = json.load(f)
-
-            # Ingest document
-            print(f"\n📥 Ingesting: {doc_data['metadata']['name']}")
-            ingest_result = await self.ingest_document(doc_data)
-            results.append({
-                "doc_id": doc_id,
-                **ingest_result
-            })
+        async with self.open_backend():
+            results = await self._ingest_documents(processed_dir, summary)
 
         # Summary
         print("\n" + "=" * 80)
@@ -359,7 +427,134 @@ class LegalDocumentIngester:
 
         return successful == len(results)
 
-async def main():
+    async def _ingest_documents(self, processed_dir: Path, summary: Dict) -> List[Dict]:
+        """Ingest every successfully extracted document not yet completed"""
+        results: List[Dict] = []
+
+        pipeline = IngestionPipeline(
+            embedder=self.embedder,
+            store=self.store_chunks,
+            embed_concurrency=self.concurrency,
+            # The postgres writer holds a single connection
+            write_concurrency=1,
+            queue_size=self.queue_size,
+            on_progress=lambda progress: print(f"   ⏱️  {progress.line()}"),
+        )
+        progress = await pipeline.run(self._chunk_batches(processed_dir, summary, results))
+
+        for result in results:
+            if not result.get("success"):
+                continue
+            document_id = result.pop("document_id")
+            result["chunks"] = result["unchanged"] + progress.written_by_document.get(document_id, 0)
+            print(f"   ✅ Ingested {result['doc_id']}: {result['articles']} articles, {result['chunks']} chunks")
+
+            # Mark document as completed
+            if self.backend == "supabase":
+                if "completed_documents" not in self.checkpoint_data:
+                    self.checkpoint_data["completed_documents"] = set()
+                self.checkpoint_data["completed_documents"].add(document_id)
+        if self.backend == "supabase":
+            self.save_checkpoint()
+
+        self.print_throughput(progress, results)
+        return results
+
+    async def _chunk_batches(
+        self, processed_dir: Path, summary: Dict, results: List[Dict]
+    ) -> AsyncIterator[ChunkBatch]:
+        """Producer stage: load each document, upsert it and yield chunk batches"""
+        # Process each document
+        for doc_entry in summary['documents']:
+            if not doc_entry.get('success'):
+                continue
+
+            doc_id = doc_entry['doc_id']
+
+            # Skip if already completed
+            if self.backend == "supabase" and doc_id in self.checkpoint_data.get("completed_documents", set()):
+                print(f"✅ Skipping {doc_id} (already completed)")
+                continue
+
+            articles_path = processed_dir / doc_entry['articles_file']
+
+            if not articles_path.exists():
+                print(f"⏭️  Skipping {doc_id} (file not found)")
+                continue
+
+            try:
+                print(f"\n📥 Ingesting: {doc_entry['metadata']['name']}")
+                prepared = await self.prepare_document(doc_entry, articles_path)
+            except Exception as e:
+                print(f"   ❌ Error ingesting document {doc_id}: {e}")
+                results.append({"doc_id": doc_id, "success": False, "error": str(e)})
+                continue
+
+            plan = prepared.pop("plan")
+            result = {"doc_id": doc_id, "success": True, **prepared}
+            results.append(result)
+
+            async for batch in self._document_batches(prepared["document_id"], doc_entry, articles_path, plan, result):
+                yield batch
+
+            # Every moved chunk has taken its embedding by now
+            if plan["orphans"]:
+                result["deleted"] = await self.writer.delete_chunks(plan["orphans"])
+
+    async def _document_batches(
+        self, document_id: str, doc_entry: Dict, articles_path: Path, plan: Dict, result: Dict
+    ) -> AsyncIterator[ChunkBatch]:
+        """Second pass over a document: batches of the chunk records that need writing"""
+        remaining = Counter(plan["occurrences"])
+        batch: List[Dict] = []
+        for record in self.iter_chunk_records(document_id, doc_entry, articles_path):
+            remaining[record["id"]] -= 1
+            if remaining[record["id"]] or record["id"] not in plan["pending"]:
+                continue
+            batch.append(record)
+            if len(batch) == WRITE_BATCH_SIZE:
+                result["reused"] += await self.reuse_embeddings(batch, plan["stored_by_hash"])
+                yield ChunkBatch(document_id=document_id, records=batch)
+                batch = []
+        if batch:
+            result["reused"] += await self.reuse_embeddings(batch, plan["stored_by_hash"])
+            yield ChunkBatch(document_id=document_id, records=batch)
+
+    def print_throughput(self, progress: IngestionProgress, results: List[Dict]):
+        """Print pipeline and embedding throughput"""
+        rates = progress.rates()
+        embedding_stats = self.embedder.stats.summary()
+        limiter_stats = self.embedder.limiter.stats()
+        print(
+            f"\n🚀 Pipeline: {progress.chunks_written} chunks in {rates['elapsed_s']}s "
+            f"({rates['chunks_per_second']} chunks/s, {rates['tokens_per_second']} tokens/s, "
+            f"{progress.chunks_failed} failed)"
+        )
+        unchanged = sum(r.get("unchanged", 0) for r in results)
+        reused = sum(r.get("reused", 0) for r in results)
+        deleted = sum(r.get("deleted", 0) for r in results)
+        print(
+            f"♻️  Incremental: {unchanged} chunks unchanged, {reused} embeddings reused, "
+            f"{deleted} orphaned chunks deleted"
+        )
+        if self.embedder.store is not None:
+            print(
+                f"💽 Embedding store: {embedding_stats['store_hits']} hits, "
+                f"{self.embedder.store.added} added ({len(self.embedder.store)} stored in {self.embedder.store.directory})"
+            )
+        print(
+            f"🔢 Embeddings: {embedding_stats['texts']} texts in {embedding_stats['batches']} requests "
+            f"({embedding_stats['splits']} splits, {embedding_stats['retries']} retries, "
+            f"{limiter_stats['waited_seconds']}s throttled by the RPM/TPM budget)"
+        )
+
+async def main(
+    backend: str = "postgres",
+    concurrency: int = 4,
+    queue_size: int = 8,
+    embedding_store: Path = EMBEDDING_STORE_PATH,
+    chunker: str = "token",
+):
     """Main ingestion function"""
     processed_dir = Path(__file__).parent.parent / "backend" / "data" / "processed"
 
@@ -368,14 +563,67 @@ async def main():
         print("   Run extract-legal-text.py first")
         return False
 
-    ingester = LegalDocumentIngester()
+    ingester = LegalDocumentIngester(
+        backend=backend,
+        concurrency=concurrency,
+        queue_size=queue_size,
+        embedding_store=embedding_store,
+        chunker=chunker,
+    )
     success = await ingester.ingest_all_documents(processed_dir)
 
     return success
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest processed legal documents with embeddings")
+    parser.add_argument(
+        "--backend",
+        choices=["postgres", "supabase"],
+        default="postgres",
+        help="postgres: bulk COPY through DATABASE_URL (default); supabase: REST upserts per chunk",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="concurrent embedding workers (throttled by OPENAI_EMBEDDING_RPM/TPM)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="chunk batches buffered between pipeline stages",
+    )
+    parser.add_argument(
+        "--embedding-store",
+        type=Path,
+        default=EMBEDDING_STORE_PATH,
+        help=f"local embedding store reused across runs (default: {EMBEDDING_STORE_PATH})",
+    )
+    parser.add_argument(
+        "--no-embedding-store",
+        action="store_true",
+        help="always call the embeddings API, without reading or writing the local store",
+    )
+    parser.add_argument(
+        "--chunker",
+        choices=["token", "sentence"],
+        default="token",
+        help=f"token: article-aware, up to {CHUNK_MAX_TOKENS} tokens (default); "
+             f"sentence: previous 500-character splitter",
+    )
+    args = parser.parse_args()
+
     try:
-        success = asyncio.run(main())
+        success = asyncio.run(
+            main(
+                backend=args.backend,
+                concurrency=args.concurrency,
+                queue_size=args.queue_size,
+                embedding_store=None if args.no_embedding_store else args.embedding_store,
+                chunker=args.chunker,
+            )
+        )
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\n⚠️  Ingestion interrupted by user")
@@ -28,7 +28,8 @@ source venv/bin/activate
 echo ""
 echo "📥 Installing Python dependencies..."
 pip install --upgrade pip
-pip install requests tqdm PyMuPDF python-dotenv openai supabase
+pip install requests tqdm PyMuPDF python-dotenv openai tiktoken supabase
+pip install sqlalchemy asyncpg pgvector numpy pydantic-settings loguru  # direct Postgres ingestion
 
 # Check environment variables
 echo ""
@@ -42,6 +43,9 @@ fi
 if [ -z "$SUPABASE_SERVICE_ROLE_KEY" ]; then
     echo "⚠️  Warning: SUPABASE_SERVICE_ROLE_KEY not set"
 fi
+if [ -z "$DATABASE_URL" ]; then
+    echo "⚠️  Warning: DATABASE_URL not set (required for direct Postgres ingestion)"
+fi
 
 # Step 1: Download legal documents
 echo ""
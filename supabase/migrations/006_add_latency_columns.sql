@@ -0,0 +1,7 @@
+-- Record response latency for streamed chat turns
+ALTER TABLE messages
+ADD COLUMN IF NOT EXISTS "responseTime" integer,
+ADD COLUMN IF NOT EXISTS "timeToFirstToken" integer;
+
+ALTER TABLE query_analytics
+ADD COLUMN IF NOT EXISTS "timeToFirstToken" integer;
@@ -0,0 +1,12 @@
+-- Replace the IVFFlat index with HNSW (pgvector >= 0.5.0)
+-- HNSW needs no training data, keeps recall stable as the corpus grows,
+-- and is tuned per query with: SET LOCAL hnsw.ef_search = <n>
+-- The backend creates the same index on startup (app/core/vector_index.py)
+-- and falls back to IVFFlat on older pgvector versions.
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw
+ON document_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+DROP INDEX IF EXISTS document_chunks_embedding_idx;
@@ -0,0 +1,89 @@
+-- Denormalize legal_documents.domain onto document_chunks and add partial
+-- HNSW indexes per language and per domain.
+-- With a single global ANN index, language/domain filters are applied after
+-- the index scan, so recall drops as the non-matching slice grows. Partial
+-- indexes let filtered searches scan only the matching rows. The backend
+-- renders the filter values as literals so the planner can use them.
+
+ALTER TABLE document_chunks
+ADD COLUMN IF NOT EXISTS domain text;
+
+UPDATE document_chunks AS c
+SET domain = d.domain
+FROM legal_documents AS d
+WHERE c.document_id = d.id
+  AND c.domain IS DISTINCT FROM d.domain;
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_domain
+ON document_chunks (domain);
+
+-- Keep the denormalized column filled for rows written without it
+CREATE OR REPLACE FUNCTION document_chunks_fill_domain()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.domain IS NULL THEN
+        SELECT domain INTO NEW.domain FROM legal_documents WHERE id = NEW.document_id;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS document_chunks_fill_domain ON document_chunks;
+CREATE TRIGGER document_chunks_fill_domain
+BEFORE INSERT OR UPDATE OF document_id ON document_chunks
+FOR EACH ROW EXECUTE FUNCTION document_chunks_fill_domain();
+
+-- Per-language partial indexes
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_language_ar
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE language = 'ar';
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_language_fr
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE language = 'fr';
+
+-- Per-domain partial indexes (new domains are picked up by
+-- python -m app.core.vector_index)
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_domain_civil_law
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE domain = 'civil_law';
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_domain_commercial_law
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE domain = 'commercial_law';
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_domain_consumer_law
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE domain = 'consumer_law';
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_domain_data_protection
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE domain = 'data_protection';
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_domain_family_law
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE domain = 'family_law';
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_domain_labor_law
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE domain = 'labor_law';
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_domain_penal_law
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE domain = 'penal_law';
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_embedding_hnsw_domain_tax_law
+ON document_chunks USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64)
+WHERE domain = 'tax_law';
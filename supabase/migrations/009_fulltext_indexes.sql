@@ -0,0 +1,14 @@
+-- Full-text GIN indexes for hybrid (full-text + vector) retrieval
+-- The expressions must match the backend query exactly:
+--   to_tsvector('<config>'::regconfig, content) @@ websearch_to_tsquery(...)
+-- The 'arabic' Snowball configuration ships with PostgreSQL 13+.
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_content_fts_ar
+ON document_chunks
+USING gin (to_tsvector('arabic'::regconfig, content))
+WHERE language = 'ar';
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_content_fts_fr
+ON document_chunks
+USING gin (to_tsvector('french'::regconfig, content))
+WHERE language = 'fr';
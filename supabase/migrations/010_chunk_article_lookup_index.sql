@@ -0,0 +1,7 @@
+-- B-tree index for explicit article lookups ("الفصل 505 من القانون الجنائي")
+-- Queries naming an article and a code are answered with
+--   WHERE document_id IN (...) AND article_number IN (...)
+-- instead of embedding the query and running a vector search.
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_document_article
+ON document_chunks (document_id, article_number);
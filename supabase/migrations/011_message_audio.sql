@@ -0,0 +1,4 @@
+-- Content-addressed key of the synthesized audio of an assistant message
+-- (sha256 hex, blob stored under AUDIO_STORE_PATH on the backend)
+ALTER TABLE messages
+ADD COLUMN IF NOT EXISTS "audioKey" varchar(64);